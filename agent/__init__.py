@@ -1,8 +1,18 @@
 """
 Log Analysis Agent package.
-"""
 
-from .graph import create_workflow
-from .state import AgentState
+Exports are resolved lazily so importing a lightweight submodule (for
+example ``agent.state``) does not pull in LangGraph and LangChain.
+"""
 
 __all__ = ["create_workflow", "AgentState"]
+
+
+def __getattr__(name):
+    if name == "create_workflow":
+        from .graph import create_workflow
+        return create_workflow
+    if name == "AgentState":
+        from .state import AgentState
+        return AgentState
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
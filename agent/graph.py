@@ -2,31 +2,40 @@
 Agent graph definition using LangGraph.
 """
 
-from langgraph.graph import StateGraph, END
 from agent.state import AgentState
-from agent.nodes import AgentNodes
 
-def create_workflow():
-    """Create and compile the LangGraph workflow"""
+def create_workflow(llm=None, tools=None, cassette=None, known_issues=None):
+    """Create and compile the LangGraph workflow
+
+    ``llm`` and ``tools`` override the default ChatOpenAI client and
+    ExternalTools instance (used by benchmarks and offline runs).
+    ``cassette`` records or replays all external calls (see agent/replay.py).
+    ``known_issues`` overrides the accepted-solution store (agent/known_issues.py).
+    """
+    
+    # Heavy dependencies load on first workflow build, not on import
+    from langgraph.graph import StateGraph, END
+    from agent.nodes import AgentNodes
     
     # Initialize nodes
-    nodes = AgentNodes()
+    nodes = AgentNodes(llm=llm, tools=tools, cassette=cassette, known_issues=known_issues)
     
     # Create graph
     workflow = StateGraph(AgentState)
     
     # Add nodes
     workflow.add_node("parse_logs", nodes.parse_logs_node)
+    workflow.add_node("detect_anomalies", nodes.detect_anomalies_node)
     workflow.add_node("enrich_data", nodes.enrich_data_node)
-    workflow.add_node("generate_solutions", nodes.generate_solutions_node)
-    workflow.add_node("build_report", nodes.build_report_node)
+    # generate_solutions and build_report run pipelined inside one node
+    workflow.add_node("synthesize", nodes.synthesize_node)
     
-    # Define edges (Parallel flow via enrich_data)
+    # Define edges (Parallel flow via enrich_data and synthesize)
     workflow.set_entry_point("parse_logs")
-    workflow.add_edge("parse_logs", "enrich_data")
-    workflow.add_edge("enrich_data", "generate_solutions")
-    workflow.add_edge("generate_solutions", "build_report")
-    workflow.add_edge("build_report", END)
+    workflow.add_edge("parse_logs", "detect_anomalies")
+    workflow.add_edge("detect_anomalies", "enrich_data")
+    workflow.add_edge("enrich_data", "synthesize")
+    workflow.add_edge("synthesize", END)
     
     # Compile
     app = workflow.compile()
@@ -0,0 +1,189 @@
+"""
+Known-issue store: accepted solutions for recurring errors.
+
+Solutions are stored by error fingerprint (see utils/anomaly.py) in a JSON
+file (``LOG_AGENT_KNOWN_ISSUES``, default ``known_issues.json``). A lookup
+first tries an exact fingerprint match. It then falls back to approximate
+matching: each fingerprint has a MinHash signature of its character
+shingles, and LSH banding finds candidates without scanning the store.
+Matches above the similarity threshold are reused and skip the LLM.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from utils.anomaly import fingerprint
+
+DEFAULT_PATH = os.getenv("LOG_AGENT_KNOWN_ISSUES", "known_issues.json")
+DEFAULT_THRESHOLD = float(os.getenv("LOG_AGENT_KNOWN_ISSUE_THRESHOLD", "0.8"))
+
+STORE_VERSION = 1
+SHINGLE_SIZE = 4
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# Mersenne prime for the universal hash family (a * x + b) mod p over 32-bit shingle hashes
+_PRIME = (1 << 61) - 1
+_rng = np.random.RandomState(1)
+_A = _rng.randint(1, 1 << 31, size=NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, 1 << 31, size=NUM_PERM).astype(np.uint64)
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set:
+    """Character n-grams of the lower-cased fingerprint"""
+    text = ' '.join(text.lower().split())
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def minhash(text: str) -> np.ndarray:
+    """MinHash signature (NUM_PERM values) of a text's shingles"""
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little') for s in shingles(text)),
+        dtype=np.uint64,
+    )
+    # a < 2**31 and x < 2**32, so a * x + b stays below 2**64
+    values = (_A[:, None] * hashes[None, :] + _B[:, None]) % np.uint64(_PRIME)
+    return values.min(axis=1)
+
+
+def similarity(sig_a, sig_b) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.mean(np.asarray(sig_a, dtype=np.uint64) == np.asarray(sig_b, dtype=np.uint64)))
+
+
+def _bands(signature) -> List[str]:
+    return [f"{band}:" + ','.join(str(int(v)) for v in signature[band * ROWS:(band + 1) * ROWS])
+            for band in range(BANDS)]
+
+
+class KnownIssueStore:
+    """Persistent fingerprint -> accepted solution map with approximate lookup"""
+
+    def __init__(self, path: str = DEFAULT_PATH, threshold: float = DEFAULT_THRESHOLD):
+        self.path = path
+        self.threshold = threshold
+        self.issues: Dict[str, Dict] = {}
+        self._buckets: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (ValueError, OSError) as e:
+            print(f"[!] Ignoring unreadable known-issue store {self.path}: {e}")
+            return
+        if data.get('version') != STORE_VERSION:
+            return
+        for key, entry in data.get('issues', {}).items():
+            self._index(key, entry)
+
+    def _index(self, key: str, entry: Dict):
+        self.issues[key] = entry
+        for band in _bands(entry['signature']):
+            self._buckets.setdefault(band, set()).add(key)
+
+    def save(self):
+        data = {'version': STORE_VERSION, 'issues': self.issues}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.known_issues-')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=1)
+        os.replace(tmp, self.path)
+
+    def add(self, message: str, solution: Dict, key: Optional[str] = None) -> str:
+        """Accept a solution for an error message; returns its fingerprint"""
+        key = key or fingerprint(message)
+        entry = {
+            'message': message,
+            'solution': solution,
+            'signature': [int(v) for v in minhash(key)],
+            'accepted_at': time.time(),
+        }
+        with self._lock:
+            if key in self.issues:
+                # Replacing a solution: drop the old bands first
+                for band in _bands(self.issues[key]['signature']):
+                    self._buckets.get(band, set()).discard(key)
+            self._index(key, entry)
+            self.save()
+        return key
+
+    def remove(self, key: str) -> bool:
+        """Forget an accepted solution (e.g. one that proved wrong); False if it was not stored"""
+        with self._lock:
+            entry = self.issues.pop(key, None)
+            if entry:
+                for band in _bands(entry['signature']):
+                    self._buckets.get(band, set()).discard(key)
+                self.save()
+        return entry is not None
+
+    def lookup(self, message: str, key: Optional[str] = None) -> Optional[Dict]:
+        """Best accepted solution for a message, or None
+
+        Returns {'fingerprint', 'solution', 'match': 'exact'|'similar', 'similarity'}.
+        """
+        key = key or fingerprint(message)
+        entry = self.issues.get(key)
+        if entry is not None:
+            return {'fingerprint': key, 'solution': entry['solution'], 'match': 'exact', 'similarity': 1.0}
+        if not self.issues:
+            return None
+
+        signature = minhash(key)
+        candidates = set()
+        for band in _bands(signature):
+            candidates |= self._buckets.get(band, set())
+        best, best_score = None, 0.0
+        for candidate in candidates:
+            score = similarity(signature, self.issues[candidate]['signature'])
+            if score > best_score:
+                best, best_score = candidate, score
+        if best is None or best_score < self.threshold:
+            return None
+        return {'fingerprint': best, 'solution': self.issues[best]['solution'],
+                'match': 'similar', 'similarity': round(best_score, 3)}
+
+
+def accept_solutions(solutions: List[Dict], priorities: List[Dict], store: Optional[KnownIssueStore] = None) -> int:
+    """Store newly generated solutions under their issue's fingerprint
+
+    Solutions are matched to priorities by the ``fingerprint`` field the LLM
+    is asked to echo; solutions that came from the store are skipped.
+    """
+    store = store or get_known_issues()
+    messages = {p['fingerprint']: p['error']['message'] for p in priorities}
+    accepted = 0
+    for solution in solutions:
+        key = solution.get('fingerprint') if isinstance(solution, dict) else None
+        if key in messages and not solution.get('known_issue'):
+            store.add(messages[key], solution, key=key)
+            accepted += 1
+    return accepted
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_known_issues() -> KnownIssueStore:
+    """Process-wide store loaded from LOG_AGENT_KNOWN_ISSUES"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = KnownIssueStore()
+    return _store
@@ -0,0 +1,50 @@
+"""
+Shared chat model client.
+
+Nodes, concurrent workflows and the chat UI share one process-wide
+ChatOpenAI instance, whether they call it synchronously or from the event
+loop of a workflow run (``asyncio.run`` opens a new loop per run).
+langchain-openai keeps its default sync and async HTTP pools in
+process-wide caches regardless of the instance, so separate instances per
+loop would only repeat client setup without isolating any connections.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+
+# Concurrent solution calls per workflow run (the report draft runs alongside them)
+LLM_CONCURRENCY = int(os.getenv("LOG_AGENT_LLM_CONCURRENCY", "4"))
+
+
+def create_llm():
+    """Build the default chat model (imports LangChain on first call)"""
+    from langchain_openai import ChatOpenAI
+    return ChatOpenAI(
+        model="gpt-4o-mini",
+        temperature=0,
+        max_tokens=4000
+    )
+
+
+_llm = None
+_lock = threading.Lock()
+
+
+def get_llm():
+    """Shared chat model, created on first use"""
+    global _llm
+    if _llm is None:
+        with _lock:
+            if _llm is None:
+                _llm = create_llm()
+    return _llm
+
+
+async def ainvoke(llm, prompt):
+    """Await a model call; models without ``ainvoke`` run on a worker thread"""
+    if hasattr(llm, 'ainvoke'):
+        return await llm.ainvoke(prompt)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, contextvars.copy_context().run, llm.invoke, prompt)
@@ -2,177 +2,611 @@
 Node definitions for the log analysis agent graph.
 """
 
-from langchain_openai import ChatOpenAI
 from agent.state import AgentState
 from agent.tools import ExternalTools
+from agent.replay import Cassette, CassetteLLM, CassetteTools
+from agent.resilience import ResilientTools, Unavailable, start_deadline, DEFAULT_BUDGET
+from agent.queries import CoalescingTools, normalize_query
+from agent.known_issues import get_known_issues
+from agent.llm import get_llm, ainvoke, LLM_CONCURRENCY
 from utils.parsers import LogParser
+from utils.anomaly import fingerprint, prioritize, DEFAULT_BUCKET_SECONDS
+from utils.diff import compare, merge_profiles, profile, profile_file, regressed
+from utils.sampling import sample_files
+from utils.tracing import traced, current_span, record_llm_usage
+from utils.blobs import get_blob_store
+import contextvars
+import itertools
 import json
+import os
 import asyncio
 
+# Seconds enrich_data waits past the deadline for in-flight backoff sleeps
+ENRICH_GRACE = 1.0
+
+# Number of prioritized errors that get researched and analyzed
+TOP_ERRORS = 5
+
+# Priorities kept in the workflow state (bounded regardless of log size)
+MAX_PRIORITIES = 100
+
+# Representative error records (one per pattern) included in LLM prompts
+PROMPT_ERRORS = 20
+
+# Placeholder the report draft leaves for the rendered solutions
+DETAILED_ANALYSIS = "<!-- DETAILED_ANALYSIS -->"
+
+# End-of-stream marker for solutions handed from generate_solutions to build_report
+DONE = object()
+
 class AgentNodes:
     """Node implementations for the LangGraph workflow"""
     
-    def __init__(self):
-        self.llm = ChatOpenAI(
-            model="gpt-4o-mini",
-            temperature=0,
-            max_tokens=4000
-        )
-        self.tools = ExternalTools()
+    def __init__(self, llm=None, tools=None, cassette=None, known_issues=None):
+        self.cassette = cassette or Cassette.from_env()
+        replaying = bool(self.cassette and self.cassette.replaying)
+        
+        # Replay mode serves everything from the cassette, so no real tools are needed
+        if tools is None and not replaying:
+            tools = ExternalTools()
+        if self.cassette:
+            tools = CassetteTools(tools, self.cassette)
+        
+        # Every lookup gets a timeout, retries and a circuit breaker per back end;
+        # identical lookups in flight across concurrent workflows share one request
+        self.tools = CoalescingTools(ResilientTools(tools))
         self.parser = LogParser()
+        self.blobs = get_blob_store()
+        self.known_issues = known_issues if known_issues is not None else get_known_issues()
+        
+        # Without an injected model, the shared client from agent/llm.py is used;
+        # it is built lazily so parse-only runs never import LangChain
+        self._llm = llm
+    
+    @property
+    def llm(self):
+        """Shared chat model, wrapped in the cassette when one is set"""
+        llm = self._llm
+        if llm is None and not (self.cassette and self.cassette.replaying):
+            llm = get_llm()
+        if self.cassette:
+            llm = CassetteLLM(llm, self.cassette)
+        return llm
     
-    def parse_logs_node(self, state: AgentState) -> AgentState:
-        """Node 1: Parse logs and extract errors"""
+    @traced("node.parse_logs")
+    def parse_logs_node(self, state: AgentState) -> dict:
+        """Node 1: Parse logs and extract errors
+
+        Parsed records go to the blob store; the state only gets their handle.
+        """
         print("[*] Parsing logs...")
         
-        parsed_errors = self.parser.parse_logs(state['logs'])
+        filters = state.get('filters') or {}
+        if self._mode(state, 'sample', "LOG_AGENT_SAMPLE"):
+            if state.get('baseline_paths'):
+                print("[!] Diff mode needs a full parse; baseline ignored while sampling")
+            return self._sample_logs(state, filters)
+        if not state.get('baseline_paths'):
+            return self._parse_current(state, filters, None)
+        # Diff mode: the baseline is profiled in worker processes while the current log is parsed
+        executor, baseline = self._start_baseline(state['baseline_paths'], filters)
+        try:
+            return self._parse_current(state, filters, baseline)
+        finally:
+            # The profiles were collected by _diff, so this joins idle workers; if parsing
+            # the current log failed, pending profiles are cancelled instead of left running
+            executor.shutdown(wait=True, cancel_futures=True)
+    
+    @staticmethod
+    def _mode(state: AgentState, key: str, env: str) -> bool:
+        """An explicit choice in the state wins; the environment only sets the default"""
+        value = state.get(key)
+        if value is None:
+            value = os.getenv(env, "").lower() in ("1", "true", "yes")
+        return value
+    
+    def _parse_current(self, state: AgentState, filters: dict, baseline) -> dict:
+        """Parse the current log; with baseline futures, also diff against them"""
+        if self._mode(state, 'sketch', "LOG_AGENT_SKETCH"):
+            update, sketch = self._sketch_logs(state, filters)
+            if baseline is not None:
+                summary = update['error_summary']
+                current = {
+                    'counts': {e['fingerprint']: e['count'] for e in summary['top']},
+                    'samples': {e['fingerprint']: e['error'] for e in summary['top']},
+                    'total': summary['total'], 'first': None, 'last': None,
+                }
+                update['diff'] = self._diff(baseline, current, sketch)
+            return update
+        
+        if state.get('log_paths'):
+            # Several services: merge into one timeline tagged with each record's source,
+            # streamed into the blob store rather than collected
+            parsed_errors = self.parser.iter_files(state['log_paths'], **filters)
+            current_span().set('bytes', sum(os.path.getsize(p) for p in state['log_paths']))
+        elif state.get('log_path'):
+            # Stream from disk (transparently decompressing) instead of holding the text
+            parsed_errors = self.parser.parse_file(state['log_path'], workers=os.cpu_count(), **filters)
+            current_span().set('bytes', os.path.getsize(state['log_path']))
+        else:
+            # Pasted/uploaded text lives in the blob store and is streamed from there
+            path = self.blobs.path(state['log_ref'])
+            parsed_errors = self.parser.parse_file(path, **filters)
+            current_span().set('bytes', os.path.getsize(path))
+        # zip stops before advancing the counter past the last record
+        counter = itertools.count()
+        parsed_errors_ref = self.blobs.put_records(record for record, _ in zip(parsed_errors, counter))
+        error_count = next(counter)
+        current_span().set('errors_found', error_count)
+        if baseline is not None:
+            # A merged stream is gone by now; profile the stored copy instead
+            current = profile(parsed_errors if isinstance(parsed_errors, list)
+                              else self.blobs.iter_records(parsed_errors_ref))
+        del parsed_errors
+        
+        print(f"[+] Found {error_count} errors/warnings")
+        update = {
+            'parsed_errors_ref': parsed_errors_ref,
+            'error_count': error_count,
+            'status': f"Found {error_count} issues",
+        }
+        if baseline is not None:
+            update['diff'] = self._diff(baseline, current)
+        return update
+    
+    def _sample_logs(self, state: AgentState, filters: dict) -> dict:
+        """Sampling mode: random blocks / stratified reservoir instead of a full parse"""
+        paths = state.get('log_paths') or [state.get('log_path') or self.blobs.path(state['log_ref'])]
+        records, summary = sample_files(paths, **filters)
+        current_span().set('bytes', sum(f['bytes'] for f in summary['files']))
+        current_span().set('bytes_read', sum(f['bytes_read'] for f in summary['files']))
+        total = summary['total']
+        current_span().set('errors_found', total['estimate'])
+        
+        if summary['exact']:
+            print(f"[+] Found {total['estimate']} errors/warnings, kept a sample of {len(records)}")
+        else:
+            print(f"[+] Sampled {len(records)} records: ~{total['estimate']} errors/warnings "
+                  f"(95% bounds {total['low']}-{total['high']}, read {summary['fraction']:.0%} of input)")
+        return {
+            'sample_summary': summary,
+            'parsed_errors_ref': self.blobs.put_records(records),
+            'error_count': total['estimate'],
+            'status': f"Sampled ~{total['estimate']} issues",
+        }
+    
+    @staticmethod
+    def _start_baseline(paths, filters: dict):
+        """Profile baseline logs in worker processes; returns (executor, futures)
+
+        The caller shuts the executor down once the diff is done.
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        # The baseline covers a different period, so only the level filter applies
+        levels = {'levels': filters['levels']} if filters.get('levels') else {}
+        executor = ProcessPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1))
+        futures = [executor.submit(profile_file, path, None, levels) for path in paths]
+        return executor, futures
+    
+    @staticmethod
+    def _diff(baseline_futures, current: dict, sketch=None) -> dict:
+        """Compare the current log's error groups with the baseline's
+
+        In sketch mode ``current`` only holds the top-K fingerprints; the
+        baseline's other fingerprints get Count-Min estimates from ``sketch``
+        so they are not reported as disappeared, and the diff is marked
+        approximate.
+        """
+        baseline = merge_profiles([f.result() for f in baseline_futures])
+        if sketch is not None:
+            for key in baseline['counts']:
+                if key not in current['counts']:
+                    estimate = sketch.counts.estimate(key)
+                    if estimate:
+                        current['counts'][key] = estimate
+        diff = compare(baseline, current)
+        diff['approximate'] = sketch is not None
+        counts = diff['counts']
+        for key, value in counts.items():
+            current_span().set(f'diff_{key}', value)
+        print(f"[+] Versus baseline ({baseline['total']} errors/warnings): {counts['new']} new, "
+              f"{counts['increased']} increased, {counts['disappeared']} disappeared"
+              f"{' (approximate, sketch mode)' if sketch is not None else ''}")
+        return diff
+    
+    def _sketch_logs(self, state: AgentState, filters: dict):
+        """Sketch mode: fixed-memory counts instead of one record per error
+
+        Returns the state update and the sketch itself, which diff mode
+        queries for fingerprints outside the top-K.
+        """
+        paths = state.get('log_paths') or [state.get('log_path') or self.blobs.path(state['log_ref'])]
+        sketch = self.parser.sketch_files(paths, workers=os.cpu_count(), **filters)
+        current_span().set('bytes', sum(os.path.getsize(p) for p in paths))
+        summary = sketch.summary()
+        current_span().set('errors_found', summary['total'])
+        
+        print(f"[+] Found {summary['total']} errors/warnings "
+              f"(~{summary['distinct_messages']} distinct messages, ~{summary['distinct_fingerprints']} patterns)")
+        # Only one sample record per heavy-hitter fingerprint is kept
+        return {
+            'error_summary': summary,
+            'parsed_errors_ref': self.blobs.put_records(entry['error'] for entry in summary['top']),
+            'error_count': summary['total'],
+            'status': f"Found {summary['total']} issues",
+        }, sketch
+    
+    @traced("node.detect_anomalies")
+    def detect_anomalies_node(self, state: AgentState) -> dict:
+        """Node 1b: Rank error fingerprints by severity, volume and bursts"""
+        print("[*] Detecting error-rate anomalies...")
         
-        state['parsed_errors'] = parsed_errors
-        state['error_count'] = len(parsed_errors)
-        state['status'] = f"Found {len(parsed_errors)} issues"
+        diff = state.get('diff')
+        if state.get('error_summary'):
+            # Sketch mode has no per-record timestamps left; rank by approximate volume
+            priorities = state['error_summary']['top']
+        else:
+            bucket_seconds = float(os.getenv("LOG_AGENT_BUCKET_SECONDS", DEFAULT_BUCKET_SECONDS))
+            records = self.blobs.iter_records(state.get('parsed_errors_ref'))
+            priorities = prioritize(records, bucket_seconds=bucket_seconds, top=None if diff else MAX_PRIORITIES)
+        if state.get('sample_summary'):
+            # Sampled counts only rank; attach the scaled estimates for the whole input.
+            # A sample's time buckets have gaps, so its burst flags are artifacts.
+            estimates = {f['fingerprint']: f for f in state['sample_summary']['fingerprints']}
+            for p in priorities:
+                p['burst'] = False
+                if p['fingerprint'] in estimates:
+                    p['estimated_count'] = {k: estimates[p['fingerprint']][k] for k in ('estimate', 'low', 'high')}
+        if diff is not None:
+            # Diff mode: only new or regressed groups go on to enrichment and solutions
+            changed = regressed(diff)
+            priorities = [p for p in priorities if p['fingerprint'] in changed][:MAX_PRIORITIES]
+        bursts = sum(1 for p in priorities if p.get('burst'))
+        current_span().set('fingerprints', len(priorities))
+        current_span().set('bursts', bursts)
         
-        print(f"[+] Found {len(parsed_errors)} errors/warnings")
-        return state
+        kind = "new or increased" if diff is not None else "distinct"
+        print(f"[+] {len(priorities)} {kind} errors, {bursts} bursting")
+        return {'priorities': priorities}
     
-    def search_solutions_node(self, state: AgentState) -> AgentState:
+    @staticmethod
+    def _top_errors(state: AgentState, limit: int = TOP_ERRORS):
+        """Representative records of the highest-priority errors"""
+        return [p['error'] for p in (state.get('priorities') or [])[:limit]]
+    
+    @traced("node.search_solutions")
+    def search_solutions_node(self, state: AgentState) -> dict:
         """Node 2: Search external sources for solutions"""
         print("[*] Searching for solutions...")
         
         search_results = []
+        lookups = {}
         
-        for error in state['parsed_errors'][:5]:  # Limit to top 5 errors
-            error_query = error['message'][:100]  # Truncate long messages
-            
-            print(f"  [*] Searching for: {error_query[:50]}...")
-            
-            # Search Wikipedia
-            wiki_result = self.tools.search_wikipedia(error_query)
+        for error in self._top_errors(state):  # Highest-priority errors only
+            # Mask ids, ports, timestamps etc. so near-identical errors share one query
+            error_query = normalize_query(error['message'])
             
-            # Search Stack Overflow
-            so_results = self.tools.search_stackoverflow(error_query)
+            if error_query not in lookups:
+                print(f"  [*] Searching for: {error_query[:50]}...")
+                lookups[error_query] = self._research(error_query)
             
-            search_results.append({
-                'error': error,
-                'wikipedia': wiki_result,
-                'stackoverflow': so_results[:3]
-            })
-        
-        # Return updated state with search_results
-        state['search_results'] = search_results
+            search_results.append({'error': error, 'query': error_query, **lookups[error_query]})
+        
         print(f"[+] Completed external searches")
-        return state
+        return {'search_results': search_results}
+    
+    def _research(self, query: str) -> dict:
+        """Wikipedia and Stack Overflow lookups for one query; failed back ends are listed as missing"""
+        result = {'wikipedia': None, 'stackoverflow': [], 'missing': []}
+        
+        # Search Wikipedia
+        try:
+            result['wikipedia'] = self.tools.search_wikipedia(query)
+        except Unavailable as e:
+            result['wikipedia'] = f"Missing ({e.reason})"
+            result['missing'].append(e.backend)
+        
+        # Search Stack Overflow
+        try:
+            result['stackoverflow'] = self.tools.search_stackoverflow(query)[:3]
+        except Unavailable as e:
+            result['missing'].append(e.backend)
+        return result
     
-    def analyze_code_node(self, state: AgentState) -> AgentState:
+    @traced("node.analyze_code")
+    def analyze_code_node(self, state: AgentState) -> dict:
         """Node 3: Analyze GitHub repository if provided"""
         if not state.get('github_repo'):
             print("[!] No GitHub repo provided, skipping code analysis")
-            state['code_analysis'] = None
-            return state
+            return {'code_analysis': None}
+        if state.get('diff') is not None and not state.get('priorities'):
+            print("[!] No new or regressed errors, skipping code analysis")
+            return {'code_analysis': None}
         
         print(f"[*] Analyzing GitHub repository: {state['github_repo']}")
         
         # Extract error keywords for searching
-        error_keywords = [e['message'].split()[0] for e in state['parsed_errors'][:5]]
+        error_keywords = [e['message'].split()[0] for e in self._top_errors(state) if e['message'].split()]
         
         # Analyze repository
-        analysis = self.tools.analyze_github_repo(state['github_repo'], error_keywords)
+        try:
+            analysis = self.tools.analyze_github_repo(state['github_repo'], error_keywords)
+        except Unavailable as e:
+            print(f"[!] Code analysis missing: {e.reason}")
+            analysis = {'missing': True, 'reason': e.reason}
         
-        state['code_analysis'] = json.dumps(analysis, indent=2)
         print(f"[+] Code analysis complete")
-        return state
+        return {'code_analysis': json.dumps(analysis, indent=2)}
     
-    async def enrich_data_node(self, state: AgentState) -> AgentState:
+    @traced("node.enrich_data")
+    async def enrich_data_node(self, state: AgentState) -> dict:
         """Parallel Node: Run search and code analysis concurrently"""
         print("[*] Enriching data (Parallel Execution)...")
         loop = asyncio.get_running_loop()
         
-        # Run synchronous nodes in thread pool
-        future_search = loop.run_in_executor(None, self.search_solutions_node, state.copy())
-        future_analysis = loop.run_in_executor(None, self.analyze_code_node, state.copy())
+        # One time budget for all lookups; the worker threads inherit it via the context
+        deadline = start_deadline(DEFAULT_BUDGET)
         
-        # Wait for both
-        results = await asyncio.gather(future_search, future_analysis)
-        search_state, analysis_state = results
+        # Run synchronous nodes in thread pool (each with its own copy of the
+        # tracing context so their spans nest under this node). Both only read
+        # the state and return their own keys, so it is shared, not copied.
+        future_search = loop.run_in_executor(
+            None, contextvars.copy_context().run, self.search_solutions_node, state
+        )
+        future_analysis = loop.run_in_executor(
+            None, contextvars.copy_context().run, self.analyze_code_node, state
+        )
         
-        # Merge results back into main state
-        state['search_results'] = search_state.get('search_results', [])
-        state['code_analysis'] = analysis_state.get('code_analysis')
+        # Every call is already bounded by the deadline; the grace period only covers backoff sleeps
+        done, _ = await asyncio.wait([future_search, future_analysis], timeout=deadline.remaining() + ENRICH_GRACE)
         
-        print(f"[+] Enrichment complete. Search items: {len(state['search_results'])}")
-        return state
+        # Continue with whatever arrived and mark the rest as missing
+        if future_search in done:
+            search_update = future_search.result()
+        else:
+            search_update = {'search_results': [
+                {'error': e, 'wikipedia': "Missing (deadline exceeded)", 'stackoverflow': [],
+                 'missing': ['wikipedia', 'tavily']}
+                for e in self._top_errors(state)
+            ]}
+        if future_analysis in done:
+            analysis_update = future_analysis.result()
+        else:
+            analysis_update = {'code_analysis': json.dumps({'missing': True, 'reason': 'deadline exceeded'})}
+        
+        missing = self._missing_enrichment({**search_update, **analysis_update})
+        current_span().set('missing', len(missing))
+        print(f"[+] Enrichment complete. Search items: {len(search_update['search_results'])}"
+              + (f", missing: {', '.join(missing)}" if missing else ""))
+        return {**search_update, **analysis_update}
+    
+    @staticmethod
+    def _missing_enrichment(state) -> list:
+        """Lookups that did not complete (timeouts, outages, deadline)"""
+        missing = []
+        for result in state.get('search_results') or []:
+            for backend in result.get('missing', []):
+                missing.append(f"{backend} for '{result['error']['message'][:60]}'")
+        analysis = state.get('code_analysis')
+        if analysis and '"missing": true' in analysis:
+            missing.append(f"github ({json.loads(analysis).get('reason')})")
+        return missing
 
-    def generate_solutions_node(self, state: AgentState) -> AgentState:
-        """Node 4: Generate comprehensive solutions using LLM"""
+    @staticmethod
+    def _priority_summary(priorities):
+        """Priorities without the bulky representative records"""
+        return [
+            dict({k: v for k, v in p.items() if k != 'error'}, message=p['error']['message'])
+            for p in priorities[:TOP_ERRORS * 2]
+        ]
+    
+    def _known_solutions(self, state: AgentState):
+        """Split prioritized errors into (reused known-issue solutions, novel priorities)"""
+        known, novel = [], []
+        for priority in (state.get('priorities') or [])[:PROMPT_ERRORS]:
+            hit = self.known_issues.lookup(priority['error']['message'], key=priority['fingerprint'])
+            if hit is None:
+                novel.append(priority)
+                continue
+            solution = hit['solution'] if isinstance(hit['solution'], dict) else {'analysis': hit['solution']}
+            # known_issue_key is the stored entry, which differs from the fingerprint on similar matches
+            known.append(dict(solution, fingerprint=priority['fingerprint'], known_issue=hit['match'],
+                              known_issue_key=hit['fingerprint'], similarity=hit['similarity']))
+        return known, novel
+    
+    @traced("node.generate_solutions")
+    async def generate_solutions_node(self, state: AgentState, on_solution=None) -> dict:
+        """Node 4: Generate comprehensive solutions using LLM
+
+        Novel issues are split into up to LLM_CONCURRENCY batches solved
+        concurrently. ``on_solution`` is called with each solution as soon as
+        its batch is done.
+        """
         print("[*] Generating solutions...")
+        on_solution = on_solution or (lambda solution: None)
+        
+        # Recurring errors with an accepted solution are filled in without the LLM
+        known, novel = self._known_solutions(state)
+        current_span().set('known_issue_hits', len(known))
+        if known:
+            print(f"  [+] {len(known)} known issues reused from {self.known_issues.path}")
+        for solution in known:
+            on_solution(solution)
+        if known and not novel:
+            print(f"[+] Generated 0 solutions (all {len(known)} issues known)")
+            return {'solutions': known}
+        if not novel and state.get('diff') is not None:
+            print("[+] Generated 0 solutions (no new or regressed errors)")
+            return {'solutions': []}
         
+        size = -(-len(novel) // LLM_CONCURRENCY) if novel else 1
+        batches = [novel[i:i + size] for i in range(0, len(novel), size)] or [[]]
+        tasks = [asyncio.ensure_future(self._solve(state, batch)) for batch in batches]
+        for batch in asyncio.as_completed(tasks):
+            for solution in await batch:
+                on_solution(solution)
+        # The state keeps rank order, whichever batch finished first
+        solutions = [solution for task in tasks for solution in task.result()]
+        
+        print(f"[+] Generated {len(solutions)} solutions")
+        return {'solutions': known + solutions}
+    
+    async def _solve(self, state: AgentState, issues: list) -> list:
+        """One LLM call for a batch of prioritized issues"""
+        fingerprints = {p['fingerprint'] for p in issues}
+        research = [r for r in state['search_results'] if fingerprint(r['error']['message']) in fingerprints]
+        missing = self._missing_enrichment(state)
         prompt = f"""You are an expert DevOps engineer analyzing application logs.
 
-ERRORS FOUND ({len(state['parsed_errors'])}):
-{json.dumps(state['parsed_errors'], indent=2)}
+ERRORS FOUND ({state['error_count']} in total), one example per error pattern in this batch:
+{json.dumps([p['error'] for p in issues], indent=2)}
+
+PRIORITIZED ISSUES (ranked by severity, volume and error-rate bursts):
+{json.dumps(self._priority_summary(issues), indent=2)}
 
 EXTERNAL RESEARCH:
-{json.dumps(state['search_results'], indent=2)}
+{json.dumps(research, indent=2)}
 
 CODE ANALYSIS:
 {state.get('code_analysis', 'No repository provided')}
 
-For each error, provide:
-1. Root cause analysis
-2. Step-by-step solution
-3. Code fix (if applicable)
-4. Prevention strategy
-5. Confidence score (1-10)
+MISSING RESEARCH (lookups that timed out or failed; do not guess their content):
+{json.dumps(missing) if missing else 'None'}
+
+Address the prioritized issues in rank order. For each error, return an object with these keys:
+- "fingerprint": the issue's fingerprint (from PRIORITIZED ISSUES)
+- "error": a short title
+- "root_cause": root cause analysis
+- "solution": step-by-step solution (list of strings)
+- "code_fix": code fix, if applicable
+- "prevention": prevention strategy
+- "confidence": confidence score (1-10)
 
 Return your analysis as a JSON array of solutions."""
         
-        response = self.llm.invoke(prompt)
-        
+        response = await ainvoke(self.llm, prompt)
+        record_llm_usage(response)
+        return self._parse_solutions(response.content)
+    
+    @staticmethod
+    def _parse_solutions(text: str) -> list:
         try:
-            # Try to parse JSON response
-            solutions_text = response.content
-            
             # Extract JSON if wrapped in markdown
-            if '```json' in solutions_text:
-                solutions_text = solutions_text.split('```json')[1].split('```')[0]
-            elif '```' in solutions_text:
-                solutions_text = solutions_text.split('```')[1].split('```')[0]
+            if '```json' in text:
+                text = text.split('```json')[1].split('```')[0]
+            elif '```' in text:
+                text = text.split('```')[1].split('```')[0]
             
-            solutions = json.loads(solutions_text)
+            solutions = json.loads(text)
         except:
             # If parsing fails, use raw response
-            solutions = [{'analysis': response.content}]
+            solutions = [{'analysis': text}]
         
-        state['solutions'] = solutions
-        print(f"[+] Generated {len(solutions)} solutions")
-        return state
+        if not isinstance(solutions, list):
+            solutions = [solutions]
+        return solutions
     
-    def build_report_node(self, state: AgentState) -> AgentState:
-        """Node 5: Build final report"""
+    @staticmethod
+    def _render_solution(index: int, solution) -> str:
+        """Markdown for one solution in the report's Detailed Analysis section"""
+        if not isinstance(solution, dict):
+            return f"### {index}. Analysis\n\n{solution}\n"
+        title = solution.get('error') or solution.get('fingerprint') or 'Issue'
+        lines = [f"### {index}. {title}", ""]
+        if solution.get('known_issue'):
+            lines += [f"_Reused accepted solution ({solution['known_issue']} known-issue match)_", ""]
+        labels = [('root_cause', 'Root cause'), ('solution', 'Solution'), ('code_fix', 'Code fix'),
+                  ('prevention', 'Prevention'), ('analysis', 'Analysis'), ('confidence', 'Confidence')]
+        for key, label in labels:
+            value = solution.get(key)
+            if not value:
+                continue
+            if isinstance(value, list):
+                lines += [f"**{label}:**", ""] + [f"{i}. {step}" for i, step in enumerate(value, 1)] + [""]
+            elif key == 'code_fix':
+                lines += [f"**{label}:**", "", "```", str(value).strip('`').strip(), "```", ""]
+            elif key == 'confidence':
+                lines += [f"**{label}:** {value}/10", ""]
+            else:
+                lines += [f"**{label}:** {value}", ""]
+        return "\n".join(lines)
+    
+    @traced("node.build_report")
+    async def build_report_node(self, state: AgentState, solutions=None) -> dict:
+        """Node 5: Build final report
+
+        The LLM drafts every section except Detailed Analysis, which is
+        rendered from the solutions. ``solutions`` may be an async iterator
+        of solutions still being generated, consumed while the draft is
+        written.
+        """
         print("[*] Building final report...")
+        draft = asyncio.ensure_future(self._draft_report(state))
+        
+        if solutions is None:
+            solutions = state['solutions']
+        if hasattr(solutions, '__aiter__'):
+            solutions = [solution async for solution in solutions]
+        # Batches finish in any order; the report lists solutions by priority rank
+        rank = {p['fingerprint']: i for i, p in enumerate(state.get('priorities') or [])}
+        solutions = sorted(solutions, key=lambda s: rank.get(s.get('fingerprint') if isinstance(s, dict) else None,
+                                                             len(rank)))
+        sections = [self._render_solution(i, s) for i, s in enumerate(solutions, 1)]
         
+        report = self._assemble_report(await draft, sections)
+        print("[+] Report generated successfully")
+        return {'final_report': report}
+    
+    async def _draft_report(self, state: AgentState) -> str:
+        missing = self._missing_enrichment(state)
+        diff = state.get('diff')
+        extra_data, diff_section = "", ""
+        if diff is not None:
+            changes = {key: diff[key] for key in ('baseline', 'current', 'counts')}
+            changes.update({key: diff[key][:TOP_ERRORS * 2] for key in ('new', 'increased', 'disappeared')})
+            extra_data = f"""
+- Changes Since Baseline ({'rates per hour' if diff['by_rate'] else 'raw counts'}): {json.dumps(changes, indent=2)}
+- Only new or increased errors were analyzed; solutions cover those alone"""
+            diff_section = """
+## Changes Since Baseline
+- New, increased and disappeared error groups with baseline vs current counts/rates
+"""
+            if diff.get('approximate'):
+                extra_data += """
+- Approximate Diff: current counts are sketch-mode estimates (upper bounds)"""
+                diff_section += """- Begin the section with "_Approximate: current counts are sketch-mode estimates._"
+"""
+        sample = state.get('sample_summary')
+        if sample is not None and not sample['exact']:
+            extra_data += f"""
+- Sampled Analysis: only {sample['fraction']:.0%} of the input was read. Counts are estimates with 95% bounds: {json.dumps({'total': sample['total'], 'levels': sample['levels']})}
+- State clearly in the Executive Summary that these results come from a sample"""
         prompt = f"""Create a professional log analysis report in Markdown format.
 
 DATA:
 - Total Errors: {state['error_count']}
-- Parsed Errors: {json.dumps(state['parsed_errors'], indent=2)}
-- Solutions: {json.dumps(state['solutions'], indent=2)}
+- Distinct Messages (approx.): {(state.get('error_summary') or {}).get('distinct_messages', 'n/a')}
+- Prioritized Issues: {json.dumps(self._priority_summary(state.get('priorities') or []), indent=2)}
+- Parsed Errors (one example per pattern): {json.dumps(self._top_errors(state, PROMPT_ERRORS), indent=2)}
+- External Research: {json.dumps(state['search_results'], indent=2)}
 - Repository: {state.get('github_repo', 'Not provided')}
+- Log Sources: {', '.join(state.get('log_paths') or []) or 'single log'}
+- Missing Research: {json.dumps(missing) if missing else 'None'}{extra_data}
 
 Create a report with these sections:
 # Log Analysis Report
 
 ## Executive Summary
 - Provide key metrics and overview
-
+{diff_section}
 ## Critical Issues
 - List errors by severity
 
+## Timeline
+- When errors come from several sources, describe the cross-service ordering of events
+
 ## Detailed Analysis
-For each error:
-- Root cause
-- Solution steps
-- Code fixes
-- External resources
+{DETAILED_ANALYSIS}
 
 ## Priority Matrix
 | Priority | Issue | Severity | Effort |
@@ -182,10 +616,47 @@ For each error:
 - Prevention strategies
 - Next steps
 
+Per-error root causes and solutions are written separately and inserted under
+Detailed Analysis: under that heading, output only the line {DETAILED_ANALYSIS}.
+Where research is listed as missing, say that it is incomplete.
+
 Keep it professional, actionable, and well-formatted."""
         
-        response = self.llm.invoke(prompt)
-        state['final_report'] = response.content
+        response = await ainvoke(self.llm, prompt)
+        record_llm_usage(response)
+        return response.content
+    
+    @staticmethod
+    def _assemble_report(draft: str, sections: list) -> str:
+        """Insert the rendered solutions into the drafted report"""
+        detailed = "\n".join(sections) if sections else "No solutions were generated."
+        if DETAILED_ANALYSIS in draft:
+            return draft.replace(DETAILED_ANALYSIS, detailed, 1)
+        if "## Priority Matrix" in draft:
+            return draft.replace("## Priority Matrix", f"## Detailed Analysis\n\n{detailed}\n\n## Priority Matrix", 1)
+        return f"{draft.rstrip()}\n\n## Detailed Analysis\n\n{detailed}\n"
+    
+    @traced("node.synthesize")
+    async def synthesize_node(self, state: AgentState) -> dict:
+        """Parallel Node: generate solutions and build the report concurrently
+
+        The report draft is written while solutions are generated, and each
+        solution is handed to the report as soon as its batch is done, so the
+        critical path is about the slowest single LLM call.
+        """
+        queue = asyncio.Queue()
+        
+        async def stream():
+            while (solution := await queue.get()) is not DONE:
+                yield solution
         
-        print("[+] Report generated successfully")
-        return state
+        async def generate():
+            try:
+                return await self.generate_solutions_node(state, on_solution=queue.put_nowait)
+            finally:
+                queue.put_nowait(DONE)
+        
+        solutions_update, report_update = await asyncio.gather(
+            generate(), self.build_report_node(state, solutions=stream())
+        )
+        return {**solutions_update, **report_update}
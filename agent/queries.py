@@ -0,0 +1,101 @@
+"""
+Research query normalization and in-flight request coalescing.
+
+``normalize_query`` builds the search query from the message's anomaly
+fingerprint (utils/anomaly.py) with the masked ids, numbers and quoted values
+dropped, so errors that share a fingerprint share one search query. ``CoalescingTools`` shares identical
+in-flight lookups across every workflow in the process (single-flight). The
+first caller runs the request, and concurrent callers wait for its result.
+Nothing is cached after the call completes.
+"""
+
+import re
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, List, Tuple
+
+from agent.resilience import Unavailable, current_deadline
+from utils.anomaly import MASK_TOKENS, fingerprint
+from utils.tracing import current_span
+
+MAX_QUERY_LENGTH = 100
+
+_MASK_TOKEN = '(?:' + '|'.join(map(re.escape, MASK_TOKENS)) + ')'
+# Masked timestamps, addresses and sizes come out as runs like <n>-<n>-<n>T<n>:<n> or <n>ms
+_MASKED_RUN = re.compile(rf'{_MASK_TOKEN}(?:[-:./,T]*{_MASK_TOKEN})*(?:Z|ms|s|%|[KMG]i?B)?')
+_EMPTY_BRACKETS = re.compile(r'\(\s*[,;]?\s*\)|\[\s*\]|\{\s*\}|<\s*>')
+_SPACE_BEFORE_PUNCTUATION = re.compile(r'\s+([:,;.)\]])')
+_REPEATED_PUNCTUATION = re.compile(r'([:,;])(?:\s*[:,;])+')
+
+
+def normalize_query(message: str, max_length: int = MAX_QUERY_LENGTH) -> str:
+    """Turn an error message into a stable search query"""
+    query = _MASKED_RUN.sub(' ', fingerprint(message))
+    query = _EMPTY_BRACKETS.sub(' ', query)
+    query = _SPACE_BEFORE_PUNCTUATION.sub(r'\1', ' '.join(query.split()))
+    query = _REPEATED_PUNCTUATION.sub(r'\1', query).strip(' :,;-#=')
+    if not query:
+        # Nothing but variable parts: fall back to the raw message
+        query = ' '.join(message.split())
+    if len(query) > max_length:
+        # Cut at a word boundary so the last word is not half a token
+        query = query[:max_length].rsplit(' ', 1)[0]
+    return query
+
+
+class SingleFlight:
+    """Share one execution among concurrent callers with the same key"""
+
+    def __init__(self):
+        self._calls: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Tuple, func):
+        """Return func()'s result; callers that arrive while it runs wait for it"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            current_span().add('coalesced')
+            deadline = current_deadline()
+            try:
+                return future.result(timeout=deadline.remaining() if deadline else None)
+            except FutureTimeout:
+                raise Unavailable(str(key[0]), 'deadline exceeded waiting for shared request')
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+# One group per process so concurrent Streamlit sessions coalesce too
+_flights = SingleFlight()
+
+
+class CoalescingTools:
+    """Wrap tools so identical concurrent lookups hit the network once"""
+
+    def __init__(self, tools, flights: SingleFlight = _flights):
+        self.tools = tools
+        self.flights = flights
+
+    def search_wikipedia(self, query: str) -> str:
+        return self.flights.do(('wikipedia', query), lambda: self.tools.search_wikipedia(query))
+
+    def search_stackoverflow(self, query: str) -> List[Dict]:
+        return self.flights.do(('tavily', query), lambda: self.tools.search_stackoverflow(query))
+
+    def analyze_github_repo(self, repo_url: str, error_keywords: List[str]) -> Dict:
+        key = ('github', repo_url, tuple(error_keywords))
+        return self.flights.do(key, lambda: self.tools.analyze_github_repo(repo_url, error_keywords))
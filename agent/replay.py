@@ -0,0 +1,215 @@
+"""
+Record/replay layer for external calls (LLM, Wikipedia, Tavily, GitHub).
+
+Record mode passes calls through and appends each request/response pair to a
+JSON-lines cassette. Replay mode serves responses from the cassette without
+touching the network, optionally sleeping to simulate a latency profile.
+
+Enable from the environment:
+    LOG_AGENT_CASSETTE=cassettes/run.jsonl
+    LOG_AGENT_CASSETTE_MODE=record | replay
+    LOG_AGENT_REPLAY_LATENCY=none | recorded | scale=0.5 | fixed=0.2
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from agent.llm import ainvoke as llm_ainvoke
+from utils.tracing import current_span
+
+MODES = ('record', 'replay')
+
+
+class Cassette:
+    """JSON-lines store of recorded interactions keyed by request hash"""
+
+    def __init__(self, path: str, mode: str = 'replay', latency: str = 'none'):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode: {mode} (expected one of {MODES})")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._interactions: Dict[str, List[Dict]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        if mode == 'replay':
+            self._load()
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional['Cassette']:
+        """Build a cassette from LOG_AGENT_CASSETTE* variables, or None"""
+        path = os.getenv("LOG_AGENT_CASSETTE")
+        if not path:
+            return None
+        return cls(
+            path,
+            mode=os.getenv("LOG_AGENT_CASSETTE_MODE", "replay"),
+            latency=os.getenv("LOG_AGENT_REPLAY_LATENCY", "none"),
+        )
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+
+    @staticmethod
+    def key(kind: str, request) -> str:
+        payload = json.dumps([kind, request], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._interactions.setdefault(entry['key'], []).append(entry)
+
+    def record(self, kind: str, request, response, latency: float):
+        entry = {
+            'key': self.key(kind, request),
+            'kind': kind,
+            'request': request,
+            'response': response,
+            'latency': latency,
+        }
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, default=str) + '\n')
+
+    def _next(self, kind: str, request) -> Dict:
+        key = self.key(kind, request)
+        with self._lock:
+            entries = self._interactions.get(key)
+            if not entries:
+                raise LookupError(f"No recorded {kind} interaction in {self.path} for request: {str(request)[:100]}")
+            # Repeated identical requests are served in recorded order; the last one is reused
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+            return entries[min(index, len(entries) - 1)]
+
+    def replay(self, kind: str, request):
+        """Return the next recorded response for a request, sleeping per the latency profile"""
+        entry = self._next(kind, request)
+        delay = self._delay(entry.get('latency', 0.0))
+        if delay > 0:
+            time.sleep(delay)
+        current_span().add('cache_hits')
+        return entry['response']
+
+    async def areplay(self, kind: str, request):
+        """replay() for coroutines: the simulated latency does not block the event loop"""
+        entry = self._next(kind, request)
+        delay = self._delay(entry.get('latency', 0.0))
+        if delay > 0:
+            await asyncio.sleep(delay)
+        current_span().add('cache_hits')
+        return entry['response']
+
+    def _delay(self, recorded: float) -> float:
+        profile = (self.latency or 'none').strip().lower()
+        if profile == 'none':
+            return 0.0
+        if profile == 'recorded':
+            return recorded
+        if profile.startswith('scale='):
+            return recorded * float(profile.split('=', 1)[1])
+        if profile.startswith('fixed='):
+            return float(profile.split('=', 1)[1])
+        raise ValueError(f"Unknown latency profile: {self.latency}")
+
+    def call(self, kind: str, request, func):
+        """Run func in record mode, or serve it from the cassette in replay mode"""
+        if self.replaying:
+            return self.replay(kind, request)
+        start = time.perf_counter()
+        response = func()
+        self.record(kind, request, response, time.perf_counter() - start)
+        return response
+
+    async def acall(self, kind: str, request, func):
+        """call() for coroutine functions"""
+        if self.replaying:
+            return await self.areplay(kind, request)
+        start = time.perf_counter()
+        response = await func()
+        self.record(kind, request, response, time.perf_counter() - start)
+        return response
+
+
+class ReplayResponse:
+    """Stand-in for a LangChain AIMessage restored from a cassette"""
+
+    def __init__(self, content: str, usage_metadata: Optional[Dict] = None, response_metadata: Optional[Dict] = None):
+        self.content = content
+        self.usage_metadata = usage_metadata or {}
+        self.response_metadata = response_metadata or {}
+
+
+class CassetteLLM:
+    """Wrap a chat model so invoke() and ainvoke() go through a cassette"""
+
+    def __init__(self, llm, cassette: Cassette):
+        self.llm = llm
+        self.cassette = cassette
+
+    @staticmethod
+    def _request(prompt):
+        if isinstance(prompt, str):
+            return prompt
+        return [[getattr(m, 'type', type(m).__name__), getattr(m, 'content', str(m))] for m in prompt]
+
+    @staticmethod
+    def _data(response) -> Dict:
+        return {
+            'content': response.content,
+            'usage_metadata': dict(getattr(response, 'usage_metadata', None) or {}),
+            'response_metadata': dict(getattr(response, 'response_metadata', None) or {}),
+        }
+
+    def invoke(self, prompt) -> ReplayResponse:
+        data = self.cassette.call('llm.invoke', self._request(prompt),
+                                  lambda: self._data(self.llm.invoke(prompt)))
+        return ReplayResponse(data['content'], data.get('usage_metadata'), data.get('response_metadata'))
+
+    async def ainvoke(self, prompt) -> ReplayResponse:
+        """Async invoke(); shares cassette entries with it, so either can replay the other's recording"""
+        async def call():
+            return self._data(await llm_ainvoke(self.llm, prompt))
+
+        data = await self.cassette.acall('llm.invoke', self._request(prompt), call)
+        return ReplayResponse(data['content'], data.get('usage_metadata'), data.get('response_metadata'))
+
+
+class CassetteTools:
+    """Wrap ExternalTools so every lookup goes through a cassette"""
+
+    def __init__(self, tools, cassette: Cassette):
+        self.tools = tools
+        self.cassette = cassette
+
+    def search_wikipedia(self, query: str) -> str:
+        return self.cassette.call(
+            'tools.search_wikipedia', [query],
+            lambda: self.tools.search_wikipedia(query)
+        )
+
+    def search_stackoverflow(self, query: str) -> List[Dict]:
+        return self.cassette.call(
+            'tools.search_stackoverflow', [query],
+            lambda: self.tools.search_stackoverflow(query)
+        )
+
+    def analyze_github_repo(self, repo_url: str, error_keywords: List[str]) -> Dict:
+        return self.cassette.call(
+            'tools.analyze_github_repo', [repo_url, error_keywords],
+            lambda: self.tools.analyze_github_repo(repo_url, error_keywords)
+        )
@@ -0,0 +1,228 @@
+"""
+Deadlines, retries and circuit breakers for external lookups.
+
+Enrichment gets one time budget per run. Every tool call is bounded by a
+per-call timeout, capped by what is left of that budget. Failed calls are
+retried with jittered exponential backoff. Each back end (wikipedia, tavily,
+github) has a circuit breaker: after repeated failures, calls fail fast for a
+cool-down period instead of waiting for timeouts. A call that cannot complete
+raises ``Unavailable`` and the caller records the lookup as missing.
+
+Configure from the environment:
+    LOG_AGENT_ENRICH_BUDGET=60     seconds for all enrichment in one run
+    LOG_AGENT_CALL_TIMEOUT=15      seconds per external call
+    LOG_AGENT_CALL_RETRIES=2       retries after the first attempt
+"""
+
+import contextvars
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, List, Optional
+
+from utils.tracing import current_span
+
+DEFAULT_BUDGET = float(os.getenv("LOG_AGENT_ENRICH_BUDGET", "60"))
+DEFAULT_CALL_TIMEOUT = float(os.getenv("LOG_AGENT_CALL_TIMEOUT", "15"))
+DEFAULT_RETRIES = int(os.getenv("LOG_AGENT_CALL_RETRIES", "2"))
+
+BACKOFF_BASE = 0.2
+BACKOFF_CAP = 2.0
+
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 30.0
+
+
+def _run_in_thread(func) -> Future:
+    """Run func on a daemon thread so a hung request can be abandoned at its deadline
+
+    (Executor threads are joined at interpreter exit, which would let one hung
+    call keep the CLI alive after the report is written.)
+    """
+    future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(func())
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, name="tool-call", daemon=True).start()
+    return future
+
+
+class Unavailable(Exception):
+    """An external lookup gave no result (deadline, timeout, error or open circuit)"""
+
+    def __init__(self, backend: str, reason: str):
+        super().__init__(f"{backend}: {reason}")
+        self.backend = backend
+        self.reason = reason
+
+
+class Deadline:
+    """Wall-clock budget shared by every call in one enrichment run"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+class CircuitBreaker:
+    """Closed -> open after ``threshold`` consecutive failures -> half-open after ``cooldown``"""
+
+    def __init__(self, name: str, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> bool:
+        """Whether a call may go out; half-open lets a single trial call through"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial = False
+            if self.failures >= self.threshold or self.opened_at is not None:
+                self.opened_at = time.monotonic()
+
+
+# The deadline of the enrichment run in progress (per workflow, so concurrent runs don't share it)
+_deadline: contextvars.ContextVar = contextvars.ContextVar('enrich_deadline', default=None)
+
+
+def start_deadline(seconds: float = DEFAULT_BUDGET) -> Deadline:
+    """Open a deadline for the current context and the threads it spawns"""
+    deadline = Deadline(seconds)
+    _deadline.set(deadline)
+    return deadline
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _deadline.get()
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(backend: str) -> CircuitBreaker:
+    """Process-wide breaker per back end, shared by concurrent workflows"""
+    with _breakers_lock:
+        if backend not in _breakers:
+            _breakers[backend] = CircuitBreaker(backend)
+        return _breakers[backend]
+
+
+def call_with_policy(backend: str, func, deadline: Deadline, timeout: float = DEFAULT_CALL_TIMEOUT,
+                     retries: int = DEFAULT_RETRIES):
+    """Run func() under the back end's breaker, a per-call timeout and the run deadline"""
+    breaker = get_breaker(backend)
+    span = current_span()
+    reason = 'deadline exceeded'
+    for attempt in range(retries + 1):
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            break
+        if not breaker.allow():
+            span.add('circuit_open')
+            raise Unavailable(backend, 'circuit open')
+
+        context = contextvars.copy_context()
+        future = _run_in_thread(lambda: context.run(func))
+        try:
+            result = future.result(timeout=min(timeout, remaining))
+        except FutureTimeout:
+            future.cancel()
+            span.add('timeouts')
+            reason = 'timed out'
+            breaker.record_failure()
+        except Exception as e:
+            span.record_error(e)
+            reason = f"error: {e}"
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+            return result
+
+        if attempt < retries:
+            span.add('retries')
+            # Full jitter keeps concurrent runs from retrying in lockstep
+            time.sleep(min(random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)), deadline.remaining()))
+    raise Unavailable(backend, reason)
+
+
+class ResilientTools:
+    """Wrap ExternalTools (or CassetteTools) so every lookup obeys a deadline
+
+    Methods raise ``Unavailable`` instead of hanging. Calls share the deadline
+    opened with ``start_deadline()`` in the calling context, or get a fresh
+    budget of their own when there is none.
+    """
+
+    BACKENDS = {
+        'search_wikipedia': 'wikipedia',
+        'search_stackoverflow': 'tavily',
+        'analyze_github_repo': 'github',
+    }
+
+    def __init__(self, tools, budget: float = DEFAULT_BUDGET, timeout: float = DEFAULT_CALL_TIMEOUT,
+                 retries: int = DEFAULT_RETRIES):
+        self.tools = tools
+        self.budget = budget
+        self.timeout = timeout
+        self.retries = retries
+
+    def _call(self, method: str, *args, timeout: Optional[float] = None):
+        func = getattr(self.tools, method)
+        return call_with_policy(
+            self.BACKENDS[method], lambda: func(*args), current_deadline() or Deadline(self.budget),
+            timeout=timeout or self.timeout, retries=self.retries,
+        )
+
+    def search_wikipedia(self, query: str) -> str:
+        return self._call('search_wikipedia', query)
+
+    def search_stackoverflow(self, query: str) -> List[Dict]:
+        return self._call('search_stackoverflow', query)
+
+    def analyze_github_repo(self, repo_url: str, error_keywords: List[str]) -> Dict:
+        # Cloning is the slowest call; it may use the whole remaining budget
+        return self._call('analyze_github_repo', repo_url, error_keywords, timeout=self.budget)
@@ -7,9 +7,19 @@ import operator
 
 class AgentState(TypedDict):
     """State that is passed between nodes in the graph"""
-    logs: str
+    log_ref: Optional[str]  # blob handle of pasted/uploaded log content (utils/blobs.py)
+    log_path: Optional[str]
+    log_paths: Optional[List[str]]
+    baseline_paths: Optional[List[str]]  # diff mode: logs to compare against (utils/diff.py)
+    sample: Optional[bool]  # sampling mode (utils/sampling.py); None defers to LOG_AGENT_SAMPLE
+    sketch: Optional[bool]  # sketch mode (utils/sketches.py); None defers to LOG_AGENT_SKETCH
+    filters: Optional[Dict]
     github_repo: Optional[str]
-    parsed_errors: List[Dict]
+    parsed_errors_ref: Optional[str]  # blob handle of the parsed records (JSON lines)
+    priorities: List[Dict]
+    error_summary: Optional[Dict]
+    diff: Optional[Dict]  # new / increased / disappeared error groups vs the baseline
+    sample_summary: Optional[Dict]  # sampling mode: estimated counts with confidence bounds
     search_results: Annotated[List[Dict], operator.add]
     code_analysis: Optional[str]
     solutions: List[Dict]
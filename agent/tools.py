@@ -3,58 +3,71 @@ Tool definitions for the log analysis agent.
 """
 
 import os
-import requests
 from typing import List, Dict
-from github import Github
-import git
 import tempfile
 import shutil
-from pathlib import Path
+from utils.repo_scan import scan_repo
+from utils.tracing import traced, current_span, get_tracer
+
+# Per-request network timeout; agent/resilience.py also enforces one per call
+REQUEST_TIMEOUT = float(os.getenv("LOG_AGENT_CALL_TIMEOUT", "15"))
+
+# Abort clones that stall below 1 KB/s for 10 seconds instead of hanging
+GIT_ENV = {
+    'GIT_TERMINAL_PROMPT': '0',
+    'GIT_HTTP_LOW_SPEED_LIMIT': '1000',
+    'GIT_HTTP_LOW_SPEED_TIME': '10',
+}
 
 class ExternalTools:
-    """Integrations with Wikipedia, Stack Overflow, and GitHub"""
+    """Integrations with Wikipedia, Stack Overflow, and GitHub
+
+    Network and API failures are raised so the resilience layer can retry
+    them, trip circuit breakers and report the lookup as missing.
+    """
     
     def __init__(self):
         self.tavily_api_key = os.getenv("TAVILY_API_KEY")
         self.github_token = os.getenv("GITHUB_TOKEN")
     
+    @traced("tools.search_wikipedia")
     def search_wikipedia(self, query: str) -> str:
         """Search Wikipedia for technical concepts"""
+        import wikipedia
+        wikipedia.set_lang("en")
         try:
-            import wikipedia
-            wikipedia.set_lang("en")
             results = wikipedia.search(query, results=3)
             if results:
                 summary = wikipedia.summary(results[0], sentences=3)
                 return f"Wikipedia: {summary}"
             return "No Wikipedia results found."
-        except Exception as e:
-            return f"Wikipedia search error: {str(e)}"
+        except (wikipedia.exceptions.DisambiguationError, wikipedia.exceptions.PageError) as e:
+            # An ambiguous or missing page is an answer, not a back-end failure
+            return f"No Wikipedia results found ({type(e).__name__})."
     
+    @traced("tools.search_stackoverflow")
     def search_stackoverflow(self, query: str) -> List[Dict]:
         """Search Stack Overflow using Tavily"""
-        try:
-            from tavily import TavilyClient
-            client = TavilyClient(api_key=self.tavily_api_key)
-            
-            response = client.search(
-                query=f"{query} site:stackoverflow.com",
-                max_results=5,
-                search_depth="advanced"
-            )
-            
-            results = []
-            for result in response.get('results', []):
-                results.append({
-                    'title': result.get('title', ''),
-                    'url': result.get('url', ''),
-                    'snippet': result.get('content', '')[:300]
-                })
-            return results
-        except Exception as e:
-            print(f"Stack Overflow search error: {e}")
-            return []
+        from tavily import TavilyClient
+        client = TavilyClient(api_key=self.tavily_api_key)
+        
+        response = client.search(
+            query=f"{query} site:stackoverflow.com",
+            max_results=5,
+            search_depth="advanced",
+            timeout=REQUEST_TIMEOUT
+        )
+        
+        results = []
+        for result in response.get('results', []):
+            results.append({
+                'title': result.get('title', ''),
+                'url': result.get('url', ''),
+                'snippet': result.get('content', '')[:300]
+            })
+        return results
     
+    @traced("tools.analyze_github_repo")
     def analyze_github_repo(self, repo_url: str, error_keywords: List[str]) -> Dict:
         """Clone and analyze GitHub repository"""
         temp_dir = tempfile.mkdtemp()
@@ -62,39 +75,28 @@ class ExternalTools:
         try:
             # Clone repository
             print(f"Cloning repository: {repo_url}")
-            repo = git.Repo.clone_from(repo_url, temp_dir)
-            
-            # Find relevant files
-            code_files = []
-            for ext in ['.py', '.js', '.java', '.cpp', '.go', '.ts']:
-                code_files.extend(Path(temp_dir).rglob(f'*{ext}'))
+            import git
+            with get_tracer().span("tools.git_clone", repo=repo_url):
+                # Only the latest snapshot is analyzed, so skip the history
+                repo = git.Repo.clone_from(repo_url, temp_dir, env=GIT_ENV, depth=1, single_branch=True)
             
-            # Analyze files for error patterns
-            relevant_code = []
-            for file_path in code_files[:20]:  # Limit to 20 files
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                        
-                    # Check if file contains error keywords
-                    for keyword in error_keywords:
-                        if keyword.lower() in content.lower():
-                            relevant_code.append({
-                                'file': str(file_path.relative_to(temp_dir)),
-                                'snippet': content[:500]
-                            })
-                            break
-                except:
-                    continue
+            # One pass over the tree, honoring .gitignore and skipping vendored, generated and binary files
+            with get_tracer().span("tools.repo_scan", repo=repo_url) as span:
+                scan = scan_repo(temp_dir, error_keywords)
+                stats = scan['stats']
+                for key in ('files_seen', 'files_scanned', 'bytes_scanned', 'bytes_skipped'):
+                    span.set(key, stats[key])
+            current_span().add('bytes', stats['bytes_read'])
+            print(f"Scanned {stats['files_scanned']}/{stats['files_seen']} files "
+                  f"({stats['bytes_scanned'] / 1e6:.1f} MB), {len(scan['matches'])} relevant")
             
             return {
                 'repo_name': repo_url.split('/')[-1],
-                'files_analyzed': len(code_files),
-                'relevant_files': relevant_code[:5]  # Top 5 relevant files
+                'files_analyzed': stats['files_scanned'],
+                'relevant_files': scan['matches'][:5],  # Top 5 relevant files
+                'scan': stats
             }
             
-        except Exception as e:
-            return {'error': str(e)}
         finally:
             # Cleanup
             shutil.rmtree(temp_dir, ignore_errors=True)
@@ -4,12 +4,24 @@ Streamlit UI for Log Analysis Agent
 
 import streamlit as st
 import os
+import shutil
+import tempfile
 from dotenv import load_dotenv
 from pathlib import Path
 from agent.graph import create_workflow
+from agent.known_issues import get_known_issues
 from agent.state import AgentState
+from utils.formats import parse_timestamp
+from utils.blobs import get_blob_store
+from utils.exports import EXPORT_FORMATS, export
+from utils.history import get_history
+from utils.tracing import get_tracer
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import itertools
 import json
+import sqlite3
+import zipfile
 
 # Load environment variables
 load_dotenv()
@@ -60,13 +72,76 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
+@st.cache_resource
+def start_metrics_server(port: int):
+    """Start the Prometheus endpoint once per process"""
+    return get_tracer().serve_prometheus(port)
+
+if os.getenv("LOG_AGENT_METRICS_PORT"):
+    start_metrics_server(int(os.getenv("LOG_AGENT_METRICS_PORT")))
+
+@st.cache_resource
+def get_workflow():
+    """Compile the workflow once per process and share it across sessions"""
+    return create_workflow()
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def load_parsed_errors(ref):
+    """Parsed records behind a blob handle; handles are content addressed, so never stale"""
+    return get_blob_store().load_records(ref)
+
+@st.cache_resource
+def get_background_executor():
+    """Workers for full analyses requested from sampled results"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="full-analysis")
+
+def run_workflow(workflow, initial_state):
+    import asyncio
+    return asyncio.run(workflow.ainvoke(initial_state))
+
+def save_uploads(uploads):
+    """Copy several uploads to a temporary directory so the parser can merge them by timestamp"""
+    upload_dir = tempfile.mkdtemp(prefix="log_agent_")
+    paths = []
+    for upload in uploads:
+        path = os.path.join(upload_dir, os.path.basename(upload.name))
+        with open(path, 'wb') as f:
+            f.write(upload.getbuffer())
+        paths.append(path)
+    return upload_dir, paths
+
+def discard_uploads():
+    """Delete the copy kept for a full analysis of sampled results"""
+    upload_dir = st.session_state.pop('upload_dir', None)
+    if upload_dir:
+        shutil.rmtree(upload_dir, ignore_errors=True)
+
+def clear_exports():
+    """Delete the export files prepared for the previous results"""
+    for path in st.session_state.get('exports', {}).values():
+        shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+    st.session_state.exports = {}
+
+def record_history(final_state, sources):
+    """Append a run to the cross-run history (History tab, chat context); sampled runs are skipped"""
+    if final_state.get('sample_summary'):
+        return
+    try:
+        get_history().record_run(
+            final_state,
+            get_blob_store().iter_records(final_state.get('parsed_errors_ref')),
+            sources=sources
+        )
+    except sqlite3.Error as e:
+        print(f"[!] Could not record run in history: {e}")
+
 # Initialize session state
 if 'analysis_complete' not in st.session_state:
     st.session_state.analysis_complete = False
 if 'final_state' not in st.session_state:
     st.session_state.final_state = None
-if 'workflow_app' not in st.session_state:
-    st.session_state.workflow_app = create_workflow()
+if 'exports' not in st.session_state:
+    st.session_state.exports = {}
 
 # Header
 st.markdown("<h1 class='main-header'>Log Analysis Agent</h1>", unsafe_allow_html=True)
@@ -101,7 +176,7 @@ with st.sidebar:
     """)
 
 # Main content tabs
-tab1, tab2, tab3, tab4, tab5 = st.tabs(["Input", "Analysis", "Results", "Chat", "Download"])
+tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["Input", "Analysis", "Results", "Chat", "Download", "History"])
 
 with tab1:
     st.header("Step 1: Provide Log File")
@@ -110,16 +185,26 @@ with tab1:
     
     with col1:
         st.subheader("Option A: Upload File")
-        uploaded_file = st.file_uploader(
-            "Choose a log file",
-            type=["txt", "log", "csv"],
-            help="Upload your log file (max 200MB)"
+        uploaded_files = st.file_uploader(
+            "Choose log file(s)",
+            type=["txt", "log", "csv", "json", "jsonl", "gz", "bz2", "xz", "zst", "tar", "tgz"],
+            accept_multiple_files=True,
+            help="Upload one or more log files (max 200MB each). Compressed files and tar bundles are decompressed automatically. Several files are merged into one timeline"
         )
-        
-        if uploaded_file is not None:
-            logs = uploaded_file.read().decode('utf-8')
+        uploaded_file = uploaded_files[0] if uploaded_files else None
+        log_paths = None
+        log_ref = None
+        
+        if len(uploaded_files or []) > 1:
+            # Written to disk when the analysis starts (see save_uploads)
+            logs = f"[{len(uploaded_files)} files merged by timestamp]"
+            st.success(f"[LOADED] {', '.join(u.name for u in uploaded_files)}")
+        elif uploaded_file is not None:
+            # Only a content handle is kept; the parser decompresses and streams the blob
+            log_ref = get_blob_store().put_file(uploaded_file)
+            logs = f"[{uploaded_file.name}]"
             st.success(f"[LOADED] {uploaded_file.name}")
-            st.info(f"[INFO] Size: {len(logs)} characters")
+            st.info(f"[INFO] Size: {uploaded_file.size} bytes")
         else:
             logs = None
     
@@ -175,6 +260,19 @@ with tab1:
     if not enable_github:
         github_repo = None
     
+    # Diff mode: compare against a baseline log (e.g. yesterday's, before the deploy)
+    baseline_file = st.file_uploader(
+        "Baseline log (optional)",
+        type=["txt", "log", "csv", "json", "jsonl", "gz", "bz2", "xz", "zst", "tar", "tgz"],
+        help="Only errors that are new or significantly more frequent than in this log are analyzed"
+    )
+    
+    sample_mode = st.checkbox(
+        "Quick look (sampling)",
+        help="Analyze a stratified sample instead of parsing everything; counts are estimates with confidence bounds. "
+             "A full analysis can be started from the results"
+    )
+    
     st.divider()
     
     # Analysis button
@@ -192,6 +290,9 @@ with tab1:
         if st.button("Reset", use_container_width=True):
             st.session_state.analysis_complete = False
             st.session_state.final_state = None
+            st.session_state.full_run = None
+            discard_uploads()
+            clear_exports()
             st.rerun()
 
 with tab2:
@@ -201,13 +302,38 @@ with tab2:
         with st.spinner("Starting analysis..."):
             progress_bar = st.progress(0)
             status_text = st.empty()
+            # Uploads from the previous analysis are no longer needed
+            st.session_state.full_run = None
+            discard_uploads()
+            # The server outlives single runs, so expire old blobs here too
+            get_blob_store().sweep()
+            upload_dir = None
             
             try:
                 # Initialize state
+                if len(uploaded_files or []) > 1:
+                    upload_dir, log_paths = save_uploads(uploaded_files)
+                if not log_paths and not log_ref:
+                    log_ref = get_blob_store().put_text(logs)
+                # Stored only now: the uploader widget is re-read on every rerun
+                baseline_paths = [get_blob_store().path(get_blob_store().put_file(baseline_file))] if baseline_file else None
+                
                 initial_state = AgentState(
-                    logs=logs,
+                    log_ref=log_ref,
+                    log_path=None,
+                    log_paths=log_paths,
+                    baseline_paths=baseline_paths,
+                    # Unchecked leaves the choice to LOG_AGENT_SAMPLE
+                    sample=sample_mode or None,
+                    # No UI switch; LOG_AGENT_SKETCH decides
+                    sketch=None,
+                    filters=None,
                     github_repo=github_repo if github_repo else None,
-                    parsed_errors=[],
+                    parsed_errors_ref=None,
+                    priorities=[],
+                    error_summary=None,
+                    diff=None,
+                    sample_summary=None,
                     search_results=[],
                     code_analysis=None,
                     solutions=[],
@@ -230,15 +356,21 @@ with tab2:
                 progress_bar.progress(80)
                 
                 status_text.info("[*] Building report...")
-                # Run async workflow using asyncio.run()
-                import asyncio
-                final_state = asyncio.run(st.session_state.workflow_app.ainvoke(initial_state))
+                final_state = run_workflow(get_workflow(), initial_state)
                 
                 progress_bar.progress(100)
                 status_text.success("[SUCCESS] Analysis complete!")
                 
                 st.session_state.analysis_complete = True
                 st.session_state.final_state = final_state
+                clear_exports()
+                st.session_state.initial_state = initial_state
+                st.session_state.sources = [u.name for u in uploaded_files] if uploaded_files else ["pasted"]
+                st.session_state.full_run = None
+                if final_state.get('sample_summary'):
+                    # A full analysis can still be started from sampled results; it re-reads the uploads
+                    st.session_state.upload_dir, upload_dir = upload_dir, None
+                record_history(final_state, st.session_state.sources)
                 
                 st.rerun()
                 
@@ -248,6 +380,9 @@ with tab2:
                 with st.expander("Details"):
                     st.code(traceback.format_exc())
                 st.error("Please check your API keys and log content")
+            finally:
+                if upload_dir:
+                    shutil.rmtree(upload_dir, ignore_errors=True)
     
     elif st.session_state.analysis_complete and st.session_state.final_state:
         st.success("[SUCCESS] Analysis completed successfully!")
@@ -261,25 +396,89 @@ with tab3:
     
     if st.session_state.analysis_complete and st.session_state.final_state:
         final_state = st.session_state.final_state
+        # The session only holds handles; records are read back once per handle, not per rerun
+        parsed_errors = load_parsed_errors(final_state.get('parsed_errors_ref'))
+        sample = final_state.get('sample_summary')
+        
+        # Sampled results are labelled, with the option to run the full parse in the background
+        if sample:
+            total = sample['total']
+            if sample['exact']:
+                st.warning(f"[SAMPLED] Counts are exact, but the records below are a stratified sample "
+                           f"of {sample['sampled_records']}")
+            else:
+                st.warning(f"[SAMPLED] Read {sample['fraction']:.0%} of the input. About {total['estimate']} issues "
+                           f"(95% bounds {total['low']}-{total['high']}); the records below are a sample")
+            
+            full_run = st.session_state.get('full_run')
+            if full_run is None:
+                if st.button("Run full analysis in background"):
+                    full_state = dict(st.session_state.initial_state, sample=False)
+                    st.session_state.full_run = get_background_executor().submit(run_workflow, get_workflow(), full_state)
+                    st.rerun()
+            elif not full_run.done():
+                st.info("[*] Full analysis running in the background...")
+                st.button("Check again")
+            elif full_run.exception() is not None:
+                st.error(f"[ERROR] Full analysis failed: {full_run.exception()}")
+                st.session_state.full_run = None
+            elif st.button("Show full results", type="primary"):
+                st.session_state.final_state = full_run.result()
+                clear_exports()
+                st.session_state.full_run = None
+                discard_uploads()
+                record_history(st.session_state.final_state, st.session_state.get('sources'))
+                st.rerun()
         
         # Key metrics
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Total Issues Found", final_state['error_count'])
+            st.metric("Total Issues Found", f"~{final_state['error_count']}" if sample else final_state['error_count'])
         
         with col2:
-            errors = [e for e in final_state['parsed_errors'] if e['type'] == 'ERROR']
-            st.metric("Errors", len(errors))
+            if sample:
+                st.metric("Errors", f"~{sample['levels'].get('ERROR', {}).get('estimate', 0)}")
+            else:
+                errors = [e for e in parsed_errors if e['type'] == 'ERROR']
+                st.metric("Errors", len(errors))
         
         with col3:
-            warnings = [e for e in final_state['parsed_errors'] if e['type'] == 'WARNING']
-            st.metric("Warnings", len(warnings))
+            if sample:
+                st.metric("Warnings", f"~{sample['levels'].get('WARNING', {}).get('estimate', 0)}")
+            else:
+                warnings = [e for e in parsed_errors if e['type'] == 'WARNING']
+                st.metric("Warnings", len(warnings))
         
         with col4:
             st.metric("Solutions Found", len(final_state['solutions']))
         
         st.divider()
+        
+        # Diff mode: what changed since the baseline
+        diff = final_state.get('diff')
+        if diff is not None:
+            import pandas as pd
+            st.subheader("Changes Since Baseline")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("New", diff['counts']['new'])
+            with col2:
+                st.metric("Increased", diff['counts']['increased'])
+            with col3:
+                st.metric("Disappeared", diff['counts']['disappeared'])
+            st.caption(f"Compared by {'rate per hour of log time' if diff['by_rate'] else 'raw count'}"
+                       f"{' (approximate: current counts are sketch estimates)' if diff.get('approximate') else ''}; "
+                       "only new and increased errors were researched and solved")
+            for category in ('new', 'increased', 'disappeared'):
+                if diff[category]:
+                    with st.expander(f"{category.title()} ({diff['counts'][category]})", expanded=category != 'disappeared'):
+                        st.dataframe(
+                            pd.DataFrame(diff[category])[["message", "severity", "baseline_count", "current_count",
+                                                          "baseline_rate", "current_rate", "ratio", "zscore"]],
+                            use_container_width=True, hide_index=True
+                        )
+            st.divider()
 
         # Visualizations (Enhancement)
         import plotly.express as px
@@ -291,7 +490,7 @@ with tab3:
         with viz_col1:
             # Severity Distribution
             severity_counts = {}
-            for e in final_state['parsed_errors']:
+            for e in parsed_errors:
                 sev = e.get('severity', 'UNKNOWN')
                 severity_counts[sev] = severity_counts.get(sev, 0) + 1
             
@@ -312,11 +511,17 @@ with tab3:
         with viz_col2:
             # Timeline Visualization (if timestamps exist)
             valid_dates = []
-            for e in final_state['parsed_errors']:
+            for e in parsed_errors:
                 if e.get('timestamp') and e['timestamp'] != 'N/A':
                     try:
                         # Attempt to parse common date formats if needed, or use string handling
-                        valid_dates.append({'time': e['timestamp'], 'message': e['message'][:30], 'severity': e.get('severity', 'UNKNOWN')})
+                        epoch = parse_timestamp(e['timestamp'])
+                        valid_dates.append({
+                            'time': pd.to_datetime(epoch, unit='s') if epoch is not None else e['timestamp'],
+                            'message': e['message'][:30],
+                            'severity': e.get('severity', 'UNKNOWN'),
+                            'source': e.get('source', 'log')
+                        })
                     except:
                         pass
             
@@ -326,9 +531,10 @@ with tab3:
                     df_time, 
                     x='time', 
                     y='severity', 
-                    hover_data=['message'],
+                    hover_data=['message', 'source'],
                     title='Incident Timeline',
-                    color='severity',
+                    color='source' if df_time['source'].nunique() > 1 else 'severity',
+                    symbol='severity',
                     size_max=20
                 )
                 st.plotly_chart(fig_time, use_container_width=True)
@@ -345,7 +551,7 @@ with tab3:
         graph = graphviz.Digraph()
         edges = set()
         
-        for e in final_state['parsed_errors']:
+        for e in parsed_errors:
             if e.get('stack_trace'):
                 lines = e['stack_trace'].split('\n')
                 # Extract simple "at Class.method" calls to build edges
@@ -379,8 +585,8 @@ with tab3:
         # Parsed Errors
         st.subheader("Parsed Errors & Warnings")
         
-        if final_state['parsed_errors']:
-            for idx, error in enumerate(final_state['parsed_errors'], 1):
+        if parsed_errors:
+            for idx, error in enumerate(parsed_errors, 1):
                 with st.expander(f"#{idx}: {error['message'][:60]}...", expanded=idx <= 2):
                     col1, col2 = st.columns([3, 1])
                     
@@ -388,7 +594,12 @@ with tab3:
                         st.write(f"**Type:** {error['type']}")
                         st.write(f"**Severity:** {error['severity']}")
                         st.write(f"**Timestamp:** {error.get('timestamp', 'N/A')}")
-                        st.write(f"**Line:** {error['line_number']}")
+                        if error.get('line_number') is None and 'byte_offset' in error:
+                            st.write(f"**Byte offset:** {error['byte_offset']}")
+                        else:
+                            st.write(f"**Line:** {error['line_number']}")
+                        if error.get('source'):
+                            st.write(f"**Source:** {error['source']}")
                         st.write(f"**Message:** {error['message']}")
                         
                         if error.get('stack_trace'):
@@ -410,6 +621,8 @@ with tab3:
         if final_state['search_results']:
             for idx, result in enumerate(final_state['search_results'], 1):
                 with st.expander(f"Research #{idx}: {result['error']['message'][:50]}...", expanded=False):
+                    if result.get('missing'):
+                        st.warning(f"Research incomplete, missing: {', '.join(result['missing'])}")
                     col1, col2 = st.columns(2)
                     
                     with col1:
@@ -432,10 +645,25 @@ with tab3:
         st.subheader("AI-Generated Solutions")
         
         if final_state['solutions']:
+            priority_messages = {p['fingerprint']: p['error']['message'] for p in final_state.get('priorities') or []}
             for idx, solution in enumerate(final_state['solutions'], 1):
                 with st.expander(f"Solution #{idx}", expanded=idx <= 1):
                     if isinstance(solution, dict):
+                        if solution.get('known_issue'):
+                            st.success(f"Known issue ({solution['known_issue']} match) - reused accepted solution")
                         st.json(solution)
+                        if solution.get('known_issue'):
+                            if st.button("Forget this known issue", key=f"forget_solution_{idx}"):
+                                key = solution.get('known_issue_key', solution.get('fingerprint'))
+                                if get_known_issues().remove(key):
+                                    st.success("Removed; future runs will generate a new solution")
+                                else:
+                                    st.info("Already removed from the known-issue store")
+                        if solution.get('fingerprint') in priority_messages and not solution.get('known_issue'):
+                            if st.button("Accept as known fix", key=f"accept_solution_{idx}"):
+                                get_known_issues().add(priority_messages[solution['fingerprint']], solution,
+                                                       key=solution['fingerprint'])
+                                st.success("Saved; future runs will reuse this solution")
                     else:
                         st.write(solution)
         else:
@@ -492,19 +720,33 @@ with tab4:
             
             # Prepare context
             final_state = st.session_state.final_state
+            first_errors = list(itertools.islice(get_blob_store().iter_records(final_state.get('parsed_errors_ref')), 10))
+            history = get_history()
+            past_occurrences = []
+            for priority in final_state.get('priorities', [])[:5]:
+                seen = history.fingerprint_history(priority['fingerprint'])
+                if seen:
+                    past_occurrences.append({
+                        "fingerprint": priority['fingerprint'],
+                        "runs": seen['runs'],
+                        "occurrences": seen['occurrences'],
+                        "first_seen": datetime.fromtimestamp(seen['first_seen']).isoformat() if seen['first_seen'] else None,
+                    })
             context = f"""
             LOG ANALYSIS CONTEXT:
             - Error Count: {final_state['error_count']}
-            - Parsed Errors: {json.dumps(final_state['parsed_errors'][:10], indent=2)} (truncated)
+            - Parsed Errors: {json.dumps(first_errors, indent=2)} (truncated)
             - Solutions: {json.dumps(final_state['solutions'][:3], indent=2)} (truncated)
+            - History of top issues across runs (including this one): {json.dumps(past_occurrences, indent=2)}
             - Repository: {final_state.get('github_repo')}
             """
             
             # Generate response
-            from langchain_openai import ChatOpenAI
+            from agent.llm import get_llm
             from langchain_core.messages import HumanMessage, SystemMessage
             
-            llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+            # Shared client: its connection pool is reused across messages
+            llm = get_llm()
             
             # Generate response
             with st.spinner("Thinking..."):
@@ -535,7 +777,7 @@ with tab5:
         report_content = final_state['final_report']
         
         # Download buttons
-        col1, col2, col3 = st.columns(3)
+        col1, col2 = st.columns(2)
         
         with col1:
             st.download_button(
@@ -557,22 +799,56 @@ with tab5:
                 use_container_width=True
             )
         
-        with col3:
-            # Export as JSON
-            json_data = {
-                "timestamp": datetime.now().isoformat(),
-                "error_count": final_state['error_count'],
-                "errors": final_state['parsed_errors'],
-                "solutions": final_state['solutions'],
-                "report": report_content
-            }
-            st.download_button(
-                label="Download as JSON",
-                data=json.dumps(json_data, indent=2),
-                file_name=f"log_analysis_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                mime="application/json",
-                use_container_width=True
+        st.divider()
+        
+        # Structured export: built only when requested, then reused across reruns
+        st.subheader("Export Results")
+        st.caption("Parsed errors, clusters and solutions as NDJSON, or as Parquet/Arrow tables (zipped)")
+        
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            export_format = st.selectbox(
+                "Export format",
+                options=EXPORT_FORMATS,
+                format_func=lambda f: {"ndjson": "NDJSON", "parquet": "Parquet", "arrow": "Arrow IPC"}[f],
+                label_visibility="collapsed"
             )
+        with col2:
+            prepare_export = st.button("Prepare export", use_container_width=True)
+        
+        if prepare_export and export_format not in st.session_state.exports:
+            with st.spinner(f"Exporting {export_format}..."):
+                # One directory per export; clear_exports() removes it with the results
+                export_dir = tempfile.mkdtemp(prefix="log_agent_export_")
+                try:
+                    stem = f"log_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                    paths = export(final_state, export_format, export_dir, stem)
+                    if len(paths) > 1:
+                        # Columnar exports are one file per table
+                        bundle = os.path.join(export_dir, f"{stem}.{export_format}.zip")
+                        with zipfile.ZipFile(bundle, 'w') as zf:
+                            for path in paths:
+                                zf.write(path, os.path.basename(path))
+                                os.remove(path)
+                        paths = [bundle]
+                    st.session_state.exports[export_format] = paths[0]
+                except ImportError as e:
+                    shutil.rmtree(export_dir, ignore_errors=True)
+                    st.error(f"[ERROR] {e}")
+                except Exception:
+                    shutil.rmtree(export_dir, ignore_errors=True)
+                    raise
+        
+        export_path = st.session_state.exports.get(export_format)
+        if export_path and os.path.exists(export_path):
+            with open(export_path, 'rb') as f:
+                st.download_button(
+                    label=f"Download {os.path.basename(export_path)}",
+                    data=f,
+                    file_name=os.path.basename(export_path),
+                    mime="application/zip" if export_path.endswith('.zip') else "application/x-ndjson",
+                    use_container_width=True
+                )
         
         st.divider()
         
@@ -584,6 +860,69 @@ with tab5:
     else:
         st.info("[INFO] Complete analysis first to download report")
 
+with tab6:
+    st.header("Error History")
+
+    import pandas as pd
+    history = get_history()
+    runs = history.runs(limit=50)
+
+    if runs:
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            window_days = st.selectbox("Runs from", options=[1, 7, 30, 90, 0],
+                                       format_func=lambda d: f"Last {d} days" if d else "All runs", index=2)
+        with col2:
+            severities = st.multiselect("Severity", options=["HIGH", "MEDIUM", "LOW"])
+        since = datetime.now().timestamp() - window_days * 86400 if window_days else None
+
+        # This run's issues: have they been seen before?
+        if st.session_state.analysis_complete and st.session_state.final_state:
+            st.subheader("Current Issues in History")
+            rows = []
+            for priority in st.session_state.final_state.get('priorities', [])[:10]:
+                seen = history.fingerprint_history(priority['fingerprint']) or {}
+                rows.append({
+                    "Issue": priority['fingerprint'][:80],
+                    "Runs": seen.get('runs', 0),
+                    "Occurrences": seen.get('occurrences', 0),
+                    "First Seen": datetime.fromtimestamp(seen['first_seen']) if seen.get('first_seen') else None,
+                })
+            if rows:
+                st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+
+        st.subheader("Most Frequent Issues")
+        top = history.top_fingerprints(since=since, severity=severities or None, limit=20)
+        if top:
+            top_df = pd.DataFrame(top)
+            for column in ("first_seen", "last_seen"):
+                top_df[column] = pd.to_datetime(top_df[column], unit='s')
+            st.dataframe(top_df[["fingerprint", "severity", "runs", "occurrences", "first_seen", "last_seen"]],
+                         use_container_width=True, hide_index=True)
+
+            selected = st.selectbox("Inspect issue", options=[t['fingerprint'] for t in top])
+            # The window is wall-clock run time, not the log time stored on each record
+            occurrences = history.errors(fingerprint=selected, run_since=since, severity=severities or None,
+                                         limit=100)
+            if occurrences:
+                occurrences_df = pd.DataFrame(occurrences)
+                occurrences_df["ts"] = pd.to_datetime(occurrences_df["ts"], unit='s')
+                st.dataframe(occurrences_df[["ts", "severity", "source", "line_number", "message", "run_id"]],
+                             use_container_width=True, hide_index=True)
+            for past in history.solutions(selected, limit=3):
+                with st.expander(f"Solution from run #{past['run_id']} "
+                                 f"({datetime.fromtimestamp(past['started_at']).strftime('%Y-%m-%d %H:%M')})"):
+                    st.json(past['solution'])
+        else:
+            st.info("No issues recorded in this window")
+
+        st.subheader("Recent Runs")
+        runs_df = pd.DataFrame(runs)
+        runs_df["started_at"] = pd.to_datetime(runs_df["started_at"], unit='s')
+        st.dataframe(runs_df, use_container_width=True, hide_index=True)
+    else:
+        st.info(f"[INFO] No runs recorded yet in {history.path}")
+
 # Footer
 st.divider()
 st.markdown("""
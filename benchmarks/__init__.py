@@ -0,0 +1,5 @@
+"""
+Benchmark suite for log-analysis-agent.
+
+Run with ``python -m benchmarks --help``.
+"""
@@ -0,0 +1,226 @@
+"""
+Command line entry point for the benchmark suite.
+
+Examples:
+    python -m benchmarks generate --size 100MB --out /tmp/bench.log
+    python -m benchmarks run --size 50MB --results results.jsonl
+    python -m benchmarks compare baseline.jsonl results.jsonl
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+from benchmarks.loggen import LogGenerator, LINE_FORMATS, TIMESTAMP_FORMATS
+
+UNITS = {'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+# Metrics where a larger value is a regression
+LOWER_IS_BETTER = ('seconds_best', 'seconds_mean', 'peak_alloc_bytes', 'total_us')
+
+
+def parse_size(value: str) -> int:
+    """Parse sizes such as '512KB', '10MB' or '2GB'"""
+    value = value.strip().upper()
+    for unit, factor in UNITS.items():
+        if value.endswith(unit):
+            return int(float(value[:-len(unit)]) * factor)
+    return int(value)
+
+
+def git_commit() -> str:
+    """Return the current commit hash, or 'unknown' outside a git checkout"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            stderr=subprocess.DEVNULL,
+            text=True
+        ).strip()
+    except Exception:
+        return 'unknown'
+
+
+def build_generator(args) -> LogGenerator:
+    return LogGenerator(
+        size_bytes=parse_size(args.size),
+        error_rate=args.error_rate,
+        warning_rate=args.warning_rate,
+        stack_trace_rate=args.stack_trace_rate,
+        java_ratio=args.java_ratio,
+        timestamp_formats=args.timestamp_formats.split(','),
+        cardinality=args.cardinality,
+        seed=args.seed,
+        line_format=args.line_format,
+    )
+
+
+def cmd_generate(args):
+    generator = build_generator(args)
+    written = generator.write(args.out)
+    print(f"[+] Wrote {written} bytes to {args.out}")
+
+
+def cmd_run(args):
+    generator = build_generator(args)
+    log_path = args.log
+    cleanup = False
+    if not log_path:
+        fd, log_path = tempfile.mkstemp(suffix='.log')
+        os.close(fd)
+        cleanup = True
+        print(f"[*] Generating {args.size} synthetic log...")
+        generator.write(log_path)
+
+    meta = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'generator': None if args.log else generator.config(),
+        'log_file': args.log,
+    }
+
+    records = []
+    try:
+        selected = args.only.split(',') if args.only else ['parser', 'prioritize', 'workflow', 'imports']
+        if 'imports' in selected:
+            from benchmarks.bench_imports import bench_imports, IMPORT_MODES
+            print("[*] Benchmarking import time...")
+            for mode in IMPORT_MODES:
+                records.append({**meta, 'benchmark': f'imports_{mode}',
+                                'metrics': bench_imports(mode, repeat=args.repeat)})
+        if 'parser' in selected:
+            from benchmarks.bench_parser import bench_parse_file, bench_parse_logs
+            print("[*] Benchmarking LogParser.parse_file...")
+            records.append({**meta, 'benchmark': 'parse_file',
+                            'metrics': bench_parse_file(log_path, repeat=args.repeat)})
+            print("[*] Benchmarking LogParser.parse_logs (in memory)...")
+            records.append({**meta, 'benchmark': 'parse_logs',
+                            'metrics': bench_parse_logs(log_path, repeat=args.repeat)})
+        if 'prioritize' in selected:
+            from benchmarks.bench_prioritize import bench_prioritize
+            print(f"[*] Benchmarking anomaly.prioritize on {args.records} records...")
+            metrics = bench_prioritize(log_path, records=args.records, repeat=args.repeat)
+            records.append({**meta, 'benchmark': 'prioritize', 'metrics': metrics})
+            if not metrics.get('meets_target', True):
+                print(f"[!] prioritize took {metrics['seconds_best']:.2f}s, "
+                      f"target is {metrics['target_seconds']:.2f}s")
+        if 'workflow' in selected:
+            from benchmarks.bench_workflow import bench_workflow
+            print("[*] Benchmarking create_workflow() end to end...")
+            records.append({**meta, 'benchmark': 'workflow',
+                            'metrics': bench_workflow(
+                                log_path,
+                                repeat=args.repeat,
+                                llm_latency=args.llm_latency,
+                                tool_latency=args.tool_latency,
+                                github_repo=args.github_repo,
+                                cassette_path=args.cassette,
+                                replay_latency=args.replay_latency,
+                            )})
+    finally:
+        if cleanup:
+            os.remove(log_path)
+
+    with open(args.results, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+    for record in records:
+        print(f"[+] {record['benchmark']}: {json.dumps(record['metrics'])}")
+    print(f"[+] Results appended to {args.results}")
+
+
+def load_latest(path: str) -> dict:
+    """Return the most recent record per benchmark in a results file"""
+    latest = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                latest[record['benchmark']] = record
+    return latest
+
+
+def cmd_compare(args):
+    baseline = load_latest(args.baseline)
+    current = load_latest(args.current)
+    regressions = 0
+
+    for name, record in current.items():
+        if name not in baseline:
+            continue
+        print(f"{name} ({baseline[name]['commit']} -> {record['commit']})")
+        for metric in LOWER_IS_BETTER:
+            old = baseline[name]['metrics'].get(metric)
+            new = record['metrics'].get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            flag = ''
+            if change > args.threshold:
+                flag = '  REGRESSION'
+                regressions += 1
+            print(f"  {metric:<20} {old:>14.4f} {new:>14.4f} {change:+8.1%}{flag}")
+
+    sys.exit(1 if regressions else 0)
+
+
+def add_generator_args(parser):
+    parser.add_argument('--size', default='10MB', help="Target size, e.g. 512KB, 10MB, 20GB")
+    parser.add_argument('--error-rate', type=float, default=0.05)
+    parser.add_argument('--warning-rate', type=float, default=0.05)
+    parser.add_argument('--stack-trace-rate', type=float, default=0.3)
+    parser.add_argument('--java-ratio', type=float, default=0.5,
+                        help="Fraction of stack traces that are Java (rest are Python)")
+    parser.add_argument('--timestamp-formats', default='iso',
+                        help=f"Comma separated list of: {', '.join(TIMESTAMP_FORMATS)}")
+    parser.add_argument('--cardinality', type=int, default=100,
+                        help="Number of distinct messages")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--line-format', default='text', choices=LINE_FORMATS)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    gen = sub.add_parser('generate', help="Write a synthetic log file")
+    add_generator_args(gen)
+    gen.add_argument('--out', required=True)
+    gen.set_defaults(func=cmd_generate)
+
+    run = sub.add_parser('run', help="Run benchmarks and append JSON-lines results")
+    add_generator_args(run)
+    run.add_argument('--log', help="Benchmark an existing log file instead of generating one")
+    run.add_argument('--only', help="Comma separated subset: parser,prioritize,workflow,imports")
+    run.add_argument('--repeat', type=int, default=3)
+    run.add_argument('--records', type=int, default=1_000_000,
+                     help="Error records fed to the prioritize benchmark (tiled from the log)")
+    run.add_argument('--llm-latency', type=float, default=0.0, help="Simulated seconds per LLM call")
+    run.add_argument('--tool-latency', type=float, default=0.0, help="Simulated seconds per tool call")
+    run.add_argument('--github-repo', default=None)
+    run.add_argument('--cassette', help="Replay a recorded cassette instead of using fakes")
+    run.add_argument('--replay-latency', default='none',
+                     help="Latency profile for --cassette: none, recorded, scale=X, fixed=S")
+    run.add_argument('--results', default='bench_results.jsonl')
+    run.set_defaults(func=cmd_run)
+
+    cmp = sub.add_parser('compare', help="Compare the latest results of two files")
+    cmp.add_argument('baseline')
+    cmp.add_argument('current')
+    cmp.add_argument('--threshold', type=float, default=0.10,
+                     help="Relative slowdown that counts as a regression")
+    cmp.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
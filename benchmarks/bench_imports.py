@@ -0,0 +1,53 @@
+"""
+Startup cost benchmarks based on ``python -X importtime``.
+"""
+
+import subprocess
+import sys
+from typing import Dict
+
+IMPORT_MODES = {
+    'parse_only': "from utils.parsers import LogParser",
+    'parse_with_state': "from agent.state import AgentState; from utils.parsers import LogParser",
+    'full': "import agent.graph, agent.nodes, langgraph.graph, langchain_openai",
+}
+
+
+def bench_imports(mode: str, repeat: int = 3) -> Dict:
+    """Measure total and per-package import time for one startup mode"""
+    statement = IMPORT_MODES[mode]
+    best = None
+
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', statement],
+            capture_output=True,
+            text=True
+        )
+        if proc.returncode != 0:
+            return {'mode': mode, 'error': proc.stderr.strip().splitlines()[-1]}
+
+        total_us = 0
+        modules = 0
+        top_level = {}
+        for line in proc.stderr.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            total_us += int(self_us)
+            modules += 1
+            # Top-level entries are indented by a single space only
+            if not name.startswith('  '):
+                package = name.strip().split('.')[0]
+                top_level[package] = top_level.get(package, 0) + int(cumulative_us)
+
+        if best is None or total_us < best['total_us']:
+            heaviest = sorted(top_level.items(), key=lambda item: -item[1])[:10]
+            best = {
+                'mode': mode,
+                'total_us': total_us,
+                'modules_imported': modules,
+                'heaviest_us': dict(heaviest),
+            }
+
+    return best
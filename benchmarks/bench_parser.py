@@ -0,0 +1,81 @@
+"""
+LogParser throughput and peak memory benchmarks.
+"""
+
+import os
+import time
+import tracemalloc
+from typing import Dict
+
+from utils.parsers import LogParser
+
+# parse_logs needs the whole text in memory, so it is only benchmarked on inputs up to this size
+IN_MEMORY_MAX_BYTES = 64 * 1024 * 1024
+
+
+def bench_parse_file(path: str, repeat: int = 3) -> Dict:
+    """Time LogParser.parse_file on a path and measure iter_file's streaming peak allocation"""
+    size = os.path.getsize(path)
+
+    timings = []
+    error_count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        errors = LogParser.parse_file(path)
+        timings.append(time.perf_counter() - start)
+        error_count = len(errors)
+        del errors
+
+    # Separate pass: tracemalloc slows allocation-heavy code, so keep it out of timings.
+    # Records are counted and dropped, so the peak is the parser's own working set
+    tracemalloc.start()
+    for _ in LogParser.iter_file(path):
+        pass
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        'input_bytes': size,
+        'errors_found': error_count,
+        'seconds_best': best,
+        'seconds_mean': sum(timings) / len(timings),
+        'mb_per_second': (size / (1024 * 1024)) / best if best else 0.0,
+        'peak_alloc_bytes': peak,
+    }
+
+
+def bench_parse_logs(path: str, repeat: int = 3) -> Dict:
+    """Time LogParser.parse_logs on a file's text and measure its peak allocation
+
+    Skipped for files over IN_MEMORY_MAX_BYTES; use bench_parse_file for those.
+    """
+    size = os.path.getsize(path)
+    if size > IN_MEMORY_MAX_BYTES:
+        return {'input_bytes': size, 'skipped': f"larger than {IN_MEMORY_MAX_BYTES} bytes"}
+    with open(path, 'r', encoding='utf-8') as f:
+        logs = f.read()
+
+    timings = []
+    error_count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        errors = LogParser.parse_logs(logs)
+        timings.append(time.perf_counter() - start)
+        error_count = len(errors)
+        del errors
+
+    tracemalloc.start()
+    LogParser.parse_logs(logs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        'input_bytes': size,
+        'errors_found': error_count,
+        'seconds_best': best,
+        'seconds_mean': sum(timings) / len(timings),
+        'mb_per_second': (size / (1024 * 1024)) / best if best else 0.0,
+        'peak_alloc_bytes': peak,
+    }
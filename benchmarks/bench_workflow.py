@@ -0,0 +1,88 @@
+"""
+End-to-end workflow benchmark with offline LLM and tool stand-ins.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+from typing import Dict, Optional
+
+from benchmarks.fakes import FakeLLM, FakeTools
+
+
+def bench_workflow(
+    path: str,
+    repeat: int = 3,
+    llm_latency: float = 0.0,
+    tool_latency: float = 0.0,
+    github_repo: Optional[str] = None,
+    cassette_path: Optional[str] = None,
+    replay_latency: str = 'none',
+    known_issues_path: Optional[str] = None,
+) -> Dict:
+    """Run create_workflow() end to end against fakes (or a recorded cassette) and time each run
+
+    Runs use an empty known-issue store unless ``known_issues_path`` is given.
+    """
+    from agent.graph import create_workflow
+    from agent.known_issues import KnownIssueStore
+    from agent.replay import Cassette
+    from agent.state import AgentState
+    from utils.blobs import get_blob_store
+
+    # Same path as a pasted/uploaded log: the content is addressed by handle
+    log_ref = get_blob_store().put_file(path)
+
+    # Removed at the end of the run (or by its finalizer if a run raises)
+    scratch = tempfile.TemporaryDirectory(prefix="bench_known_issues_")
+    known_issues = KnownIssueStore(known_issues_path or os.path.join(scratch.name, 'known_issues.json'))
+
+    timings = []
+    llm = FakeLLM(latency=llm_latency)
+    tools = FakeTools(latency=tool_latency)
+    if cassette_path:
+        # Each run needs its own cassette so replay cursors start from the beginning
+        app = None
+    else:
+        app = create_workflow(llm=llm, tools=tools, known_issues=known_issues)
+    final_state = None
+
+    for _ in range(repeat):
+        initial_state = AgentState(
+            log_ref=log_ref,
+            log_path=None,
+            log_paths=None,
+            baseline_paths=None,
+            sample=None,
+            sketch=None,
+            filters=None,
+            github_repo=github_repo,
+            parsed_errors_ref=None,
+            priorities=[],
+            error_summary=None,
+            diff=None,
+            sample_summary=None,
+            search_results=[],
+            code_analysis=None,
+            solutions=[],
+            final_report="",
+            error_count=0,
+            status="Initializing"
+        )
+        if cassette_path:
+            cassette = Cassette(cassette_path, mode='replay', latency=replay_latency)
+            app = create_workflow(cassette=cassette, known_issues=known_issues)
+        start = time.perf_counter()
+        final_state = asyncio.run(app.ainvoke(initial_state))
+        timings.append(time.perf_counter() - start)
+
+    scratch.cleanup()
+    return {
+        'input_bytes': os.path.getsize(path),
+        'errors_found': final_state['error_count'] if final_state else 0,
+        'seconds_best': min(timings),
+        'seconds_mean': sum(timings) / len(timings),
+        'llm_calls': None if cassette_path else llm.calls,
+        'tool_calls': None if cassette_path else dict(tools.calls),
+    }
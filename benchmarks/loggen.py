@@ -0,0 +1,177 @@
+"""
+Deterministic synthetic log generator for benchmarks.
+"""
+
+import json
+import random
+from typing import Iterator, List, Optional
+
+TIMESTAMP_FORMATS = {
+    'iso': '%Y-%m-%d %H:%M:%S',
+    'iso_t': '%Y-%m-%dT%H:%M:%S',
+    'us': '%m/%d/%Y %H:%M:%S',
+    'syslog': '%b %d %H:%M:%S',
+}
+
+ERROR_TEMPLATES = [
+    "Database connection failed: Connection refused ({id})",
+    "Exception in thread \"worker-{id}\" java.sql.SQLException: Connection refused",
+    "NullPointerException in OrderProcessingService order={id}",
+    "Failed to process payment {id}: 503 Service Unavailable",
+    "Timeout while calling inventory-service after {id}ms",
+    "KeyError: 'user_{id}' in session cache",
+]
+
+WARNING_TEMPLATES = [
+    "High memory usage detected: {pct}% (pool {id})",
+    "Retrying request {id} after transient failure",
+    "Slow query took {id}ms on table orders",
+]
+
+INFO_TEMPLATES = [
+    "Request {id} completed in {pct}ms",
+    "User session {id} started",
+    "Cache refreshed for tenant {id}",
+    "Health check passed",
+]
+
+JAVA_FRAMES = [
+    "at org.postgresql.core.v3.ConnectionFactoryImpl.openConnectionImpl(ConnectionFactoryImpl.java:292)",
+    "at org.postgresql.core.ConnectionFactory.openConnection(ConnectionFactory.java:49)",
+    "at com.example.service.DatabaseConnector.connect(DatabaseConnector.java:45)",
+    "at com.example.service.OrderProcessing.processOrder(OrderProcessing.java:112)",
+    "at com.example.controller.OrderController.handleRequest(OrderController.java:56)",
+]
+
+LINE_FORMATS = ('text', 'jsonl', 'logfmt')
+
+PYTHON_FRAMES = [
+    "File \"/app/service/handlers.py\", line 88, in handle_request",
+    "File \"/app/service/cache.py\", line 41, in get_session",
+    "File \"/app/service/db.py\", line 17, in connect",
+]
+
+
+class LogGenerator:
+    """Generate reproducible synthetic logs of a configurable shape"""
+
+    def __init__(
+        self,
+        size_bytes: int = 1024 * 1024,
+        error_rate: float = 0.05,
+        warning_rate: float = 0.05,
+        stack_trace_rate: float = 0.3,
+        java_ratio: float = 0.5,
+        timestamp_formats: Optional[List[str]] = None,
+        cardinality: int = 100,
+        seed: int = 42,
+        line_format: str = 'text',
+    ):
+        self.size_bytes = size_bytes
+        self.error_rate = error_rate
+        self.warning_rate = warning_rate
+        self.stack_trace_rate = stack_trace_rate
+        self.java_ratio = java_ratio
+        self.timestamp_formats = timestamp_formats or ['iso']
+        self.cardinality = max(1, cardinality)
+        self.seed = seed
+        self.line_format = line_format
+
+        if line_format not in LINE_FORMATS:
+            raise ValueError(f"Unknown line format: {line_format}")
+        for fmt in self.timestamp_formats:
+            if fmt not in TIMESTAMP_FORMATS:
+                raise ValueError(f"Unknown timestamp format: {fmt}")
+
+    def config(self) -> dict:
+        """Return the generator settings as a plain dict"""
+        return {
+            'size_bytes': self.size_bytes,
+            'error_rate': self.error_rate,
+            'warning_rate': self.warning_rate,
+            'stack_trace_rate': self.stack_trace_rate,
+            'java_ratio': self.java_ratio,
+            'timestamp_formats': self.timestamp_formats,
+            'cardinality': self.cardinality,
+            'seed': self.seed,
+            'line_format': self.line_format,
+        }
+
+    def lines(self) -> Iterator[str]:
+        """Yield log lines (with trailing newline) until size_bytes is reached"""
+        import datetime
+
+        rng = random.Random(self.seed)
+        clock = datetime.datetime(2024, 12, 14, 0, 0, 0)
+        written = 0
+
+        while written < self.size_bytes:
+            clock += datetime.timedelta(milliseconds=rng.randint(1, 2000))
+            fmt = TIMESTAMP_FORMATS[rng.choice(self.timestamp_formats)]
+            stamp = clock.strftime(fmt)
+            # Distinct messages are bounded by cardinality, not by line count
+            variant = rng.randrange(self.cardinality)
+            pct = 50 + variant % 50
+
+            roll = rng.random()
+            if roll < self.error_rate:
+                template = ERROR_TEMPLATES[variant % len(ERROR_TEMPLATES)]
+                level = rng.choice(['ERROR', 'ERROR', 'CRITICAL', 'FATAL'])
+            elif roll < self.error_rate + self.warning_rate:
+                template = WARNING_TEMPLATES[variant % len(WARNING_TEMPLATES)]
+                level = 'WARNING'
+            else:
+                template = INFO_TEMPLATES[variant % len(INFO_TEMPLATES)]
+                level = 'INFO'
+
+            message = template.format(id=variant, pct=pct)
+            frames = []
+            if level != 'INFO' and level != 'WARNING' and rng.random() < self.stack_trace_rate:
+                frames = self._stack_trace(rng)
+
+            if self.line_format == 'text':
+                lines = [f"{stamp} {level} {message}\n"] + frames
+            elif self.line_format == 'jsonl':
+                record = {'ts': stamp, 'level': level.lower(), 'msg': message, 'service': 'bench'}
+                if frames:
+                    record['stack'] = ''.join(frames)
+                lines = [json.dumps(record) + '\n']
+            else:
+                lines = [f"ts={json.dumps(stamp)} level={level.lower()} msg={json.dumps(message)} service=bench\n"]
+
+            for line in lines:
+                written += len(line)
+                yield line
+
+    def _stack_trace(self, rng: random.Random) -> List[str]:
+        """Build a Java or Python stack trace block"""
+        depth = rng.randint(2, 5)
+        if rng.random() < self.java_ratio:
+            return [f"    {frame}\n" for frame in JAVA_FRAMES[:depth]]
+
+        frames = ["Traceback (most recent call last):\n"]
+        frames.extend(f"  {frame}\n" for frame in PYTHON_FRAMES[:min(depth, len(PYTHON_FRAMES))])
+        frames.append("KeyError: 'user_id'\n")
+        return frames
+
+    def write(self, path: str, chunk_size: int = 1024 * 1024) -> int:
+        """Stream generated lines to a file and return the number of bytes written"""
+        buffer = []
+        buffered = 0
+        total = 0
+        with open(path, 'w', encoding='utf-8', newline='\n') as f:
+            for line in self.lines():
+                buffer.append(line)
+                buffered += len(line)
+                if buffered >= chunk_size:
+                    f.write(''.join(buffer))
+                    total += buffered
+                    buffer, buffered = [], 0
+            if buffer:
+                f.write(''.join(buffer))
+                total += buffered
+        return total
+
+    def text(self) -> str:
+        """Return the generated log as a single string"""
+        return ''.join(self.lines())
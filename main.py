@@ -3,35 +3,90 @@ Main entry point for the log-analysis-agent application.
 """
 
 import os
+import asyncio
+import glob
+import argparse
 from dotenv import load_dotenv
 from pathlib import Path
 from agent.graph import create_workflow
+from agent.known_issues import accept_solutions
 from agent.state import AgentState
+from utils.blobs import get_blob_store
+from utils.exports import EXPORT_FORMATS, export
+from utils.history import get_history
+from utils.tracing import get_tracer
 from datetime import datetime
 
+def parse_args(argv=None):
+    """Optional command line arguments; anything omitted is prompted for"""
+    parser = argparse.ArgumentParser(description="Log Analysis Agent")
+    parser.add_argument('logs', nargs='*', help="Log file(s) or globs; prompted for when omitted")
+    parser.add_argument('--repo', help="GitHub repository URL for code analysis")
+    parser.add_argument('--baseline', action='append', default=[],
+                        help="Diff mode: baseline log file(s) or globs; only new or increased errors are analyzed")
+    parser.add_argument('--since', help="Only analyze records at or after this timestamp")
+    parser.add_argument('--until', help="Only analyze records at or before this timestamp")
+    parser.add_argument('--level', action='append', choices=['ERROR', 'WARNING'], type=str.upper,
+                        help="Only analyze records of this level (repeatable)")
+    parser.add_argument('--sample', action='store_true', default=None,
+                        help="Quick look: analyze a stratified sample and report estimated counts "
+                             "(default: LOG_AGENT_SAMPLE)")
+    parser.add_argument('--sketch', action='store_true', default=None,
+                        help="High-cardinality logs: count errors in fixed-memory sketches instead of keeping "
+                             "every record (default: LOG_AGENT_SKETCH)")
+    parser.add_argument('--accept-solutions', action='store_true',
+                        help="Store this run's new solutions as known issues for future runs")
+    parser.add_argument('--export', action='append', choices=EXPORT_FORMATS, default=[],
+                        help="Also export errors, clusters and solutions in this format (repeatable)")
+    parser.add_argument('--no-history', action='store_true',
+                        help="Do not record this run in the history database")
+    return parser.parse_args(argv)
+
 def main():
     """Main execution function"""
     
+    args = parse_args()
+    
     # Load environment variables
     load_dotenv()
     
+    tracer = get_tracer()
+    metrics_port = os.getenv("LOG_AGENT_METRICS_PORT")
+    if metrics_port:
+        host, port = tracer.serve_prometheus(int(metrics_port)).server_address[:2]
+        print(f"[INFO] Prometheus metrics at http://{host}:{port}/metrics")
+    
     print("=" * 80)
     print("LOG ANALYSIS AGENT")
     print("=" * 80)
     print()
     
-    # Get log file path
-    log_file = input("Enter path to log file (or press Enter for sample): ").strip().strip('"')
+    # Get log file path(s)
+    if args.logs:
+        log_input = ','.join(args.logs)
+    else:
+        log_input = input("Enter path to log file(s), comma separated or glob (or press Enter for sample): ").strip().strip('"')
+    
+    log_paths = []
+    for pattern in [p.strip().strip('"') for p in log_input.split(',') if p.strip()]:
+        log_paths.extend(sorted(glob.glob(pattern)) or [pattern])
+    log_file = log_paths[0] if log_paths else ""
+    
+    if len(log_paths) > 1:
+        missing = [p for p in log_paths if not os.path.exists(p)]
+        for path in missing:
+            print(f"[ERROR] File '{path}' not found, skipping")
+        log_paths = [p for p in log_paths if p not in missing]
+        log_file = log_paths[0] if log_paths else "logs/sample.log"
     
-    if not log_file:
+    if len(log_paths) > 1:
+        print(f"Merging {len(log_paths)} log files into one timeline")
+    elif not log_file:
         log_file = "logs/sample.log"
         print(f"Using sample log: {log_file}")
     
-    # Read log file
-    try:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            logs = f.read()
-    except FileNotFoundError:
+    # The parser streams the file itself (plain, .gz, .bz2, .xz, .zst or tar bundles)
+    if not os.path.exists(log_file):
         print(f"[ERROR] File '{log_file}' not found")
         print("\nCreating sample log file...")
         
@@ -50,10 +105,28 @@ def main():
         with open("logs/sample.log", 'w') as f:
             f.write(sample_log)
         
-        logs = sample_log
+        log_file = "logs/sample.log"
     
     # Get GitHub repo (optional)
-    github_repo = input("\nEnter GitHub repository URL (optional, press Enter to skip): ").strip()
+    if args.logs:
+        github_repo = args.repo or ""
+    else:
+        github_repo = input("\nEnter GitHub repository URL (optional, press Enter to skip): ").strip()
+    
+    baseline_paths = []
+    for pattern in args.baseline:
+        baseline_paths.extend(sorted(glob.glob(pattern)) or [pattern])
+    missing_baselines = [p for p in baseline_paths if not os.path.exists(p)]
+    for path in missing_baselines:
+        print(f"[ERROR] Baseline '{path}' not found, skipping")
+    baseline_paths = [p for p in baseline_paths if p not in missing_baselines]
+    if baseline_paths:
+        print(f"Diff mode: comparing against {len(baseline_paths)} baseline log(s)")
+    
+    # Time window / level filters use the sidecar index to seek instead of scanning
+    filters = {k: v for k, v in (('since', args.since), ('until', args.until), ('levels', args.level)) if v}
+    if filters:
+        print(f"Filters: {filters}")
     
     print("\n" + "=" * 80)
     print("Starting analysis...")
@@ -61,9 +134,19 @@ def main():
     
     # Initialize state
     initial_state = AgentState(
-        logs=logs,
+        log_ref=None,
+        log_path=log_file,
+        log_paths=log_paths if len(log_paths) > 1 else None,
+        baseline_paths=baseline_paths or None,
+        sample=args.sample,
+        sketch=args.sketch,
+        filters=filters or None,
         github_repo=github_repo if github_repo else None,
-        parsed_errors=[],
+        parsed_errors_ref=None,
+        priorities=[],
+        error_summary=None,
+        diff=None,
+        sample_summary=None,
         search_results=[],
         code_analysis=None,
         solutions=[],
@@ -74,7 +157,9 @@ def main():
     
     # Create and run workflow
     app = create_workflow()
-    final_state = app.invoke(initial_state)
+    total_bytes = sum(os.path.getsize(p) for p in (log_paths if len(log_paths) > 1 else [log_file]))
+    with tracer.span("workflow.run", bytes=total_bytes):
+        final_state = asyncio.run(app.ainvoke(initial_state))
     
     # Save report
     output_dir = Path("output")
@@ -86,11 +171,42 @@ def main():
     with open(report_file, 'w', encoding='utf-8') as f:
         f.write(final_state['final_report'])
     
+    trace_file = os.getenv("LOG_AGENT_TRACE_FILE") or str(output_dir / f"trace_{timestamp}.jsonl")
+    tracer.export_jsonl(trace_file)
+    
     print("\n" + "=" * 80)
     print("[SUCCESS] ANALYSIS COMPLETE")
     print("=" * 80)
     print(f"\n[INFO] Total Issues Found: {final_state['error_count']}")
     print(f"[INFO] Report saved to: {report_file}")
+    print(f"[INFO] Trace saved to: {trace_file}")
+    for fmt in args.export:
+        try:
+            for path in export(final_state, fmt, str(output_dir), f"log_analysis_{timestamp}"):
+                print(f"[INFO] Export saved to: {path}")
+        except ImportError as e:
+            print(f"[!] Skipping {fmt} export: {e}")
+    reused = sum(1 for s in final_state['solutions'] if isinstance(s, dict) and s.get('known_issue'))
+    if reused:
+        print(f"[INFO] Known-issue solutions reused: {reused}")
+    if args.accept_solutions:
+        accepted = accept_solutions(final_state['solutions'], final_state['priorities'])
+        print(f"[INFO] Solutions accepted as known issues: {accepted}")
+    sample = final_state.get('sample_summary')
+    if sample:
+        total = sample['total']
+        print(f"[INFO] Sampled run ({sample['fraction']:.0%} of input read): about {total['estimate']} issues, "
+              f"95% bounds {total['low']}-{total['high']}; not recorded in history")
+    elif not args.no_history:
+        history = get_history()
+        recurring = sum(1 for p in final_state['priorities'] if history.fingerprint_history(p['fingerprint']))
+        run_id = history.record_run(
+            final_state,
+            get_blob_store().iter_records(final_state['parsed_errors_ref']),
+            sources=log_paths if len(log_paths) > 1 else [log_file],
+        )
+        print(f"[INFO] Run #{run_id} recorded in {history.path} "
+              f"({recurring} of {len(final_state['priorities'])} issues seen in earlier runs)")
     print("\n" + "=" * 80)
     
     # Display report preview
@@ -99,6 +215,10 @@ def main():
     print(final_state['final_report'][:1000])
     print("\n... (see full report in output file)")
     print("-" * 80)
+    
+    # Timing summary
+    print("\nPERFORMANCE SUMMARY:")
+    print(tracer.summary_table())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,63 @@
+"""
+Bulk timestamp conversion and grouping must match the per-record path.
+"""
+
+import math
+import random
+
+from utils import anomaly
+from utils.anomaly import fingerprint, prioritize, to_epochs
+from utils.formats import parse_timestamp
+
+TIMESTAMPS = [
+    '2024-12-14 00:01:03', '2024-12-14T00:01:03', '2024-12-14 00:01:03,123', '2024-12-14T00:01:03.123456',
+    '2024-02-29 23:59:59.9', '1969-07-20 20:17:40', '2024-12-14T00:01:03Z', '2024-12-14T00:01:03+02:00',
+    '2024-12-14 00:01:03.', '2024-13-45 00:01:03', '2024-02-30 10:00:00', '2024-12-14 24:00:00',
+    'Dec 14 00:01:03', '14/Dec/2024:00:01:03 +0000', '1734134400', 'garbage', '', None,
+]
+
+
+def _expected(value) -> float:
+    epoch = parse_timestamp(value) if value else None
+    return math.nan if epoch is None else epoch
+
+
+def _same(a: float, b: float) -> bool:
+    return (math.isnan(a) and math.isnan(b)) or abs(a - b) < 1e-6
+
+
+def test_to_epochs_matches_parse_timestamp():
+    for value in TIMESTAMPS:
+        # Alone (equal widths) and mixed with every other shape
+        assert _same(to_epochs([value])[0], _expected(value)), value
+    for value, epoch in zip(TIMESTAMPS, to_epochs(TIMESTAMPS)):
+        assert _same(epoch, _expected(value)), value
+
+
+def test_prioritize_matches_per_record_grouping(monkeypatch):
+    # Several chunks, so first occurrences are found across chunk boundaries
+    monkeypatch.setattr(anomaly, 'CHUNK_RECORDS', 997)
+    rng = random.Random(7)
+    records = []
+    for i in range(20000):
+        message = f"Connection to db-{rng.randrange(40)} refused after {rng.randrange(500)} ms"
+        if i % 3 == 0:
+            message = f"User {rng.randrange(10 ** 6)} not found"
+        records.append({
+            'type': 'ERROR',
+            'message': message,
+            'severity': rng.choice(['HIGH', 'MEDIUM', 'LOW']),
+            'timestamp': rng.choice(TIMESTAMPS),
+            'line_number': i + 1,
+        })
+
+    ranked = prioritize(iter(records))
+    counts = {}
+    first = {}
+    for record in records:
+        key = fingerprint(record['message'])
+        counts[key] = counts.get(key, 0) + 1
+        first.setdefault(key, record)
+    assert {entry['fingerprint']: entry['count'] for entry in ranked} == counts
+    assert all(entry['error'] is first[entry['fingerprint']] for entry in ranked)
+    assert prioritize([]) == []
@@ -0,0 +1,72 @@
+"""
+Diff mode classification: new, increased and disappeared error groups.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from utils.diff import compare, profile, regressed
+
+START = datetime(2024, 12, 14, tzinfo=timezone.utc)
+
+
+def _records(counts, hours):
+    """Records spread evenly over ``hours`` of log time, ``counts`` per message"""
+    messages = [message for message, count in counts.items() for _ in range(count)]
+    step = timedelta(hours=hours) / max(len(messages) - 1, 1)
+    return [{'message': message, 'severity': 'HIGH', 'timestamp': (START + i * step).isoformat()}
+            for i, message in enumerate(messages)]
+
+
+def _groups(diff, category):
+    return {entry['message'] for entry in diff[category]}
+
+
+def test_groups_are_classified_by_rate():
+    baseline = profile(_records({
+        'Connection reset by peer 10': 50,
+        'Cache miss for key 1': 20,
+        'Disk almost full 90': 40,
+        'Retrying job 7': 4,
+    }, hours=10))
+    current = profile(_records({
+        'Connection reset by peer 11': 60,   # 5/h -> 60/h
+        'Disk almost full 91': 4,            # same rate
+        'Retrying job 8': 1,                 # 2.5x the rate, but too few to be significant
+        'Out of memory in worker 3': 5,
+    }, hours=1))
+
+    diff = compare(baseline, current)
+
+    assert diff['by_rate']
+    assert _groups(diff, 'new') == {'Out of memory in worker 3'}
+    assert _groups(diff, 'increased') == {'Connection reset by peer 11'}
+    assert _groups(diff, 'disappeared') == {'Cache miss for key 1'}
+    assert diff['counts'] == {'new': 1, 'increased': 1, 'disappeared': 1}
+
+    increased = diff['increased'][0]
+    assert (increased['baseline_count'], increased['current_count']) == (50, 60)
+    assert increased['ratio'] == 12.0
+    assert increased['zscore'] >= 3
+    assert regressed(diff) == {diff['new'][0]['fingerprint'], increased['fingerprint']}
+
+
+def test_equal_counts_over_a_shorter_span_are_an_increase():
+    baseline = profile(_records({'Timeout calling billing 1': 30}, hours=12))
+    current = profile(_records({'Timeout calling billing 2': 30}, hours=1))
+
+    diff = compare(baseline, current)
+
+    assert _groups(diff, 'increased') == {'Timeout calling billing 2'}
+
+
+def test_raw_counts_without_timestamps():
+    baseline = profile({'message': 'Queue full 1'} for _ in range(10))
+    current = profile([{'message': 'Queue full 2'} for _ in range(40)] + [{'message': 'Queue drained'}])
+
+    diff = compare(baseline, current)
+
+    assert not diff['by_rate']
+    assert diff['baseline']['hours'] is None
+    assert _groups(diff, 'increased') == {'Queue full 2'}
+    assert _groups(diff, 'new') == {'Queue drained'}
+    assert diff['disappeared'] == []
@@ -0,0 +1,119 @@
+"""
+Format plugins: detection and the records each structured format yields.
+"""
+
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils.formats import detect_format, get_format, parse_timestamp, parse_yearless
+
+SYSLOG_STAMP = '%b %d %H:%M:%S'
+
+
+def _parse(fmt, lines):
+    return list(get_format(fmt).parse(lines))
+
+
+def test_jsonl_records():
+    lines = [
+        json.dumps({'time': '2024-12-14T10:00:00Z', 'level': 'info', 'msg': 'started'}),
+        json.dumps({'time': '2024-12-14T10:00:01Z', 'level': 'error', 'msg': 'db down',
+                    'stack': ['at db.connect', 'at main']}),
+        'not json, but mentions an error',
+        json.dumps({'ts': 1734170402, 'level': 50, 'msg': 'pino fatal path'}),
+        json.dumps({'@timestamp': '2024-12-14T10:00:03Z', 'log': {'level': 'warn'},
+                    'message': {'message': 'disk at 91%'}}),
+        json.dumps({'level': 'warning', 'event': 'slow query'}),
+    ]
+    assert detect_format(lines).name == 'jsonl'
+
+    records = _parse('jsonl', lines)
+
+    assert [(r['type'], r['line_number'], r['message']) for r in records] == [
+        ('ERROR', 2, 'db down'),
+        ('ERROR', 4, 'pino fatal path'),
+        ('WARNING', 5, 'disk at 91%'),
+        ('WARNING', 6, 'slow query'),
+    ]
+    assert records[0]['timestamp'] == '2024-12-14T10:00:01Z'
+    assert records[0]['stack_trace'] == 'at db.connect\nat main'
+    assert parse_timestamp(records[1]['timestamp']) == 1734170402
+    assert records[3]['timestamp'] == 'N/A'
+
+
+def test_logfmt_records():
+    lines = [
+        'ts=2024-12-14T10:00:00Z level=info msg="server started" port=8080',
+        'ts=2024-12-14T10:00:01Z level=error msg="query failed: \\"users\\" missing" '
+        'stack="at db.query\\nat handler"',
+        'time=2024-12-14T10:00:02Z lvl=warn message=retrying attempt=2',
+        'ts=2024-12-14T10:00:03Z level=debug msg="error budget fine"',
+    ]
+    assert detect_format(lines).name == 'logfmt'
+
+    records = _parse('logfmt', lines)
+
+    assert [(r['type'], r['line_number'], r['message']) for r in records] == [
+        ('ERROR', 2, 'query failed: "users" missing'),
+        ('WARNING', 3, 'retrying'),
+    ]
+    assert records[0]['stack_trace'] == 'at db.query\nat handler'
+    assert records[1]['timestamp'] == '2024-12-14T10:00:02Z'
+
+
+def test_syslog_records():
+    lines = [
+        '<11>1 2024-12-14T10:00:00Z web01 api 42 ID1 - connection pool exhausted',
+        '<12>1 2024-12-14T10:00:01Z web01 api 42 ID2 [meta key="v"] cache miss ratio high',
+        '<14>1 2024-12-14T10:00:02Z web01 api 42 ID3 - request served',
+        '<10>Dec 14 10:00:03 web01 sshd[901]: fatal: no host keys',
+        'Dec 14 10:00:04 web01 cron[77]: ERROR: job backup failed',
+        'Dec 14 10:00:05 web01 cron[77]: job rotate done',
+    ]
+    assert detect_format(lines).name == 'syslog'
+
+    records = _parse('syslog', lines)
+
+    assert [(r['type'], r['line_number'], r['message']) for r in records] == [
+        ('ERROR', 1, 'connection pool exhausted'),
+        ('WARNING', 2, 'cache miss ratio high'),
+        ('ERROR', 4, 'fatal: no host keys'),
+        # Without <PRI> the level comes from keywords in the message
+        ('ERROR', 5, 'job backup failed'),
+    ]
+    assert records[0]['timestamp'] == '2024-12-14T10:00:00Z'
+    assert records[2]['timestamp'] == 'Dec 14 10:00:03'
+
+
+@pytest.mark.parametrize('stamp, now, expected', [
+    # December lines read in January belong to the previous year
+    ('Dec 31 23:59:00', datetime(2025, 1, 2, 8), datetime(2024, 12, 31, 23, 59)),
+    ('Jan 02 07:00:00', datetime(2025, 1, 2, 8), datetime(2025, 1, 2, 7)),
+    # Up to a day ahead is clock skew, not last year
+    ('Jan 03 07:00:00', datetime(2025, 1, 2, 8), datetime(2025, 1, 3, 7)),
+    ('Jun 01 00:00:00', datetime(2025, 1, 2, 8), datetime(2024, 6, 1)),
+    # Feb 29 resolves to the latest leap year that is not in the future
+    ('Feb 29 12:00:00', datetime(2024, 3, 1), datetime(2024, 2, 29, 12)),
+    ('Feb 29 12:00:00', datetime(2025, 3, 1), datetime(2024, 2, 29, 12)),
+])
+def test_syslog_year_rollover(stamp, now, expected):
+    assert parse_yearless(stamp, SYSLOG_STAMP, now=now) == expected
+
+
+def test_yearless_timestamps_are_never_in_the_future():
+    ahead = datetime.now(timezone.utc) + timedelta(days=7)
+    if (ahead.month, ahead.day) == (2, 29):
+        # Last year had no Feb 29
+        ahead += timedelta(days=1)
+    epoch = parse_timestamp(ahead.strftime(SYSLOG_STAMP))
+
+    assert epoch < time.time()
+    assert epoch > time.time() - 366 * 86400
+
+
+def test_yearless_rejects_other_formats():
+    with pytest.raises(ValueError):
+        parse_yearless('2024-12-14 10:00:00', SYSLOG_STAMP)
@@ -0,0 +1,110 @@
+"""
+History store: cross-run rollups, filters, and run time vs log time.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils import history
+from utils.anomaly import fingerprint
+from utils.history import HistoryStore
+
+RUN_START = datetime(2025, 1, 10, tzinfo=timezone.utc).timestamp()
+DAY = 86400
+
+X = "Connection refused by db 1"
+Y = "Cache warmup slow 3"
+Z = "Queue depth 5 over limit"
+
+
+class Clock:
+    def __init__(self):
+        self.now = RUN_START
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(history.time, 'time', clock.time)
+    return clock
+
+
+def _records(log_day: int, counts):
+    """Records logged on December ``log_day`` 2024, well before the runs that store them"""
+    records = []
+    for message, severity, count in counts:
+        for i in range(count):
+            records.append({'type': 'ERROR' if severity == 'HIGH' else 'WARNING', 'severity': severity,
+                            'message': message, 'timestamp': f"2024-12-{log_day:02d} 10:00:{i:02d}"})
+    return records
+
+
+def _state(records, solutions=()):
+    return {'error_count': len(records), 'status': 'done', 'solutions': list(solutions)}
+
+
+@pytest.fixture
+def store(tmp_path, clock):
+    store = HistoryStore(str(tmp_path / 'history.db'), retention_days=0)
+    first = _records(1, [(X, 'HIGH', 3), (Y, 'MEDIUM', 1)])
+    store.record_run(_state(first, [{'fingerprint': fingerprint(X), 'root_cause': 'db down'}]), first, ['a.log'])
+    clock.now += 5 * DAY
+    second = _records(2, [(X, 'HIGH', 2), (Z, 'MEDIUM', 4)])
+    store.record_run(_state(second), second, ['b.log'])
+    return store
+
+
+def test_top_fingerprints_across_runs(store):
+    top = store.top_fingerprints()
+    assert [(row['fingerprint'], row['runs'], row['occurrences']) for row in top] == [
+        (fingerprint(X), 2, 5), (fingerprint(Z), 1, 4), (fingerprint(Y), 1, 1),
+    ]
+    assert top[0]['severity'] == 'HIGH'
+    assert top[0]['first_seen'] == datetime(2024, 12, 1, 10, tzinfo=timezone.utc).timestamp()
+
+    assert [row['fingerprint'] for row in store.top_fingerprints(severity=['HIGH'])] == [fingerprint(X)]
+    assert len(store.top_fingerprints(limit=2)) == 2
+
+
+def test_top_fingerprints_filter_by_run_time_not_log_time(store):
+    # Every record was logged in December, but the second run started after this cut-off
+    recent = store.top_fingerprints(since=RUN_START + DAY)
+    assert [(row['fingerprint'], row['occurrences']) for row in recent] == [(fingerprint(Z), 4), (fingerprint(X), 2)]
+    assert store.top_fingerprints(since=RUN_START + 6 * DAY) == []
+
+
+def test_errors_filters(store):
+    december_2 = datetime(2024, 12, 2, tzinfo=timezone.utc).timestamp()
+
+    newest = store.errors(limit=3)
+    assert [row['ts'] for row in newest] == sorted((row['ts'] for row in newest), reverse=True)
+    assert newest[0]['message'] == Z
+
+    assert {row['message'] for row in store.errors(severity=['HIGH'])} == {X}
+    assert len(store.errors(fingerprint=fingerprint(X))) == 5
+    # Log time and run time select different records
+    assert len(store.errors(since=december_2)) == 6
+    assert len(store.errors(until=december_2)) == 4
+    assert {row['message'] for row in store.errors(run_since=RUN_START + DAY)} == {X, Z}
+    assert len(store.errors(fingerprint=fingerprint(X), run_since=RUN_START + DAY)) == 2
+
+
+def test_history_and_solutions_by_fingerprint(store):
+    seen = store.fingerprint_history(fingerprint(X))
+    assert (seen['runs'], seen['occurrences']) == (2, 5)
+    assert store.fingerprint_history("never seen") is None
+
+    solutions = store.solutions(fingerprint(X))
+    assert [s['solution']['root_cause'] for s in solutions] == ['db down']
+
+
+def test_old_runs_are_pruned(store, clock):
+    clock.now = RUN_START + 31 * DAY
+    assert store.prune(retention_days=30) == 1
+    assert [row['sources'] for row in store.runs()] == ['["b.log"]']
+    assert store.fingerprint_history(fingerprint(Y)) is None
+    assert len(store.errors()) == 6
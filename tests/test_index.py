@@ -0,0 +1,95 @@
+"""
+The sidecar index must return exactly what a linear scan returns.
+"""
+
+import json
+import tarfile
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from utils.formats import available_formats, parse_yearless
+from utils.index import LogIndex, filter_records
+from utils.parsers import LogParser
+
+LINES = 3500
+START = datetime(2024, 12, 14, tzinfo=timezone.utc)
+
+
+def _line(fmt: str, i: int, clock: datetime) -> str:
+    level = 'ERROR' if i % 7 == 0 else 'WARNING' if i % 11 == 0 else 'INFO'
+    message = f"request {i % 13} failed" if level == 'ERROR' else f"request {i % 13} done"
+    if fmt == 'text':
+        line = f"{clock:%Y-%m-%d %H:%M:%S} {level}: {message}"
+        if i % 21 == 0:
+            line += "\n    at com.example.Service.call(Service.java:42)\n    at com.example.Main.run(Main.java:7)"
+        return line
+    if fmt == 'jsonl':
+        # Epoch seconds, which text timestamp extraction does not recognize
+        return json.dumps({'ts': clock.timestamp(), 'level': level.lower(), 'msg': message})
+    if fmt == 'logfmt':
+        return f"ts={clock:%Y-%m-%dT%H:%M:%SZ} level={level.lower()} msg=\"{message}\""
+    if fmt == 'syslog':
+        pri = {'ERROR': 11, 'WARNING': 12, 'INFO': 14}[level]
+        return f"<{pri}>{clock:%b %d %H:%M:%S} host app[42]: {message}"
+    raise AssertionError(f"no sample lines for format {fmt}")
+
+
+def _write(path, fmt: str):
+    clock = START
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(LINES):
+            clock += timedelta(seconds=1 + i % 3)
+            f.write(_line(fmt, i, clock) + '\n')
+
+
+def _stamp(offset: timedelta) -> str:
+    # Syslog stamps carry no year; read them the way the parser does
+    moment = parse_yearless((START + offset).strftime('%b %d %H:%M:%S'), '%b %d %H:%M:%S')
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+@pytest.mark.parametrize('fmt', available_formats())
+@pytest.mark.parametrize('window', [(1000, None), (None, 3000), (2500, 4500), (6000, 6100)])
+def test_indexed_query_matches_linear_scan(tmp_path, fmt, window):
+    path = tmp_path / f'app.{fmt}.log'
+    _write(path, fmt)
+    if fmt == 'syslog':
+        since, until = [None if s is None else _stamp(timedelta(seconds=s)) for s in window]
+    else:
+        since, until = [None if s is None else (START + timedelta(seconds=s)).strftime('%Y-%m-%d %H:%M:%S')
+                        for s in window]
+
+    linear = list(filter_records(LogParser.iter_file(str(path), fmt=fmt), *LogParser._window(since, until)))
+    indexed = list(LogParser.iter_file(str(path), fmt=fmt, since=since, until=until))
+
+    assert LogIndex.load_or_build(str(path), fmt=fmt) is not None
+    assert linear
+    assert indexed == linear
+
+
+def test_records_crossing_block_boundaries_stay_whole(tmp_path):
+    path = tmp_path / 'app.log'
+    _write(path, 'text')
+    # Blocks of 5 lines split most three-line stack traces
+    index = LogIndex.build(str(path), every=5, fmt='text')
+
+    linear = list(filter_records(LogParser.iter_file(str(path), fmt='text'), levels=['ERROR']))
+    indexed = list(index.query(levels=['ERROR']))
+
+    assert any('stack_trace' in record for record in linear)
+    assert indexed == linear
+
+
+def test_tar_bundles_are_not_indexed(tmp_path):
+    log = tmp_path / 'app.log'
+    _write(log, 'text')
+    bundle = tmp_path / 'logs.tar'
+    with tarfile.open(bundle, 'w') as tar:
+        tar.add(log, arcname='app.log')
+
+    assert LogIndex.load_or_build(str(bundle)) is None
+    records = list(LogParser.iter_file(str(bundle), levels=['ERROR']))
+    assert records
+    assert all(record['source'] == f'{bundle}:app.log' for record in records)
+    assert records[0]['message'] == 'request 0 failed'
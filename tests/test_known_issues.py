@@ -0,0 +1,36 @@
+"""
+Known-issue store: exact and approximate lookup, forgetting, persistence.
+"""
+
+from agent.known_issues import KnownIssueStore
+
+MESSAGE = "Connection to database db-primary timed out after 30 seconds"
+SOLUTION = {'analysis': 'Raise the pool timeout', 'fix': 'db.timeout = 60'}
+
+
+def test_lookup_matches_exact_and_similar_fingerprints(tmp_path):
+    store = KnownIssueStore(str(tmp_path / 'known.json'))
+    key = store.add(MESSAGE, SOLUTION)
+
+    exact = store.lookup("Connection to database db-primary timed out after 45 seconds")
+    assert exact['match'] == 'exact'
+    assert exact['fingerprint'] == key
+    assert exact['solution'] == SOLUTION
+
+    similar = store.lookup("Connection to database db-primary timed out after 30 seconds!")
+    assert similar['match'] == 'similar'
+    assert similar['fingerprint'] == key
+
+    assert store.lookup("Disk quota exceeded on /var/log") is None
+
+
+def test_remove_forgets_the_issue_on_disk(tmp_path):
+    path = str(tmp_path / 'known.json')
+    store = KnownIssueStore(path)
+    key = store.add(MESSAGE, SOLUTION)
+
+    assert store.remove(key)
+    assert not store.remove(key)
+    assert store.lookup(MESSAGE) is None
+    assert store.lookup(MESSAGE + '!') is None
+    assert KnownIssueStore(path).issues == {}
@@ -0,0 +1,92 @@
+"""
+.gitignore handling in the repository walk: negation, directory rules, anchoring.
+"""
+
+from collections import Counter
+
+import pytest
+
+from utils.repo_scan import GitIgnore, walk
+
+
+@pytest.mark.parametrize('lines, path, is_dir, expected', [
+    # Unanchored patterns match at any depth
+    (['*.log'], 'app.log', False, True),
+    (['*.log'], 'a/b/app.log', False, True),
+    (['*.log'], 'app.py', False, None),
+    # A trailing slash only matches directories
+    (['build/'], 'build', True, True),
+    (['build/'], 'build', False, None),
+    (['build/'], 'src/build', True, True),
+    # A leading or middle slash anchors the pattern to the .gitignore's directory
+    (['/config.py'], 'config.py', False, True),
+    (['/config.py'], 'sub/config.py', False, None),
+    (['docs/*.py'], 'docs/conf.py', False, True),
+    (['docs/*.py'], 'site/docs/conf.py', False, None),
+    (['docs/*.py'], 'docs/api/conf.py', False, None),
+    # ** spans directories
+    (['**/tmp'], 'tmp', True, True),
+    (['**/tmp'], 'a/b/tmp', True, True),
+    (['a/**/b.py'], 'a/b.py', False, True),
+    (['a/**/b.py'], 'a/x/y/b.py', False, True),
+    (['logs/**'], 'logs/x/y.py', False, True),
+    # The last matching rule wins, so a negation re-includes only after the rule it overrides
+    (['*.py', '!keep.py'], 'keep.py', False, False),
+    (['*.py', '!keep.py'], 'drop.py', False, True),
+    (['!keep.py', '*.py'], 'keep.py', False, True),
+    # Escapes, comments and character classes
+    (['\\!important.py'], '!important.py', False, True),
+    (['# comment.py'], '# comment.py', False, None),
+    (['\\#hash.py'], '#hash.py', False, True),
+    (['[!a]bc.py'], 'xbc.py', False, True),
+    (['[!a]bc.py'], 'abc.py', False, None),
+    (['file?.py'], 'file1.py', False, True),
+    (['file?.py'], 'file/1.py', False, None),
+])
+def test_pattern_rules(lines, path, is_dir, expected):
+    assert GitIgnore('', lines).match(path, is_dir) is expected
+
+
+def test_nested_gitignore_applies_below_its_directory():
+    nested = GitIgnore('pkg', ['*.tmp.py', '/local.py'])
+    assert nested.match('pkg/a.tmp.py', False) is True
+    assert nested.match('pkg/sub/a.tmp.py', False) is True
+    assert nested.match('other/a.tmp.py', False) is None
+    assert nested.match('pkg/local.py', False) is True
+    assert nested.match('pkg/sub/local.py', False) is None
+
+
+def _tree(root, files):
+    for rel_path, content in files.items():
+        path = root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+def test_walk_prunes_and_reincludes(tmp_path):
+    _tree(tmp_path, {
+        '.gitignore': 'generated/\n*.secret.py\n!keep.secret.py\nlogs/\n!logs/keep.py\n',
+        'app.py': '',
+        'keep.secret.py': '',
+        'drop.secret.py': '',
+        'generated/models.py': '',
+        # A file cannot be re-included once its directory is ignored
+        'logs/keep.py': '',
+        'node_modules/lib/index.js': '',
+        'lib.min.js': '',
+        'README.md': '',
+        'pkg/.gitignore': '*.py\n!main.py\n',
+        'pkg/main.py': '',
+        'pkg/util.py': '',
+        'pkg/sub/deep.py': '',
+        'pkg/sub/view.js': '',
+    })
+    stats = Counter()
+
+    files = [path for path, _ in walk(str(tmp_path), stats=stats)]
+
+    assert files == ['app.py', 'keep.secret.py', 'pkg/main.py', 'pkg/sub/view.js']
+    assert stats['skipped_ignored'] == 3
+    assert stats['skipped_ignored_dirs'] == 2
+    assert stats['skipped_vendor_dirs'] == 1
+    assert stats['skipped_generated'] == 1
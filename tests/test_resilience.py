@@ -0,0 +1,142 @@
+"""
+Deadlines, retry backoff and circuit breakers, driven by a fake clock.
+"""
+
+import pytest
+
+from agent import resilience
+from agent.resilience import CircuitBreaker, Deadline, Unavailable, call_with_policy
+
+
+class FakeClock:
+    """Stands in for time.monotonic/time.sleep; sleeping advances the clock"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 6))
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(resilience.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(resilience.time, 'sleep', clock.sleep)
+    # Longest possible backoff, so the schedule is deterministic
+    monkeypatch.setattr(resilience.random, 'uniform', lambda low, high: high)
+    return clock
+
+
+@pytest.fixture
+def breakers(monkeypatch):
+    """Fresh process-wide breakers for each test"""
+    monkeypatch.setattr(resilience, '_breakers', {})
+    return resilience._breakers
+
+
+def _failing(calls):
+    def func():
+        calls.append(1)
+        raise ConnectionError("refused")
+    return func
+
+
+def test_deadline_expires(clock):
+    deadline = Deadline(10)
+    assert deadline.remaining() == 10
+    clock.now += 4
+    assert deadline.remaining() == 6
+    assert not deadline.expired
+    clock.now += 7
+    assert deadline.remaining() == 0
+    assert deadline.expired
+
+
+def test_expired_deadline_skips_the_call(clock, breakers):
+    deadline = Deadline(5)
+    clock.now += 5
+    calls = []
+
+    with pytest.raises(Unavailable) as excinfo:
+        call_with_policy('wikipedia', _failing(calls), deadline)
+
+    assert excinfo.value.reason == 'deadline exceeded'
+    assert calls == []
+
+
+def test_retries_back_off_exponentially_up_to_the_cap(clock, breakers):
+    breakers['tavily'] = CircuitBreaker('tavily', threshold=100)
+    calls = []
+
+    with pytest.raises(Unavailable) as excinfo:
+        call_with_policy('tavily', _failing(calls), Deadline(60), retries=5)
+
+    assert len(calls) == 6
+    assert clock.sleeps == [0.2, 0.4, 0.8, 1.6, 2.0]
+    assert excinfo.value.reason == 'error: refused'
+
+
+def test_backoff_is_capped_by_the_deadline(clock, breakers):
+    breakers['tavily'] = CircuitBreaker('tavily', threshold=100)
+    calls = []
+
+    with pytest.raises(Unavailable) as excinfo:
+        call_with_policy('tavily', _failing(calls), Deadline(0.3), retries=5)
+
+    # Slept 0.2, then only the 0.1 s left; the third attempt finds the budget spent
+    assert clock.sleeps == [0.2, 0.1]
+    assert len(calls) == 2
+    assert excinfo.value.reason == 'error: refused'
+
+
+def test_breaker_opens_half_opens_and_closes(clock):
+    breaker = CircuitBreaker('github', threshold=2, cooldown=30)
+    assert breaker.state == 'closed'
+
+    breaker.record_failure()
+    assert breaker.state == 'closed' and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    assert not breaker.allow()
+
+    clock.now += 30
+    assert breaker.state == 'half_open'
+    # Only one trial call goes out while half-open
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    # A failed trial re-opens for a full cool-down
+    breaker.record_failure()
+    assert breaker.state == 'open'
+    clock.now += 29
+    assert breaker.state == 'open'
+    clock.now += 1
+    assert breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == 'closed'
+    assert breaker.failures == 0
+    assert breaker.allow() and breaker.allow()
+
+
+def test_open_breaker_fails_fast_until_a_trial_succeeds(clock, breakers):
+    calls = []
+    with pytest.raises(Unavailable):
+        call_with_policy('wikipedia', _failing(calls), Deadline(60), retries=5)
+    # Threshold reached after three attempts; the fourth is refused without a call
+    assert len(calls) == resilience.BREAKER_THRESHOLD
+
+    with pytest.raises(Unavailable) as excinfo:
+        call_with_policy('wikipedia', _failing(calls), Deadline(60))
+    assert excinfo.value.reason == 'circuit open'
+    assert len(calls) == resilience.BREAKER_THRESHOLD
+
+    clock.now += resilience.BREAKER_COOLDOWN
+    assert call_with_policy('wikipedia', lambda: 'summary', Deadline(60)) == 'summary'
+    assert breakers['wikipedia'].state == 'closed'
@@ -0,0 +1,88 @@
+"""
+Sampling mode: per-stratum reservoir bounds and estimate coverage.
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from utils.parsers import LogParser
+from utils.sampling import BLOCK_SIZE, StratifiedReservoir, sample_files
+
+START = datetime(2024, 12, 14, tzinfo=timezone.utc)
+
+
+def _record(level: str, moment, i: int) -> dict:
+    return {'type': level, 'message': f"event {i}",
+            'timestamp': moment.strftime('%Y-%m-%d %H:%M:%S') if moment else 'N/A'}
+
+
+def test_reservoir_keeps_at_most_per_stratum_and_every_rare_record():
+    reservoir = StratifiedReservoir(per_stratum=20, window=3600, seed=3)
+    records = (
+        # A noisy hour of errors, a quiet hour with a few warnings, and untimed records
+        [_record('ERROR', START + timedelta(seconds=i), i) for i in range(1000)]
+        + [_record('WARNING', START + timedelta(hours=1, seconds=i), i) for i in range(5)]
+        + [_record('ERROR', START + timedelta(hours=1, seconds=i), i) for i in range(30)]
+        + [_record('WARNING', None, i) for i in range(7)]
+    )
+    for record in records:
+        reservoir.add(record)
+
+    hour = int(START.timestamp() // 3600)
+    assert reservoir.seen == {('ERROR', hour): 1000, ('WARNING', hour + 1): 5,
+                              ('ERROR', hour + 1): 30, ('WARNING', None): 7}
+    kept = {key: len(records) for key, records in reservoir.kept.items()}
+    assert kept == {('ERROR', hour): 20, ('WARNING', hour + 1): 5, ('ERROR', hour + 1): 20, ('WARNING', None): 7}
+
+    sample = reservoir.records()
+    assert len(sample) == 52
+    assert all(r['timestamp'] == 'N/A' for r in sample[-7:])
+    assert [r['timestamp'] for r in sample[:-7]] == sorted(r['timestamp'] for r in sample[:-7])
+
+
+def _write_log(path, lines: int):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(lines):
+            moment = START + timedelta(seconds=i)
+            if i % 10 == 0:
+                f.write(f"{moment:%Y-%m-%d %H:%M:%S} ERROR: request {i % 7} failed with code {i}\n")
+            elif i % 25 == 1:
+                f.write(f"{moment:%Y-%m-%d %H:%M:%S} WARNING: slow response {i % 3}\n")
+            else:
+                f.write(f"{moment:%Y-%m-%d %H:%M:%S} INFO: handled request {i} in 12 ms for user {i % 97}\n")
+
+
+def test_small_files_are_counted_exactly(tmp_path):
+    path = tmp_path / 'small.log'
+    _write_log(path, 2000)
+
+    records, summary = sample_files([str(path)], per_stratum=10, seed=1)
+
+    assert summary['exact']
+    assert summary['total'] == {'estimate': 280, 'low': 280, 'high': 280}
+    assert summary['levels']['ERROR']['estimate'] == 200
+    assert summary['levels']['WARNING']['estimate'] == 80
+    # One stratum per (level, hour)
+    per_stratum = Counter((r['type'], r['timestamp'][:13]) for r in records)
+    assert max(per_stratum.values()) <= 10
+    assert len(records) == summary['sampled_records'] == 10 * summary['strata']
+
+
+def test_block_estimates_cover_the_true_counts(tmp_path):
+    path = tmp_path / 'large.log'
+    _write_log(path, 160000)
+    assert path.stat().st_size > 8 * BLOCK_SIZE
+    truth = Counter(r['type'] for r in LogParser.iter_file(str(path)))
+
+    records, summary = sample_files([str(path)], blocks=4, per_stratum=50, seed=1)
+
+    assert not summary['exact']
+    assert summary['files'][0]['mode'] == 'blocks'
+    assert summary['fraction'] < 0.6
+    total = summary['total']
+    assert total['low'] <= sum(truth.values()) <= total['high']
+    for level, count in truth.items():
+        bounds = summary['levels'][level]
+        assert bounds['low'] <= count <= bounds['high']
+    assert all(r['line_number'] is None and r['byte_offset'] >= 0 for r in records)
+    assert max(Counter((r['type'], r['timestamp'][:13]) for r in records).values()) <= 50
@@ -0,0 +1,61 @@
+"""
+Parallel parsing of multi-frame zstd logs must match a sequential parse.
+"""
+
+import pytest
+
+zstandard = pytest.importorskip('zstandard')
+
+import utils.formats
+import utils.parsers
+from benchmarks.loggen import LogGenerator
+from utils.parsers import LogParser
+
+
+def _write_frames(path, data: bytes, frame_bytes: int):
+    """One zstd frame per ``frame_bytes`` of log, cut wherever that lands (mid-line, mid-trace)"""
+    compressor = zstandard.ZstdCompressor()
+    with open(path, 'wb') as f:
+        for start in range(0, len(data), frame_bytes):
+            f.write(compressor.compress(data[start:start + frame_bytes]))
+
+
+@pytest.fixture
+def log_bytes():
+    generator = LogGenerator(size_bytes=400_000, error_rate=0.08, stack_trace_rate=0.8, java_ratio=0.5, seed=7)
+    return generator.text().encode('utf-8')
+
+
+@pytest.mark.parametrize('frame_bytes', [997, 4096, 65536])
+@pytest.mark.parametrize('context_lines', [0, 3])
+def test_parallel_segments_match_sequential(tmp_path, monkeypatch, log_bytes, frame_bytes, context_lines):
+    monkeypatch.setattr(utils.formats, 'DEFAULT_CONTEXT_LINES', context_lines)
+    monkeypatch.setattr(utils.parsers, 'DEFAULT_CONTEXT_LINES', context_lines)
+    # Several frames per worker batch, and many batches
+    monkeypatch.setattr(utils.parsers, 'SEGMENT_BATCH_BYTES', frame_bytes * 3)
+    path = tmp_path / 'app.log.zst'
+    _write_frames(path, log_bytes, frame_bytes)
+
+    sequential = LogParser.parse_file(str(path))
+    assert any('stack_trace' in record for record in sequential)
+
+    # The stitched result must not come from the one-pass fallback
+    def no_fallback(*args, **kwargs):
+        raise AssertionError("parallel parse fell back to a sequential pass")
+    monkeypatch.setattr(LogParser, 'iter_file', staticmethod(no_fallback))
+    parallel = LogParser.parse_file(str(path), workers=4)
+
+    assert parallel == sequential
+
+
+def test_parallel_sketch_matches_sequential(tmp_path, monkeypatch, log_bytes):
+    monkeypatch.setattr(utils.parsers, 'SEGMENT_BATCH_BYTES', 4096 * 3)
+    path = tmp_path / 'app.log.zst'
+    _write_frames(path, log_bytes, 4096)
+
+    sequential = LogParser.sketch_files([str(path)])
+    parallel = LogParser.sketch_files([str(path)], workers=4)
+
+    assert parallel.totals == sequential.totals
+    counts = lambda sketch: {entry['fingerprint']: entry['count'] for entry in sketch.top()}
+    assert counts(parallel) == counts(sequential)
@@ -0,0 +1,117 @@
+"""
+Sketch error bounds, checked against exact counts of the same stream.
+"""
+
+import math
+import random
+from collections import Counter
+
+from utils.sketches import CountMinSketch, ErrorSketch, HyperLogLog, SpaceSaving
+
+N = 20000
+DISTINCT = 2000
+
+
+def _stream(seed: int = 7):
+    """Zipf-like stream: a few heavy keys and a long tail"""
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(DISTINCT)]
+    return [f"key-{i}" for i in rng.choices(range(DISTINCT), weights=weights, k=N)]
+
+
+def test_count_min_never_undercounts_and_stays_within_bound():
+    width, depth = 512, 4
+    stream = _stream()
+    exact = Counter(stream)
+    sketch = CountMinSketch(width, depth)
+    for key in stream:
+        sketch.add(key)
+
+    # Error <= e/width * N with probability 1 - exp(-depth) per key
+    bound = math.e / width * N
+    errors = [sketch.estimate(key) - count for key, count in exact.items()]
+    assert min(errors) >= 0
+    assert sum(error <= bound for error in errors) / len(errors) >= 1 - math.exp(-depth) - 0.01
+    assert sketch.estimate('never-seen') <= bound
+
+
+def test_count_min_merge_equals_one_sketch():
+    stream = _stream()
+    whole, left, right = CountMinSketch(256, 3), CountMinSketch(256, 3), CountMinSketch(256, 3)
+    for i, key in enumerate(stream):
+        whole.add(key)
+        (left if i % 2 else right).add(key)
+
+    assert (left.merge(right).table == whole.table).all()
+
+
+def _check_space_saving(summary: SpaceSaving, exact: Counter, k: int):
+    for key, count, error, _ in summary.top():
+        assert count - error <= exact[key] <= count
+    # Every key above N/k is guaranteed a counter
+    heavy = {key for key, count in exact.items() if count > sum(exact.values()) / k}
+    assert heavy
+    assert heavy <= set(summary.counters)
+
+
+def test_space_saving_bounds_true_counts():
+    k = 50
+    stream = _stream()
+    summary = SpaceSaving(k)
+    for key in stream:
+        summary.add(key, payload={'message': key})
+
+    _check_space_saving(summary, Counter(stream), k)
+    top_key, top_count, _, payload = summary.top(1)[0]
+    assert top_key == Counter(stream).most_common(1)[0][0]
+    assert payload == {'message': top_key}
+
+
+def test_space_saving_merge_keeps_bounds():
+    k = 50
+    first, second = _stream(1), _stream(2)
+    left, right = SpaceSaving(k), SpaceSaving(k)
+    for key in first:
+        left.add(key)
+    for key in second:
+        right.add(key)
+
+    _check_space_saving(left.merge(right), Counter(first) + Counter(second), k)
+
+
+def test_hyperloglog_relative_error():
+    precision = 12
+    tolerance = 3 * 1.04 / math.sqrt(1 << precision)
+    for distinct in (100, 5000, 50000):
+        sketch = HyperLogLog(precision)
+        for i in range(distinct):
+            sketch.add(f"message {i}")
+        assert abs(sketch.count() - distinct) <= tolerance * distinct
+
+
+def test_hyperloglog_merge_counts_the_union():
+    precision = 12
+    left, right = HyperLogLog(precision), HyperLogLog(precision)
+    for i in range(30000):
+        left.add(f"message {i}")
+    for i in range(20000, 50000):
+        right.add(f"message {i}")
+
+    tolerance = 3 * 1.04 / math.sqrt(1 << precision)
+    assert abs(left.merge(right).count() - 50000) <= tolerance * 50000
+
+
+def test_error_sketch_counts_by_fingerprint():
+    records = [{'type': 'ERROR' if i % 3 else 'WARNING', 'message': f"request {i} failed on shard {i % 4}"}
+               for i in range(3000)]
+    records += [{'type': 'ERROR', 'message': 'disk full'} for _ in range(200)]
+
+    sketch = ErrorSketch(k=10).update(records)
+
+    assert sketch.total == len(records)
+    assert sketch.totals == {'ERROR': 2200, 'WARNING': 1000}
+    summary = sketch.summary(2)
+    assert summary['distinct_fingerprints'] == 2
+    assert [entry['count'] for entry in summary['top']] == [3000, 200]
+    assert sketch.estimate('request 99 failed on shard 1') >= 3000
+    assert sketch.estimate('disk full') >= 200
@@ -2,6 +2,7 @@
 Utilities package for log-analysis-agent.
 """
 
+from .formats import LogFormat, register_format
 from .parsers import LogParser
 
-__all__ = ["LogParser"]
+__all__ = ["LogParser", "LogFormat", "register_format"]
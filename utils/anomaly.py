@@ -0,0 +1,327 @@
+"""
+Error-rate anomaly detection used to decide which errors get enriched.
+
+Records are grouped by a message fingerprint (numbers, ids and quoted values
+masked), binned into time buckets and scored with NumPy:
+
+- z-score of each bucket against the fingerprint's own mean/std
+- EWMA deviation of each bucket against the smoothed history before it
+
+Fingerprints whose peak crosses either threshold are flagged as bursts. The
+ranked list weighs severity, volume and burstiness so a sudden spike of a
+rare error outranks a steady trickle of noise.
+"""
+
+import itertools
+import math
+import re
+from collections import defaultdict
+from functools import lru_cache
+from operator import itemgetter
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from utils.formats import parse_timestamp
+
+DEFAULT_BUCKET_SECONDS = 60
+DEFAULT_Z_THRESHOLD = 3.0
+DEFAULT_EWMA_ALPHA = 0.3
+# A one-off error is not a burst, however quiet its history
+MIN_BURST_COUNT = 3
+# Upper bound on buckets per fingerprint and on the size of the count matrix
+MAX_BUCKETS = 4096
+MAX_CELLS = 20_000_000
+
+# Records factorized per batch in prioritize()
+CHUNK_RECORDS = 65536
+
+_message = itemgetter('message')
+_MISSING = object()
+
+SEVERITY_WEIGHTS = {'HIGH': 3.0, 'MEDIUM': 1.5, 'LOW': 1.0}
+
+# Order matters: UUIDs and hex ids before plain numbers
+_MASKS = [(re.compile(p), token) for p, token in [
+    (r'[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}', '<uuid>'),
+    (r'0x[0-9a-fA-F]+|\b[0-9a-fA-F]{12,}\b', '<hex>'),
+    (r'"[^"]*"|\'[^\']*\'', '<str>'),
+    (r'\d+(?:\.\d+)?', '<n>'),
+]]
+# Placeholders a fingerprint can contain (agent/queries.py drops them from search queries)
+MASK_TOKENS = tuple(token for _, token in _MASKS)
+
+
+@lru_cache(maxsize=65536)
+def fingerprint(message: str) -> str:
+    """Collapse a message to its template by masking variable parts"""
+    for pattern, token in _MASKS:
+        message = pattern.sub(token, message)
+    return ' '.join(message.split())[:200]
+
+
+def _ewma_scores(counts: np.ndarray, alpha: float) -> np.ndarray:
+    """Peak deviation of each row from its exponentially weighted history"""
+    rows, buckets = counts.shape
+    mean = counts[:, 0].copy()
+    var = np.zeros(rows)
+    peak = np.zeros(rows)
+    for t in range(1, buckets):
+        x = counts[:, t]
+        diff = x - mean
+        peak = np.maximum(peak, diff / np.sqrt(var + 1.0))
+        mean += alpha * diff
+        var = (1 - alpha) * (var + alpha * diff * diff)
+    return peak
+
+
+def detect_anomalies(codes: np.ndarray, epochs: np.ndarray, n_fingerprints: int,
+                     bucket_seconds: float = DEFAULT_BUCKET_SECONDS,
+                     alpha: float = DEFAULT_EWMA_ALPHA) -> Dict[str, np.ndarray]:
+    """Score fingerprint codes against time
+
+    ``codes`` are integer fingerprint ids (0..n_fingerprints-1) and ``epochs``
+    the matching timestamps (NaN where unknown). Returns per-fingerprint arrays:
+    count, peak (max events in a bucket), peak_bucket, zscore, ewma and the
+    bucket_seconds actually used.
+    """
+    epochs = np.asarray(epochs, dtype=np.float64)
+    known = ~np.isnan(epochs)
+    if known.any():
+        # Records without a timestamp inherit the previous one (or the first known)
+        idx = np.where(known, np.arange(len(epochs)), np.argmax(known))
+        np.maximum.accumulate(idx, out=idx)
+        epochs = epochs[idx]
+        start = epochs.min()
+        span = epochs.max() - start
+    else:
+        epochs = np.zeros(len(epochs))
+        start = span = 0.0
+
+    limit = max(1, min(MAX_BUCKETS, MAX_CELLS // max(n_fingerprints, 1)))
+    n_buckets = int(span // bucket_seconds) + 1
+    if n_buckets > limit:
+        bucket_seconds = span / (limit - 1) if limit > 1 else max(span, 1.0)
+        n_buckets = int(span // bucket_seconds) + 1 if limit > 1 else 1
+    buckets = np.minimum(((epochs - start) // bucket_seconds).astype(np.int64), n_buckets - 1)
+
+    counts = np.bincount(codes * n_buckets + buckets, minlength=n_fingerprints * n_buckets)
+    counts = counts.reshape(n_fingerprints, n_buckets).astype(np.float64)
+
+    total = counts.sum(axis=1)
+    peak = counts.max(axis=1)
+    if n_buckets > 1:
+        mean = counts.mean(axis=1)
+        std = counts.std(axis=1)
+        zscore = np.where(std > 0, (peak - mean) / np.where(std > 0, std, 1.0), 0.0)
+        ewma = _ewma_scores(counts, alpha)
+    else:
+        zscore = np.zeros(n_fingerprints)
+        ewma = np.zeros(n_fingerprints)
+
+    return {
+        'count': total,
+        'peak': peak,
+        'peak_bucket': counts.argmax(axis=1),
+        'zscore': zscore,
+        'ewma': ewma,
+        'bucket_seconds': bucket_seconds,
+        'start': start,
+    }
+
+
+def prioritize(records: Iterable[Dict], bucket_seconds: float = DEFAULT_BUCKET_SECONDS,
+               z_threshold: float = DEFAULT_Z_THRESHOLD, alpha: float = DEFAULT_EWMA_ALPHA,
+               top: Optional[int] = None) -> List[Dict]:
+    """Rank error fingerprints by severity, volume and burstiness
+
+    ``records`` may be any iterable (e.g. a stream from the blob store); only
+    one sample record per fingerprint is kept. Each entry holds the
+    fingerprint, a representative ``error`` record (its first occurrence),
+    counts, the burst scores and the peak bucket's start.
+    """
+    # Factorize raw messages chunk by chunk with C-level calls only: the
+    # defaultdict hands each new message the next code, so codes follow first
+    # appearance. Fingerprints and timestamp parsing then run once per
+    # distinct message or in bulk.
+    message_ids = defaultdict(itertools.count().__next__)
+    first_records = []
+    code_chunks = []
+    timestamps = []
+    records = iter(records)
+    while True:
+        chunk = list(itertools.islice(records, CHUNK_RECORDS))
+        if not chunk:
+            break
+        seen = len(message_ids)
+        chunk_codes = np.fromiter(map(message_ids.__getitem__, map(_message, chunk)), dtype=np.int64,
+                                  count=len(chunk))
+        timestamps.extend(map(dict.get, chunk, itertools.repeat('timestamp')))
+        if len(message_ids) > seen:
+            # New messages first appear where the running maximum code rises
+            rises = np.diff(np.maximum.accumulate(chunk_codes), prepend=seen - 1) > 0
+            first_records.extend(chunk[i] for i in np.flatnonzero(rises).tolist())
+        code_chunks.append(chunk_codes)
+    if not code_chunks:
+        return []
+
+    # Each sample is its fingerprint's first occurrence
+    ids = {}
+    samples = []
+    fingerprint_of = np.empty(len(message_ids), dtype=np.int64)
+    for code, message in enumerate(message_ids):
+        key = fingerprint(message)
+        fp_code = ids.get(key)
+        if fp_code is None:
+            fp_code = ids[key] = len(ids)
+            samples.append(first_records[code])
+        fingerprint_of[code] = fp_code
+
+    codes = fingerprint_of[np.concatenate(code_chunks)]
+    epochs = to_epochs(timestamps)
+    stats = detect_anomalies(codes, epochs, len(ids), bucket_seconds=bucket_seconds, alpha=alpha)
+
+    weights = np.fromiter((SEVERITY_WEIGHTS.get(sample.get('severity'), 1.0) for sample in samples),
+                          dtype=np.float64, count=len(samples))
+    burst = np.where(stats['peak'] >= MIN_BURST_COUNT, np.maximum(stats['zscore'], stats['ewma']), 0.0)
+    scores = weights * (1.0 + np.log1p(stats['count'])) * (1.0 + np.clip(burst, 0, None) / z_threshold)
+
+    order = np.argsort(-scores, kind='stable')
+    if top is not None:
+        order = order[:top]
+
+    fingerprints = list(ids)
+    timed = not np.isnan(epochs).all()
+    priorities = []
+    for rank, code in enumerate(order.tolist(), 1):
+        peak_start = stats['start'] + stats['peak_bucket'][code] * stats['bucket_seconds']
+        priorities.append({
+            'rank': rank,
+            'fingerprint': fingerprints[code],
+            'error': samples[code],
+            'count': int(stats['count'][code]),
+            'peak_count': int(stats['peak'][code]),
+            'peak_start': float(peak_start) if timed else None,
+            'zscore': round(float(stats['zscore'][code]), 2),
+            'ewma_score': round(float(stats['ewma'][code]), 2),
+            'burst': bool(burst[code] >= z_threshold),
+            'score': round(float(scores[code]), 3),
+        })
+    return priorities
+
+
+def to_epochs(timestamps: List) -> np.ndarray:
+    """Epoch seconds for a column of timestamp strings (NaN where unknown)
+
+    Same results as ``parse_timestamp`` per value, but ISO timestamps (the
+    common case) are converted by NumPy in bulk and every other distinct
+    value is parsed once, sharing the parse of its minute.
+    """
+    epochs = np.full(len(timestamps), np.nan)
+    if not timestamps:
+        return epochs
+    chars = _byte_matrix(timestamps)
+    iso = np.zeros(len(timestamps), dtype=bool)
+    if chars is not None and chars.shape[1] >= 19:
+        iso, seconds = _naive_iso(chars)
+        epochs[iso] = seconds
+
+    cache = {}
+    minutes = {}
+    for i in np.flatnonzero(~iso).tolist():
+        value = timestamps[i]
+        epoch = cache.get(value, _MISSING)
+        if epoch is _MISSING:
+            epoch = cache[value] = _parse_epoch(value, minutes)
+        epochs[i] = epoch
+    return epochs
+
+
+def _byte_matrix(timestamps: List) -> Optional[np.ndarray]:
+    """One row of ASCII bytes per timestamp (NUL padded), or None"""
+    try:
+        widths = set(map(len, timestamps))
+    except TypeError:
+        widths = set()
+    try:
+        if len(widths) == 1:
+            # Equal widths (the usual case) need no padding: one join and a reshape
+            data = ''.join(timestamps).encode('ascii')
+            return np.frombuffer(data, dtype=np.uint8).reshape(len(timestamps), widths.pop())
+        raw = np.array(timestamps, dtype='S')
+    except (TypeError, UnicodeEncodeError, ValueError):
+        return None
+    return raw.view(np.uint8).reshape(len(raw), raw.dtype.itemsize)
+
+
+def _naive_iso(chars: np.ndarray):
+    """(mask, epoch seconds) for rows of a byte matrix holding a valid
+    ``YYYY-MM-DD[ T]HH:MM:SS[(.|,)fff]`` read as UTC
+
+    Computed arithmetically: NumPy's own string-to-datetime cast crashes on
+    invalid dates in 1.26. Anything with a zone suffix is left to the
+    per-value parser.
+    """
+    # One contiguous array per character position; digits become 0-9
+    columns = np.ascontiguousarray(chars.T) - np.uint8(ord('0'))
+    digit = columns <= 9
+    iso = digit[[0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18]].all(axis=0)
+    for position, separator in ((4, '-'), (7, '-'), (13, ':'), (16, ':')):
+        iso &= chars[:, position] == ord(separator)
+    iso &= (chars[:, 10] == ord(' ')) | (chars[:, 10] == ord('T'))
+    if len(columns) > 20:
+        # Shorter values are NUL padded; a fraction needs at least one digit
+        separator = chars[:, 19]
+        iso &= (separator == 0) | (((separator == ord('.')) | (separator == ord(','))) & digit[20])
+        iso &= (digit[20:] | (chars[:, 20:].T == 0)).all(axis=0)
+    elif len(columns) == 20:
+        iso &= chars[:, 19] == 0
+    if not iso.all():
+        columns = columns[:, iso]
+
+    def pair(tens, units):
+        return columns[tens] * np.uint8(10) + columns[units]
+
+    year = pair(0, 1).astype(np.int64) * 100 + pair(2, 3)
+    month, day, hour, minute, second = pair(5, 6), pair(8, 9), pair(11, 12), pair(14, 15), pair(17, 18)
+    # Days since the epoch at the start of each month in range (one more for month lengths)
+    months = (year - 1970) * 12 + month - 1
+    low = int(months.min()) if len(months) else 0
+    starts = np.arange(low, int(months.max()) + 2 if len(months) else 1).astype('datetime64[M]')
+    starts = starts.astype('datetime64[D]').astype(np.int64)
+    first_day = starts[months - low]
+    month_days = starts[months - low + 1] - first_day
+    valid = ((month >= 1) & (month <= 12) & (day >= 1) & (day <= month_days)
+             & (hour < 24) & (minute < 60) & (second < 60))
+    seconds = (first_day + day - 1) * 86400 + hour.astype(np.int64) * 3600 + minute.astype(np.int64) * 60
+    seconds = (seconds + second).astype(np.float64)
+    if len(columns) > 20:
+        # NUL padding reads as trailing zeros
+        fraction = np.zeros(columns.shape[1], dtype=np.int64)
+        for position in range(20, len(columns)):
+            fraction = fraction * 10 + np.where(columns[position] <= 9, columns[position], 0)
+        seconds += fraction / 10.0 ** (len(columns) - 20)
+
+    iso[np.flatnonzero(iso)[~valid]] = False
+    return iso, seconds[valid]
+
+
+# "<anything ending in HH:MM>:SS[.fff]" without a zone suffix
+_SECONDS = re.compile(r'^(.*\d\d:\d\d):(\d\d(?:[.,]\d+)?)$')
+
+
+def _parse_epoch(value, minutes: Dict) -> float:
+    """parse_timestamp for one value, reusing the parse of its minute"""
+    if not value:
+        return math.nan
+    text = str(value)
+    match = _SECONDS.match(text.strip())
+    if match and not match.group(1).replace('.', '').isdigit():
+        minute = match.group(1)
+        start = minutes.get(minute, _MISSING)
+        if start is _MISSING:
+            start = minutes[minute] = parse_timestamp(f"{minute}:00")
+        if start is not None:
+            return start + float(match.group(2).replace(',', '.'))
+    epoch = parse_timestamp(text)
+    return math.nan if epoch is None else epoch
@@ -0,0 +1,161 @@
+"""
+Content-addressed blob store for raw logs and large derived data.
+
+Workflow state carries short handles (``sha256:<hex>``) instead of the data
+itself, so copying state between nodes, threads or Streamlit reruns costs
+nothing however large the input is. Blobs are immutable files named by the
+SHA-256 of their content. Storing the same content twice returns the same
+handle and keeps one copy.
+
+Records (lists of dicts such as parsed errors) are stored as JSON lines and
+read back as a stream.
+
+Blobs are shared by every run that stores the same content, so they are not
+deleted per analysis. Instead, blobs not written or read for
+LOG_AGENT_BLOB_MAX_AGE_HOURS (default 24, 0 keeps them forever) are swept
+when the store is opened and whenever a new analysis starts.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Union
+
+try:
+    import orjson
+
+    def dumps_record(record: Dict) -> bytes:
+        """Serialize one record to JSON bytes (no trailing newline)"""
+        return orjson.dumps(record, default=str)
+
+    _loads = orjson.loads
+except ImportError:
+    def dumps_record(record: Dict) -> bytes:
+        """Serialize one record to JSON bytes (no trailing newline)"""
+        return json.dumps(record, default=str).encode('utf-8')
+
+    _loads = json.loads
+
+HANDLE_PREFIX = "sha256:"
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_AGE_HOURS = float(os.getenv("LOG_AGENT_BLOB_MAX_AGE_HOURS", "24"))
+
+
+def is_handle(value) -> bool:
+    return isinstance(value, str) and value.startswith(HANDLE_PREFIX)
+
+
+class BlobStore:
+    """Immutable blobs on disk, addressed by the SHA-256 of their content"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.getenv("LOG_AGENT_BLOB_DIR") or os.path.join(tempfile.gettempdir(), "log_agent_blobs")
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, handle: str) -> str:
+        """Filesystem path of a blob (for streaming readers such as LogParser.parse_file)"""
+        if not is_handle(handle):
+            raise ValueError(f"Not a blob handle: {handle!r}")
+        digest = handle[len(HANDLE_PREFIX):]
+        return os.path.join(self.root, digest[:2], digest)
+
+    def exists(self, handle: str) -> bool:
+        return os.path.exists(self.path(handle))
+
+    def _write(self, chunks: Iterable[bytes]) -> str:
+        """Stream chunks to a temp file while hashing, then move it into place"""
+        digest = hashlib.sha256()
+        fd, tmp = tempfile.mkstemp(dir=self.root, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    f.write(chunk)
+            handle = HANDLE_PREFIX + digest.hexdigest()
+            target = self.path(handle)
+            if os.path.exists(target):
+                os.remove(tmp)
+                self._touch(target)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(tmp, target)
+            return handle
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def put_text(self, text: str) -> str:
+        return self._write([text.encode('utf-8')])
+
+    def put_file(self, source: Union[str, os.PathLike, BinaryIO]) -> str:
+        """Copy a path or binary file object (e.g. a Streamlit upload) into the store"""
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as f:
+                return self._write(iter(lambda: f.read(CHUNK_SIZE), b''))
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return self._write(iter(lambda: source.read(CHUNK_SIZE), b''))
+
+    def put_records(self, records: Iterable[Dict]) -> str:
+        """Store records as JSON lines; the iterable is consumed as a stream"""
+        return self._write(dumps_record(record) + b'\n' for record in records)
+
+    def iter_records(self, handle: Optional[str]) -> Iterator[Dict]:
+        """Stream records back one at a time (nothing for a missing handle)"""
+        if not handle:
+            return
+        path = self.path(handle)
+        self._touch(path)
+        with open(path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield _loads(line)
+
+    def load_records(self, handle: Optional[str]) -> List[Dict]:
+        return list(self.iter_records(handle))
+
+    @staticmethod
+    def _touch(path: str):
+        """Mark a blob as recently used so the age sweep keeps it"""
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def sweep(self, max_age_hours: float = DEFAULT_MAX_AGE_HOURS) -> int:
+        """Delete blobs (and abandoned temp files) unused for ``max_age_hours``; returns how many"""
+        if max_age_hours <= 0:
+            return 0
+        cutoff = time.time() - max_age_hours * 3600
+        removed = 0
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = os.path.join(directory, name)
+                try:
+                    if os.stat(path).st_mtime < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    # Swept concurrently by another process
+                    pass
+        return removed
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """Process-wide blob store (LOG_AGENT_BLOB_DIR, default <tmp>/log_agent_blobs), swept once on open"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store = BlobStore()
+                store.sweep()
+                _store = store
+    return _store
@@ -0,0 +1,140 @@
+"""
+Baseline-vs-current comparison of error groups (diff mode).
+
+Each log is reduced to per-fingerprint counts (see utils/anomaly.py) plus the
+span of log time it covers. Counts become rates per hour of log time, or
+stay raw counts when either side has no timestamps. Groups are classified
+as:
+
+    new          absent from the baseline
+    increased    rate up by at least ``min_ratio`` and significant: the
+                 current count is ``z_threshold`` standard deviations above
+                 what equal rates would give (binomial split of the
+                 combined count by exposure)
+    disappeared  absent from the current log
+
+Configure from the environment:
+    LOG_AGENT_DIFF_MIN_RATIO=2.0    minimum rate increase for a regression
+    LOG_AGENT_DIFF_Z=3.0            minimum significance for a regression
+"""
+
+import math
+import os
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from utils.anomaly import fingerprint
+from utils.formats import parse_timestamp
+
+DEFAULT_MIN_RATIO = float(os.getenv("LOG_AGENT_DIFF_MIN_RATIO", "2.0"))
+DEFAULT_Z_THRESHOLD = float(os.getenv("LOG_AGENT_DIFF_Z", "3.0"))
+
+# Entries kept per category in the workflow state
+MAX_ENTRIES = 100
+
+
+def profile(records: Iterable[Dict]) -> Dict:
+    """Per-fingerprint counts, one sample record each, and the covered log-time span"""
+    counts = Counter()
+    samples = {}
+    first = last = None
+    for record in records:
+        key = fingerprint(record.get('message', ''))
+        counts[key] += 1
+        if key not in samples:
+            samples[key] = record
+        epoch = parse_timestamp(record.get('timestamp') or '')
+        if epoch is not None:
+            first = epoch if first is None else min(first, epoch)
+            last = epoch if last is None else max(last, epoch)
+    return {'counts': dict(counts), 'samples': samples, 'total': sum(counts.values()), 'first': first, 'last': last}
+
+
+def profile_file(path: str, fmt: Optional[str] = None, filters: Optional[Dict] = None) -> Dict:
+    """Worker: stream one log file into a profile (runs in a separate process)"""
+    from utils.parsers import LogParser
+    return profile(LogParser.iter_file(path, fmt=fmt, **(filters or {})))
+
+
+def merge_profiles(profiles: List[Dict]) -> Dict:
+    counts = Counter()
+    samples = {}
+    for p in profiles:
+        counts.update(p['counts'])
+        for key, record in p['samples'].items():
+            samples.setdefault(key, record)
+    firsts = [p['first'] for p in profiles if p['first'] is not None]
+    lasts = [p['last'] for p in profiles if p['last'] is not None]
+    return {'counts': dict(counts), 'samples': samples, 'total': sum(counts.values()),
+            'first': min(firsts) if firsts else None, 'last': max(lasts) if lasts else None}
+
+
+def _hours(p: Dict) -> Optional[float]:
+    if p['first'] is None:
+        return None
+    # At least one minute so a burst at a single timestamp does not explode the rate
+    return max(p['last'] - p['first'], 60.0) / 3600
+
+
+def compare(baseline: Dict, current: Dict, min_ratio: float = DEFAULT_MIN_RATIO,
+            z_threshold: float = DEFAULT_Z_THRESHOLD) -> Dict:
+    """Classify error groups as new, increased or disappeared
+
+    Returns {'baseline': {...}, 'current': {...}, 'by_rate', 'new', 'increased',
+    'disappeared', 'counts'}. Each list entry has fingerprint, message,
+    baseline/current counts and rates, ratio and zscore.
+    """
+    hours_base, hours_cur = _hours(baseline), _hours(current)
+    by_rate = hours_base is not None and hours_cur is not None
+    # Exposure of each side: hours of log time, or equal weight when comparing raw counts
+    exposure_base, exposure_cur = (hours_base, hours_cur) if by_rate else (1.0, 1.0)
+    share = exposure_cur / (exposure_base + exposure_cur)
+
+    new, increased, disappeared = [], [], []
+    for key in set(baseline['counts']) | set(current['counts']):
+        c0 = baseline['counts'].get(key, 0)
+        c1 = current['counts'].get(key, 0)
+        rate0, rate1 = c0 / exposure_base, c1 / exposure_cur
+        n = c0 + c1
+        zscore = (c1 - n * share) / math.sqrt(n * share * (1 - share))
+        sample = current['samples'].get(key) or baseline['samples'].get(key) or {}
+        entry = {
+            'fingerprint': key,
+            'message': sample.get('message', key),
+            'severity': sample.get('severity'),
+            'baseline_count': c0,
+            'current_count': c1,
+            'baseline_rate': round(rate0, 3),
+            'current_rate': round(rate1, 3),
+            'ratio': round(rate1 / rate0, 2) if rate0 else None,
+            'zscore': round(zscore, 2),
+        }
+        if c0 == 0:
+            new.append(entry)
+        elif c1 == 0:
+            disappeared.append(entry)
+        elif rate1 >= min_ratio * rate0 and zscore >= z_threshold:
+            increased.append(entry)
+
+    new.sort(key=lambda e: -e['current_count'])
+    increased.sort(key=lambda e: (-e['zscore'], -e['current_count']))
+    disappeared.sort(key=lambda e: -e['baseline_count'])
+
+    def side(p, hours):
+        return {'total': p['total'], 'fingerprints': len(p['counts']),
+                'hours': None if hours is None else round(hours, 2)}
+
+    return {
+        'baseline': side(baseline, hours_base),
+        'current': side(current, hours_cur),
+        'by_rate': by_rate,
+        'new': new[:MAX_ENTRIES],
+        'increased': increased[:MAX_ENTRIES],
+        'disappeared': disappeared[:MAX_ENTRIES],
+        'counts': {'new': len(new), 'increased': len(increased), 'disappeared': len(disappeared)},
+    }
+
+
+def regressed(diff: Dict) -> set:
+    """Fingerprints that are new or significantly increased"""
+    return {e['fingerprint'] for e in diff['new']} | {e['fingerprint'] for e in diff['increased']}
@@ -0,0 +1,225 @@
+"""
+Streaming exports of analysis results for downstream analytics.
+
+NDJSON: one JSON object per line, tagged with ``kind``:
+    run       exported_at, error_count, status, github_repo, report
+    error     one parsed error record (streamed from the blob store)
+    cluster   one prioritized fingerprint (see utils/anomaly.py)
+    solution  one generated or reused solution
+
+Columnar: Parquet or Arrow IPC files with typed columns (timestamps as
+UTC ``timestamp[ms]``, severity and level as dictionary columns), one table
+per kind: ``<stem>.errors.*``, ``<stem>.clusters.*`` and
+``<stem>.solutions.*``. Errors are written in record batches, so memory stays
+flat however many records the run produced. Requires the optional
+``pyarrow`` package.
+
+Nothing is built until an export is asked for.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from utils.blobs import dumps_record, get_blob_store
+from utils.formats import parse_timestamp
+
+COLUMNAR_FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+EXPORT_FORMATS = ['ndjson'] + list(COLUMNAR_FORMATS)
+BATCH_ROWS = 65536
+
+
+def _solution_record(solution) -> Dict:
+    if isinstance(solution, dict):
+        return solution
+    return {'solution': str(solution)}
+
+
+def iter_ndjson(state: Dict, blobs=None) -> Iterator[bytes]:
+    """Yield the analysis as NDJSON lines (bytes, newline-terminated)"""
+    blobs = blobs or get_blob_store()
+    yield dumps_record({
+        'kind': 'run',
+        'exported_at': datetime.now(timezone.utc).isoformat(),
+        'error_count': state.get('error_count', 0),
+        'status': state.get('status'),
+        'github_repo': state.get('github_repo'),
+        'report': state.get('final_report', ''),
+    }) + b'\n'
+    for record in blobs.iter_records(state.get('parsed_errors_ref')):
+        yield dumps_record({'kind': 'error', **record}) + b'\n'
+    for cluster in state.get('priorities') or []:
+        yield dumps_record({'kind': 'cluster', **cluster}) + b'\n'
+    for solution in state.get('solutions') or []:
+        yield dumps_record({'kind': 'solution', **_solution_record(solution)}) + b'\n'
+
+
+def write_ndjson(state: Dict, path: str, blobs=None) -> str:
+    with open(path, 'wb') as f:
+        f.writelines(iter_ndjson(state, blobs))
+    return path
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        import pyarrow.ipc
+        return pyarrow
+    except ImportError as e:
+        raise ImportError(f"Parquet/Arrow exports require the 'pyarrow' package (pip install pyarrow): {e}") from e
+
+
+def _epoch_ms(value) -> Optional[int]:
+    if value is None:
+        return None
+    epoch = value if isinstance(value, (int, float)) else parse_timestamp(str(value))
+    return None if epoch is None else int(epoch * 1000)
+
+
+def _schemas(pa) -> Dict:
+    category = pa.dictionary(pa.int8(), pa.string())
+    timestamp = pa.timestamp('ms', tz='UTC')
+    return {
+        'errors': pa.schema([
+            ('timestamp', timestamp),
+            ('severity', category),
+            ('level', category),
+            ('source', pa.string()),
+            ('line_number', pa.int64()),
+            ('fingerprint', pa.string()),
+            ('message', pa.string()),
+            ('stack_trace', pa.string()),
+            ('full_line', pa.string()),
+        ]),
+        'clusters': pa.schema([
+            ('rank', pa.int32()),
+            ('fingerprint', pa.string()),
+            ('message', pa.string()),
+            ('severity', category),
+            ('count', pa.int64()),
+            ('peak_count', pa.int64()),
+            ('peak_start', timestamp),
+            ('zscore', pa.float64()),
+            ('ewma_score', pa.float64()),
+            ('burst', pa.bool_()),
+            ('score', pa.float64()),
+        ]),
+        'solutions': pa.schema([
+            ('fingerprint', pa.string()),
+            ('error', pa.string()),
+            ('root_cause', pa.string()),
+            ('steps', pa.list_(pa.string())),
+            ('confidence', pa.float64()),
+            ('known_issue', pa.string()),
+            ('raw', pa.string()),
+        ]),
+    }
+
+
+def _error_rows(records: Iterable[Dict]) -> Iterator[Dict]:
+    from utils.anomaly import fingerprint
+    for record in records:
+        message = record.get('message', '')
+        yield {
+            'timestamp': _epoch_ms(record.get('timestamp')),
+            'severity': record.get('severity'),
+            'level': record.get('type'),
+            'source': record.get('source'),
+            'line_number': record.get('line_number'),
+            'fingerprint': fingerprint(message),
+            'message': message,
+            'stack_trace': record.get('stack_trace'),
+            'full_line': record.get('full_line'),
+        }
+
+
+def _cluster_rows(priorities: List[Dict]) -> Iterator[Dict]:
+    for cluster in priorities:
+        error = cluster.get('error') or {}
+        yield {
+            'rank': cluster.get('rank'),
+            'fingerprint': cluster.get('fingerprint'),
+            'message': error.get('message'),
+            'severity': error.get('severity'),
+            'count': cluster.get('count'),
+            'peak_count': cluster.get('peak_count'),
+            'peak_start': _epoch_ms(cluster.get('peak_start')),
+            'zscore': cluster.get('zscore'),
+            'ewma_score': cluster.get('ewma_score'),
+            'burst': cluster.get('burst'),
+            'score': cluster.get('score'),
+        }
+
+
+def _solution_rows(solutions: List) -> Iterator[Dict]:
+    for solution in map(_solution_record, solutions):
+        steps = solution.get('solution')
+        if steps is not None and not isinstance(steps, list):
+            steps = [steps]
+        try:
+            confidence = float(solution.get('confidence'))
+        except (TypeError, ValueError):
+            confidence = None
+        yield {
+            'fingerprint': solution.get('fingerprint'),
+            'error': None if solution.get('error') is None else str(solution.get('error')),
+            'root_cause': None if solution.get('root_cause') is None else str(solution.get('root_cause')),
+            'steps': None if steps is None else [str(step) for step in steps],
+            'confidence': confidence,
+            'known_issue': solution.get('known_issue'),
+            'raw': json.dumps(solution, default=str),
+        }
+
+
+def _batches(rows: Iterable[Dict], size: int = BATCH_ROWS) -> Iterator[List[Dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _write_table(pa, fmt: str, path: str, schema, rows: Iterable[Dict]):
+    """Write rows batch by batch; an empty input still produces a file with the schema"""
+    if fmt == 'parquet':
+        writer = pa.parquet.ParquetWriter(path, schema, compression='zstd')
+    else:
+        writer = pa.ipc.new_file(path, schema)
+    try:
+        for batch in _batches(rows):
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+    finally:
+        writer.close()
+
+
+def write_columnar(state: Dict, directory: str, stem: str, fmt: str = 'parquet', blobs=None) -> List[str]:
+    """Write errors, clusters and solutions as Parquet or Arrow files; returns their paths"""
+    if fmt not in COLUMNAR_FORMATS:
+        raise ValueError(f"Unknown columnar format {fmt!r}; expected one of {sorted(COLUMNAR_FORMATS)}")
+    pa = _pyarrow()
+    blobs = blobs or get_blob_store()
+    schemas = _schemas(pa)
+    tables = {
+        'errors': _error_rows(blobs.iter_records(state.get('parsed_errors_ref'))),
+        'clusters': _cluster_rows(state.get('priorities') or []),
+        'solutions': _solution_rows(state.get('solutions') or []),
+    }
+    paths = []
+    for name, rows in tables.items():
+        path = os.path.join(directory, f"{stem}.{name}{COLUMNAR_FORMATS[fmt]}")
+        _write_table(pa, fmt, path, schemas[name], rows)
+        paths.append(path)
+    return paths
+
+
+def export(state: Dict, fmt: str, directory: str, stem: str, blobs=None) -> List[str]:
+    """Export in one of EXPORT_FORMATS; returns the written paths"""
+    os.makedirs(directory, exist_ok=True)
+    if fmt == 'ndjson':
+        return [write_ndjson(state, os.path.join(directory, f"{stem}.ndjson"), blobs)]
+    return write_columnar(state, directory, stem, fmt, blobs)
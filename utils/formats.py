@@ -0,0 +1,536 @@
+"""
+Log format plugins used by LogParser.
+
+Each format can sniff a sample of lines and turn a stream of lines into the
+same error records:
+
+    {'type', 'line_number', 'message', 'full_line', 'timestamp', 'severity',
+     'stack_trace' (optional)}
+
+New formats are added with ``@register_format``.
+"""
+
+import json
+import os
+import re
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# Common error patterns
+ERROR_PATTERNS = [re.compile(p, re.IGNORECASE) for p in [
+    r'ERROR[:\s]+(.+)',
+    r'Exception[:\s]+(.+)',
+    r'CRITICAL[:\s]+(.+)',
+    r'FATAL[:\s]+(.+)',
+    r'Failed[:\s]+(.+)',
+]]
+
+WARNING_PATTERNS = [re.compile(p, re.IGNORECASE) for p in [
+    r'WARNING[:\s]+(.+)',
+    r'WARN[:\s]+(.+)',
+]]
+
+# Every pattern above needs one of these words; lines without them skip the regexes
+LEVEL_KEYWORDS = ('error', 'exception', 'critical', 'fatal', 'failed', 'warn')
+
+TIMESTAMP_PATTERNS = [re.compile(p) for p in [
+    r'\d{4}-\d{2}-\d{2}[\sT]\d{2}:\d{2}:\d{2}',
+    r'\d{2}/\d{2}/\d{4}\s+\d{2}:\d{2}:\d{2}',
+]]
+
+# Normalized level names -> (type, severity)
+LEVELS = {
+    'emerg': ('ERROR', 'HIGH'),
+    'emergency': ('ERROR', 'HIGH'),
+    'alert': ('ERROR', 'HIGH'),
+    'panic': ('ERROR', 'HIGH'),
+    'fatal': ('ERROR', 'HIGH'),
+    'crit': ('ERROR', 'HIGH'),
+    'critical': ('ERROR', 'HIGH'),
+    'err': ('ERROR', 'HIGH'),
+    'error': ('ERROR', 'HIGH'),
+    'warn': ('WARNING', 'MEDIUM'),
+    'warning': ('WARNING', 'MEDIUM'),
+}
+
+# Numeric levels used by pino/bunyan style JSON loggers
+NUMERIC_LEVELS = {60: 'fatal', 50: 'error', 40: 'warn'}
+
+# Multiline assembly
+MAX_TRACE_LINES = 200
+PYTHON_TRACEBACK = 'Traceback (most recent call last):'
+PYTHON_CHAINS = (
+    'During handling of the above exception',
+    'The above exception was the direct cause',
+)
+JAVA_CONTINUATION = re.compile(r'^(?:at |\.\.\. \d+ (?:more|common frames omitted)|Caused by:|Suppressed:)')
+EXCEPTION_HEADER = re.compile(r'^[\w$.]+(?:Exception|Error|Throwable)(?::\s.*)?$')
+GO_FRAME = re.compile(r'^(?:goroutine \d+ \[.*\]:|created by |\[signal |exit status \d+|[\w./*()\[\]-]+\(.*\)$)')
+
+# Lines of leading context attached to each record as 'context' (0 disables)
+DEFAULT_CONTEXT_LINES = int(os.getenv("LOG_AGENT_CONTEXT_LINES", "0"))
+
+
+def extract_timestamp(line: str) -> str:
+    """Extract timestamp from log line"""
+    for pattern in TIMESTAMP_PATTERNS:
+        match = pattern.search(line)
+        if match:
+            return match.group(0)
+    return "N/A"
+
+
+_FALLBACK_TIMESTAMP_FORMATS = [
+    '%m/%d/%Y %H:%M:%S',
+    '%d/%b/%Y:%H:%M:%S %z',
+    '%b %d %H:%M:%S',
+]
+
+# How far ahead of the clock a year-less stamp may be (skew, time zones) before it counts as last year's
+YEARLESS_SLACK = timedelta(days=1)
+
+
+def parse_yearless(value: str, fmt: str, now: Optional[datetime] = None) -> datetime:
+    """Parse a stamp that has no year, such as syslog's ``Dec 31 23:59:59``
+
+    The stamp gets the current year unless that puts it in the future, as for
+    December lines read in January; then it gets the previous year. ``now``
+    is naive UTC (default: the current time). Raises ValueError when the
+    value does not match ``fmt``.
+    """
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    parsed = None
+    for year in (now.year, now.year - 1):
+        try:
+            # The year goes in before parsing: Feb 29 does not exist in strptime's default year
+            parsed = datetime.strptime(f"{year} {value}", f"%Y {fmt}")
+        except ValueError:
+            continue
+        if parsed <= now + YEARLESS_SLACK:
+            break
+    if parsed is None:
+        raise ValueError(f"{value!r} does not match {fmt!r}")
+    return parsed
+
+
+@lru_cache(maxsize=4096)
+def parse_timestamp(value: str) -> Optional[float]:
+    """Normalize a timestamp string to UTC epoch seconds, or None
+
+    Naive timestamps are treated as UTC. Syslog stamps without a year get
+    the most recent year that does not put them in the future (see
+    ``parse_yearless``). Numeric values are read as epoch seconds (or
+    milliseconds when too large to be seconds).
+    """
+    if not value or value == "N/A":
+        return None
+    value = value.strip()
+
+    try:
+        number = float(value)
+        return number / 1000 if number > 1e11 else number
+    except ValueError:
+        pass
+
+    parsed = None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00').replace(',', '.'))
+    except ValueError:
+        value = ' '.join(value.split())
+        for fmt in _FALLBACK_TIMESTAMP_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt) if '%Y' in fmt else parse_yearless(value, fmt)
+            except ValueError:
+                continue
+            break
+    if parsed is None:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def make_record(level_type: str, severity: str, line_number: int, message: str,
+                full_line: str, timestamp: Optional[str]) -> Dict:
+    return {
+        'type': level_type,
+        'line_number': line_number,
+        'message': message.strip(),
+        'full_line': full_line.strip(),
+        'timestamp': timestamp or "N/A",
+        'severity': severity,
+    }
+
+
+class LogFormat:
+    """Base class for format plugins"""
+
+    name = "base"
+
+    def sniff(self, sample: List[str]) -> float:
+        """Return the fraction (0..1) of sample lines this format recognizes"""
+        raise NotImplementedError
+
+    def parse(self, lines: Iterable[str], context_lines: Optional[int] = None) -> Iterator[Dict]:
+        """Yield error records from an iterable of lines
+
+        ``context_lines`` preceding lines are attached to each record as
+        ``context`` (defaults to LOG_AGENT_CONTEXT_LINES).
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _ring(context_lines: Optional[int]) -> Optional[deque]:
+        context_lines = DEFAULT_CONTEXT_LINES if context_lines is None else context_lines
+        return deque(maxlen=context_lines) if context_lines else None
+
+    @staticmethod
+    def _track(lines: Iterable[str], ring: Optional[deque]) -> Iterator[str]:
+        """Pass lines through, remembering the last few in the ring buffer
+
+        While a line is being processed the ring holds only earlier lines.
+        """
+        if ring is None:
+            yield from lines
+            return
+        for line in lines:
+            yield line
+            ring.append(line.rstrip('\r\n'))
+
+
+_FORMATS: Dict[str, LogFormat] = {}
+
+
+def register_format(cls):
+    """Class decorator that registers a format plugin"""
+    _FORMATS[cls.name] = cls()
+    return cls
+
+
+def get_format(name: str) -> LogFormat:
+    try:
+        return _FORMATS[name]
+    except KeyError:
+        raise ValueError(f"Unknown log format: {name} (available: {', '.join(_FORMATS)})")
+
+
+def available_formats() -> List[str]:
+    return list(_FORMATS)
+
+
+def detect_format(sample: List[str], threshold: float = 0.6) -> LogFormat:
+    """Pick the structured format that best matches a sample, else plain text"""
+    sample = [line for line in sample if line.strip()]
+    if not sample:
+        return _FORMATS['text']
+
+    best, best_score = _FORMATS['text'], 0.0
+    for fmt in _FORMATS.values():
+        if fmt.name == 'text':
+            continue
+        score = fmt.sniff(sample)
+        if score > best_score:
+            best, best_score = fmt, score
+    return best if best_score >= threshold else _FORMATS['text']
+
+
+@register_format
+class PlainTextFormat(LogFormat):
+    """Free-form text logs matched with regex patterns
+
+    A single-pass multiline assembler: each error stays open while the
+    following lines continue its stack trace (Java ``at``/``Caused by:``
+    chains, full Python tracebacks including the exception line, Go panics
+    and goroutine dumps, or any indented line), then it is emitted.
+    """
+
+    name = "text"
+
+    def sniff(self, sample: List[str]) -> float:
+        return 1.0
+
+    @staticmethod
+    def _continues(line: str, stripped: str, block: Dict) -> bool:
+        """Decide whether a line belongs to the open record, updating block state"""
+        if not stripped:
+            # Chained tracebacks and goroutine dumps use single blank separators
+            block['blanks'] += 1
+            return block['blanks'] <= 1
+        block['blanks'] = 0
+
+        if stripped == PYTHON_TRACEBACK:
+            block['python'] = True
+            return True
+        if block['python']:
+            if line[0] in ' \t':
+                return True
+            # First unindented line ends the traceback: the exception itself
+            block['python'] = False
+            block['exception'] = stripped
+            return True
+        if stripped.startswith(PYTHON_CHAINS):
+            return True
+        if line[0] in ' \t' or JAVA_CONTINUATION.match(stripped):
+            return True
+        if not block['lines'] and EXCEPTION_HEADER.match(stripped):
+            # Exception class printed on the line after the log message
+            return True
+        if stripped.startswith('goroutine ') and GO_FRAME.match(stripped):
+            block['go'] = True
+            return True
+        return block['go'] and bool(GO_FRAME.match(stripped))
+
+    def parse(self, lines: Iterable[str], context_lines: Optional[int] = None) -> Iterator[Dict]:
+        ring = self._ring(context_lines)
+        record = None
+        block = None
+
+        def close():
+            if block['lines']:
+                record['stack_trace'] = '\n'.join(block['lines'])
+            if not record['message'] and block['exception']:
+                record['message'] = block['exception']
+            return record
+
+        for i, line in enumerate(lines):
+            line = line.rstrip('\r\n')
+            stripped = line.strip()
+
+            if record is not None:
+                if self._continues(line, stripped, block):
+                    if stripped and len(block['lines']) < MAX_TRACE_LINES:
+                        block['lines'].append(stripped)
+                    if ring is not None:
+                        ring.append(line)
+                    continue
+                yield close()
+                record = None
+
+            new_block = {'lines': [], 'blanks': 0, 'python': False, 'go': False, 'exception': None}
+            if stripped == PYTHON_TRACEBACK:
+                # Traceback printed without a preceding log line; message comes from its last line
+                record = make_record('ERROR', 'HIGH', i + 1, '', line, extract_timestamp(line))
+                new_block['python'] = True
+                new_block['lines'].append(stripped)
+            elif stripped.startswith('panic: '):
+                record = make_record('ERROR', 'HIGH', i + 1, stripped[len('panic: '):], line,
+                                     extract_timestamp(line))
+                new_block['go'] = True
+            elif any(keyword in line.lower() for keyword in LEVEL_KEYWORDS):
+                # Check for errors, then warnings
+                for level_type, severity, patterns in (('ERROR', 'HIGH', ERROR_PATTERNS),
+                                                       ('WARNING', 'MEDIUM', WARNING_PATTERNS)):
+                    for pattern in patterns:
+                        match = pattern.search(line)
+                        if match:
+                            record = make_record(level_type, severity, i + 1, match.group(1), line,
+                                                 extract_timestamp(line))
+                            break
+                    if record is not None:
+                        break
+
+            if record is not None:
+                block = new_block
+                if ring:
+                    record['context'] = '\n'.join(ring)
+            if ring is not None:
+                ring.append(line)
+
+        if record is not None:
+            yield close()
+
+
+@register_format
+class JsonLinesFormat(LogFormat):
+    """One JSON object per line (structlog, pino, bunyan, logstash, ...)"""
+
+    name = "jsonl"
+
+    LEVEL_KEYS = ('level', 'severity', 'lvl', 'levelname', 'log.level', 'loglevel')
+    MESSAGE_KEYS = ('message', 'msg', 'error', 'err', 'event', 'log')
+    TIMESTAMP_KEYS = ('timestamp', '@timestamp', 'time', 'ts', 'datetime', 'date')
+    STACK_KEYS = ('stack_trace', 'stack', 'exc_info', 'exception', 'traceback')
+
+    # Cheap substring tests so most info/debug lines are never decoded
+    _KEYWORDS = ('err', 'warn', 'crit', 'fatal', 'alert', 'emerg', 'panic')
+    _NUMERIC_LEVEL = re.compile(r'"level"\s*:\s*[456]\d')
+
+    def sniff(self, sample: List[str]) -> float:
+        hits = 0
+        for line in sample:
+            line = line.strip()
+            if line.startswith('{') and line.endswith('}'):
+                try:
+                    if isinstance(_json_loads(line), dict):
+                        hits += 1
+                except ValueError:
+                    pass
+        return hits / len(sample)
+
+    @staticmethod
+    def _get(obj: Dict, keys) -> Optional[object]:
+        for key in keys:
+            value = obj.get(key)
+            if value is None and '.' in key:
+                head, _, tail = key.partition('.')
+                nested = obj.get(head)
+                value = nested.get(tail) if isinstance(nested, dict) else None
+            if value not in (None, ''):
+                return value
+        return None
+
+    def parse(self, lines: Iterable[str], context_lines: Optional[int] = None) -> Iterator[Dict]:
+        ring = self._ring(context_lines)
+        for i, line in enumerate(self._track(lines, ring)):
+            lowered = line.lower()
+            if not any(keyword in lowered for keyword in self._KEYWORDS) \
+                    and not self._NUMERIC_LEVEL.search(line):
+                continue
+            try:
+                obj = _json_loads(line)
+            except ValueError:
+                continue
+            if not isinstance(obj, dict):
+                continue
+
+            level = self._get(obj, self.LEVEL_KEYS)
+            if isinstance(level, int):
+                level = NUMERIC_LEVELS.get(level // 10 * 10)
+            level_info = LEVELS.get(str(level).lower()) if level is not None else None
+            if not level_info:
+                continue
+
+            message = self._get(obj, self.MESSAGE_KEYS)
+            if isinstance(message, dict):
+                message = message.get('message') or json.dumps(message)
+            timestamp = self._get(obj, self.TIMESTAMP_KEYS)
+
+            record = make_record(level_info[0], level_info[1], i + 1, str(message or ''),
+                                 line, str(timestamp) if timestamp is not None else None)
+            stack = self._get(obj, self.STACK_KEYS)
+            if stack is None and isinstance(obj.get('error'), dict):
+                stack = obj['error'].get('stack')
+            if stack:
+                record['stack_trace'] = '\n'.join(stack) if isinstance(stack, list) else str(stack)
+            if ring:
+                record['context'] = '\n'.join(ring)
+            yield record
+
+
+@register_format
+class LogfmtFormat(LogFormat):
+    """key=value logs (Heroku, Go kit, logrus text formatter)"""
+
+    name = "logfmt"
+
+    _PAIR = re.compile(r'([\w.\-@]+)=("(?:[^"\\]|\\.)*"|\S*)')
+
+    def sniff(self, sample: List[str]) -> float:
+        hits = 0
+        for line in sample:
+            pairs = self._PAIR.findall(line)
+            if len(pairs) >= 2 and any(key in ('level', 'lvl', 'msg', 'ts', 'time') for key, _ in pairs):
+                hits += 1
+        return hits / len(sample)
+
+    def tokenize(self, line: str) -> Dict[str, str]:
+        fields = {}
+        for key, value in self._PAIR.findall(line):
+            if value.startswith('"'):
+                value = value[1:-1].replace('\\"', '"').replace('\\\\', '\\')
+            fields[key] = value
+        return fields
+
+    def parse(self, lines: Iterable[str], context_lines: Optional[int] = None) -> Iterator[Dict]:
+        ring = self._ring(context_lines)
+        for i, line in enumerate(self._track(lines, ring)):
+            # Only tokenize lines that carry a level field
+            if 'level=' not in line and 'lvl=' not in line:
+                continue
+            fields = self.tokenize(line)
+            level = fields.get('level') or fields.get('lvl') or ''
+            level_info = LEVELS.get(level.lower())
+            if not level_info:
+                continue
+
+            message = fields.get('msg') or fields.get('message') or fields.get('error') or fields.get('err') or ''
+            timestamp = fields.get('ts') or fields.get('time') or fields.get('timestamp')
+            record = make_record(level_info[0], level_info[1], i + 1, message, line, timestamp)
+            stack = fields.get('stack') or fields.get('stacktrace')
+            if stack:
+                record['stack_trace'] = stack.replace('\\n', '\n')
+            if ring:
+                record['context'] = '\n'.join(ring)
+            yield record
+
+
+@register_format
+class SyslogFormat(LogFormat):
+    """RFC 5424 and RFC 3164 (BSD) syslog lines"""
+
+    name = "syslog"
+
+    # <PRI>VERSION TIMESTAMP HOST APP PROCID MSGID [SD] MSG
+    _RFC5424 = re.compile(
+        r'^<(?P<pri>\d{1,3})>\d{1,2} (?P<ts>\S+) (?P<host>\S+) (?P<app>\S+) (?P<procid>\S+) (?P<msgid>\S+) '
+        r'(?P<sd>-|(?:\[(?:[^\]\\]|\\.)*\])+) ?(?P<msg>.*)$'
+    )
+    # [<PRI>]Mmm dd hh:mm:ss HOST TAG[PID]: MSG
+    _RFC3164 = re.compile(
+        r'^(?:<(?P<pri>\d{1,3})>)?(?P<ts>[A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2}) (?P<host>\S+) '
+        r'(?P<tag>[^:\[\s]+)(?:\[(?P<pid>\d+)\])?: ?(?P<msg>.*)$'
+    )
+
+    def _match(self, line: str):
+        line = line.rstrip('\r\n')
+        return self._RFC5424.match(line) or self._RFC3164.match(line)
+
+    def sniff(self, sample: List[str]) -> float:
+        return sum(1 for line in sample if self._match(line)) / len(sample)
+
+    def parse(self, lines: Iterable[str], context_lines: Optional[int] = None) -> Iterator[Dict]:
+        ring = self._ring(context_lines)
+        for i, line in enumerate(self._track(lines, ring)):
+            match = self._match(line)
+            if not match:
+                continue
+            message = match.group('msg')
+            pri = match.group('pri')
+
+            if pri is not None:
+                severity = int(pri) % 8
+                if severity <= 3:
+                    level_info = LEVELS['error']
+                elif severity == 4:
+                    level_info = LEVELS['warning']
+                else:
+                    continue
+            else:
+                # BSD files on disk usually drop <PRI>; fall back to keywords in the message
+                level_info = None
+                for pattern in ERROR_PATTERNS:
+                    found = pattern.search(message)
+                    if found:
+                        level_info, message = LEVELS['error'], found.group(1)
+                        break
+                if not level_info:
+                    for pattern in WARNING_PATTERNS:
+                        found = pattern.search(message)
+                        if found:
+                            level_info, message = LEVELS['warning'], found.group(1)
+                            break
+                if not level_info:
+                    continue
+
+            record = make_record(level_info[0], level_info[1], i + 1, message, line, match.group('ts'))
+            if ring:
+                record['context'] = '\n'.join(ring)
+            yield record
@@ -0,0 +1,263 @@
+"""
+Historical analysis store: every run's errors, fingerprints and solutions in SQLite.
+
+Answers "has this error happened before, and how often?" without re-parsing
+old logs. Each run appends one ``runs`` row, its parsed errors (bulk-inserted
+in one transaction), a per-fingerprint rollup and its solutions. Indexes
+cover lookups by fingerprint, time and severity. Runs older than the
+retention period are pruned after each insert.
+
+Configure from the environment:
+    LOG_AGENT_HISTORY_DB=history.db          database file
+    LOG_AGENT_HISTORY_RETENTION_DAYS=90      0 keeps everything
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from utils.formats import parse_timestamp
+
+DEFAULT_PATH = os.getenv("LOG_AGENT_HISTORY_DB", "history.db")
+DEFAULT_RETENTION_DAYS = float(os.getenv("LOG_AGENT_HISTORY_RETENTION_DAYS", "90"))
+INSERT_BATCH = 10000
+
+
+def _worst_severity(column: str) -> str:
+    """SQL for the highest severity in a group (text ordering would put MEDIUM above HIGH)"""
+    return (f"CASE MAX(CASE {column} WHEN 'HIGH' THEN 3 WHEN 'MEDIUM' THEN 2 WHEN 'LOW' THEN 1 ELSE 0 END) "
+            "WHEN 3 THEN 'HIGH' WHEN 2 THEN 'MEDIUM' WHEN 1 THEN 'LOW' END")
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    error_count INTEGER NOT NULL,
+    sources TEXT,
+    github_repo TEXT,
+    status TEXT
+);
+CREATE TABLE IF NOT EXISTS errors (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    ts REAL,
+    severity TEXT,
+    level TEXT,
+    source TEXT,
+    line_number INTEGER,
+    fingerprint TEXT NOT NULL,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_errors_fingerprint_ts ON errors(fingerprint, ts);
+CREATE INDEX IF NOT EXISTS idx_errors_ts ON errors(ts);
+CREATE INDEX IF NOT EXISTS idx_errors_severity_ts ON errors(severity, ts);
+CREATE INDEX IF NOT EXISTS idx_errors_run ON errors(run_id);
+CREATE TABLE IF NOT EXISTS run_fingerprints (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    fingerprint TEXT NOT NULL,
+    severity TEXT,
+    count INTEGER NOT NULL,
+    first_ts REAL,
+    last_ts REAL,
+    sample TEXT,
+    PRIMARY KEY (run_id, fingerprint)
+);
+CREATE INDEX IF NOT EXISTS idx_run_fingerprints_fingerprint ON run_fingerprints(fingerprint);
+CREATE TABLE IF NOT EXISTS solutions (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    fingerprint TEXT,
+    root_cause TEXT,
+    known_issue TEXT,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_solutions_fingerprint ON solutions(fingerprint);
+CREATE INDEX IF NOT EXISTS idx_solutions_run ON solutions(run_id);
+"""
+
+
+class HistoryStore:
+    """Append-only SQLite history of analysis runs"""
+
+    def __init__(self, path: str = DEFAULT_PATH, retention_days: float = DEFAULT_RETENTION_DAYS):
+        self.path = path
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection per call keeps the store usable from Streamlit's script threads
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _rows(self, sql: str, params: Iterable = ()) -> List[Dict]:
+        conn = self._connect()
+        try:
+            return [dict(row) for row in conn.execute(sql, tuple(params))]
+        finally:
+            conn.close()
+
+    def record_run(self, state: Dict, records: Iterable[Dict], sources: Optional[List[str]] = None) -> int:
+        """Append a finished run (final workflow state plus its parsed error records); returns the run id"""
+        from utils.anomaly import fingerprint
+
+        conn = self._connect()
+        try:
+            with self._lock, conn:
+                run_id = conn.execute(
+                    "INSERT INTO runs (started_at, error_count, sources, github_repo, status) VALUES (?, ?, ?, ?, ?)",
+                    (time.time(), state.get('error_count', 0), json.dumps(sources or []),
+                     state.get('github_repo'), state.get('status')),
+                ).lastrowid
+
+                batch = []
+                for record in records:
+                    message = record.get('message', '')
+                    batch.append((
+                        run_id, parse_timestamp(record.get('timestamp') or ''), record.get('severity'),
+                        record.get('type'), record.get('source'), record.get('line_number'),
+                        fingerprint(message), message,
+                    ))
+                    if len(batch) >= INSERT_BATCH:
+                        conn.executemany("INSERT INTO errors VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+                        batch = []
+                if batch:
+                    conn.executemany("INSERT INTO errors VALUES (?, ?, ?, ?, ?, ?, ?, ?)", batch)
+
+                summary = state.get('error_summary')
+                if summary:
+                    # Sketch mode keeps only sample records; counts come from the sketch
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO run_fingerprints VALUES (?, ?, ?, ?, NULL, NULL, ?)",
+                        [(run_id, entry['fingerprint'], entry['error'].get('severity'), entry['count'],
+                          entry['error'].get('message')) for entry in summary['top']],
+                    )
+                else:
+                    conn.execute(
+                        "INSERT INTO run_fingerprints "
+                        f"SELECT run_id, fingerprint, {_worst_severity('severity')}, COUNT(*), MIN(ts), MAX(ts), "
+                        "MIN(message) "
+                        "FROM errors WHERE run_id = ? GROUP BY fingerprint",
+                        (run_id,),
+                    )
+
+                conn.executemany(
+                    "INSERT INTO solutions VALUES (?, ?, ?, ?, ?)",
+                    [(run_id, s.get('fingerprint'), s.get('root_cause'), s.get('known_issue'), json.dumps(s, default=str))
+                     for s in state.get('solutions') or [] if isinstance(s, dict)],
+                )
+            self.prune(conn=conn)
+            return run_id
+        finally:
+            conn.close()
+
+    def prune(self, retention_days: Optional[float] = None, conn: Optional[sqlite3.Connection] = None) -> int:
+        """Delete runs older than the retention period; returns how many were removed"""
+        days = self.retention_days if retention_days is None else retention_days
+        if not days:
+            return 0
+        own = conn is None
+        conn = conn or self._connect()
+        try:
+            with self._lock, conn:
+                removed = conn.execute("DELETE FROM runs WHERE started_at < ?",
+                                       (time.time() - days * 86400,)).rowcount
+            return removed
+        finally:
+            if own:
+                conn.close()
+
+    def runs(self, limit: int = 20) -> List[Dict]:
+        return self._rows("SELECT * FROM runs ORDER BY started_at DESC LIMIT ?", (limit,))
+
+    def fingerprint_history(self, key: str) -> Optional[Dict]:
+        """How often and when a fingerprint was seen across runs, or None if never"""
+        rows = self._rows(
+            "SELECT COUNT(*) AS runs, SUM(f.count) AS occurrences, "
+            "MIN(COALESCE(f.first_ts, r.started_at)) AS first_seen, "
+            "MAX(COALESCE(f.last_ts, r.started_at)) AS last_seen, MAX(r.id) AS last_run "
+            "FROM run_fingerprints f JOIN runs r ON r.id = f.run_id WHERE f.fingerprint = ?",
+            (key,),
+        )
+        return rows[0] if rows and rows[0]['runs'] else None
+
+    def top_fingerprints(self, since: Optional[float] = None, severity: Optional[List[str]] = None,
+                         limit: int = 20) -> List[Dict]:
+        """Most frequent fingerprints across runs started at or after ``since``"""
+        where, params = ["r.started_at >= ?"], [since or 0]
+        if severity:
+            where.append(f"f.severity IN ({','.join('?' * len(severity))})")
+            params.extend(severity)
+        params.append(limit)
+        return self._rows(
+            f"SELECT f.fingerprint, {_worst_severity('f.severity')} AS severity, COUNT(*) AS runs, "
+            "SUM(f.count) AS occurrences, "
+            "MIN(COALESCE(f.first_ts, r.started_at)) AS first_seen, "
+            "MAX(COALESCE(f.last_ts, r.started_at)) AS last_seen, MIN(f.sample) AS sample "
+            f"FROM run_fingerprints f JOIN runs r ON r.id = f.run_id WHERE {' AND '.join(where)} "
+            "GROUP BY f.fingerprint ORDER BY occurrences DESC LIMIT ?",
+            params,
+        )
+
+    def errors(self, fingerprint: Optional[str] = None, since: Optional[float] = None,
+               until: Optional[float] = None, severity: Optional[List[str]] = None, limit: int = 100,
+               run_since: Optional[float] = None) -> List[Dict]:
+        """Stored error records, newest first, filtered by fingerprint, severity and time
+
+        ``since``/``until`` bound each record's log time; ``run_since`` keeps
+        records from runs started at or after it, like ``top_fingerprints``.
+        """
+        where, params = [], []
+        if fingerprint:
+            where.append("e.fingerprint = ?")
+            params.append(fingerprint)
+        if since is not None:
+            where.append("e.ts >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("e.ts <= ?")
+            params.append(until)
+        if run_since is not None:
+            where.append("r.started_at >= ?")
+            params.append(run_since)
+        if severity:
+            where.append(f"e.severity IN ({','.join('?' * len(severity))})")
+            params.extend(severity)
+        params.append(limit)
+        clause = f"WHERE {' AND '.join(where)} " if where else ""
+        return self._rows(f"SELECT e.* FROM errors e JOIN runs r ON r.id = e.run_id {clause}"
+                          "ORDER BY e.ts DESC LIMIT ?", params)
+
+    def solutions(self, fingerprint: str, limit: int = 5) -> List[Dict]:
+        """Solutions previously generated for a fingerprint, newest first"""
+        rows = self._rows(
+            "SELECT s.run_id, r.started_at, s.body FROM solutions s JOIN runs r ON r.id = s.run_id "
+            "WHERE s.fingerprint = ? ORDER BY r.started_at DESC LIMIT ?",
+            (fingerprint, limit),
+        )
+        return [{'run_id': row['run_id'], 'started_at': row['started_at'], 'solution': json.loads(row['body'])}
+                for row in rows]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_history() -> HistoryStore:
+    """Process-wide store at LOG_AGENT_HISTORY_DB"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = HistoryStore()
+    return _store
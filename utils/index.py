@@ -0,0 +1,245 @@
+"""
+Sparse time/offset index sidecar for seek-based time-window queries.
+
+Every ``every`` lines the index stores the line number, byte offset and the
+first timestamp in that block, plus per-block error/warning counts. A query
+binary-searches the checkpoints, mmaps the file and parses only the blocks
+that can contain matching records. The sidecar (``<log>.idx.json``) is
+rebuilt when the log's size, mtime or head/tail hash changes.
+
+Only plain uncompressed files can be indexed (compressed streams cannot seek
+and tar bundles interleave member headers with the log text).
+Timestamps are assumed to be roughly increasing through the file. A block's
+time comes from the first record the format plugin parses in it (falling
+back to the first recognizable timestamp in its lines); when a block with
+records has no time at all, queries scan every block instead of seeking.
+"""
+
+import bisect
+import hashlib
+import itertools
+import json
+import mmap
+import os
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from utils.formats import detect_format, extract_timestamp, get_format, parse_timestamp
+from utils.sources import detect_compression, is_tar
+
+INDEX_VERSION = 2
+DEFAULT_EVERY = 1000
+FINGERPRINT_BYTES = 64 * 1024
+
+
+def index_path(path: str) -> str:
+    return f"{path}.idx.json"
+
+
+def file_fingerprint(path: str) -> Dict:
+    """Cheap identity for a file: size, mtime and a hash of its head and tail"""
+    stat = os.stat(path)
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        digest.update(f.read(FINGERPRINT_BYTES))
+        if stat.st_size > FINGERPRINT_BYTES:
+            f.seek(max(FINGERPRINT_BYTES, stat.st_size - FINGERPRINT_BYTES))
+            digest.update(f.read(FINGERPRINT_BYTES))
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': digest.hexdigest()}
+
+
+def filter_records(records: Iterable[Dict], since: Optional[float] = None, until: Optional[float] = None,
+                   levels: Optional[List[str]] = None) -> Iterator[Dict]:
+    """Keep records inside [since, until] and of the requested types
+
+    Records without a timestamp inherit the previous record's time.
+    """
+    wanted = {level.upper() for level in levels} if levels else None
+    last = None
+    for record in records:
+        epoch = parse_timestamp(record.get('timestamp'))
+        if epoch is not None:
+            last = epoch
+        if wanted and record['type'] not in wanted:
+            continue
+        if last is not None:
+            if since is not None and last < since:
+                continue
+            if until is not None and last > until:
+                continue
+        elif since is not None or until is not None:
+            continue
+        yield record
+
+
+class LogIndex:
+    """Sparse checkpoint index over an uncompressed log file"""
+
+    def __init__(self, path: str, fingerprint: Dict, every: int, fmt: str, blocks: List[List]):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.every = every
+        self.fmt = fmt
+        # Each block: [first_line, byte_offset, first_epoch_or_None, errors, warnings]
+        self.blocks = blocks
+
+    @classmethod
+    def load_or_build(cls, path: str, every: int = DEFAULT_EVERY, fmt: Optional[str] = None) -> Optional['LogIndex']:
+        """Load a valid sidecar or (re)build it; None for compressed files and tar bundles"""
+        with open(path, 'rb') as f:
+            head = f.read(512)
+        if detect_compression(head) or is_tar(head):
+            return None
+
+        fingerprint = file_fingerprint(path)
+        sidecar = index_path(path)
+        if os.path.exists(sidecar):
+            try:
+                with open(sidecar, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == INDEX_VERSION and data.get('fingerprint') == fingerprint \
+                        and data.get('every') == every and (fmt is None or data.get('format') == fmt):
+                    return cls(path, fingerprint, every, data['format'], data['blocks'])
+            except (ValueError, KeyError, OSError):
+                pass
+
+        index = cls.build(path, every=every, fmt=fmt, fingerprint=fingerprint)
+        try:
+            index.save()
+        except OSError:
+            # Read-only log directory: the index still serves this query
+            pass
+        return index
+
+    @classmethod
+    def build(cls, path: str, every: int = DEFAULT_EVERY, fmt: Optional[str] = None,
+              fingerprint: Optional[Dict] = None) -> 'LogIndex':
+        """Scan the file once, recording a checkpoint every ``every`` lines"""
+        fingerprint = fingerprint or file_fingerprint(path)
+        blocks = []
+
+        with open(path, 'rb') as f:
+            if fmt is None:
+                sample = [line.decode('utf-8', errors='replace') for line in itertools.islice(f, 50)]
+                fmt = detect_format(sample).name
+                f.seek(0)
+            plugin = get_format(fmt)
+
+            offset = 0
+            line_number = 0
+            while True:
+                raw_lines = list(itertools.islice(f, every))
+                if not raw_lines:
+                    break
+                lines = [line.decode('utf-8', errors='replace') for line in raw_lines]
+
+                # The plugin knows where each format keeps its time (syslog stamps, epoch `ts` fields, ...)
+                first_epoch = None
+                errors = warnings = 0
+                for record in plugin.parse(lines):
+                    if first_epoch is None:
+                        first_epoch = parse_timestamp(record['timestamp'])
+                    if record['type'] == 'ERROR':
+                        errors += 1
+                    else:
+                        warnings += 1
+                if first_epoch is None:
+                    for line in lines:
+                        first_epoch = parse_timestamp(extract_timestamp(line))
+                        if first_epoch is not None:
+                            break
+
+                blocks.append([line_number + 1, offset, first_epoch, errors, warnings])
+                offset += sum(len(line) for line in raw_lines)
+                line_number += len(raw_lines)
+
+        return cls(path, fingerprint, every, fmt, blocks)
+
+    def save(self):
+        data = {
+            'version': INDEX_VERSION,
+            'fingerprint': self.fingerprint,
+            'every': self.every,
+            'format': self.fmt,
+            'blocks': self.blocks,
+        }
+        with open(index_path(self.path), 'w', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+
+    @property
+    def seekable(self) -> bool:
+        """False when a block holds records but no recognizable time, so seeking could skip them"""
+        return all(block[2] is not None or not (block[3] or block[4]) for block in self.blocks)
+
+    def _select_blocks(self, since: Optional[float], until: Optional[float],
+                       levels: Optional[List[str]]) -> List[int]:
+        start, end = 0, len(self.blocks)
+        if self.seekable:
+            # Forward-fill block times so blocks without records sort with their predecessor
+            times = []
+            last = float('-inf')
+            for block in self.blocks:
+                if block[2] is not None:
+                    last = max(last, block[2])
+                times.append(last)
+
+            if since is not None:
+                # The block that starts at or before `since` may still contain it
+                start = max(0, bisect.bisect_right(times, since) - 1)
+            if until is not None:
+                end = bisect.bisect_right(times, until)
+
+        wanted = {level.upper() for level in levels} if levels else None
+        selected = []
+        for i in range(start, end):
+            block = self.blocks[i]
+            if wanted:
+                if not (('ERROR' in wanted and block[3]) or ('WARNING' in wanted and block[4])):
+                    continue
+            selected.append(i)
+        return selected
+
+    def query(self, since: Optional[float] = None, until: Optional[float] = None,
+              levels: Optional[List[str]] = None) -> Iterator[Dict]:
+        """Yield records in the time window, parsing only the relevant blocks"""
+        selected = self._select_blocks(since, until, levels)
+        if not selected:
+            return
+
+        plugin = get_format(self.fmt)
+        size = self.fingerprint['size']
+
+        # Coalesce adjacent blocks into contiguous byte ranges
+        ranges = []
+        for i in selected:
+            if ranges and ranges[-1][1] == i:
+                ranges[-1][1] = i + 1
+            else:
+                ranges.append([i, i + 1])
+
+        with open(self.path, 'rb') as f:
+            if size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                for first, last in ranges:
+                    # A stack trace can cross a block boundary: parse from the previous block
+                    # (so a trailing trace is not read as new records) on to the next block
+                    # that starts a record, and keep only records starting inside the range
+                    lead = max(0, first - 1)
+                    tail = last
+                    while tail < len(self.blocks) and not (self.blocks[tail][3] or self.blocks[tail][4]):
+                        tail += 1
+                    tail = min(tail + 1, len(self.blocks))
+                    start = self.blocks[lead][1]
+                    end = self.blocks[tail][1] if tail < len(self.blocks) else size
+                    lines = mapped[start:end].decode('utf-8', errors='replace').split('\n')
+                    if lines and lines[-1] == '':
+                        lines.pop()
+                    line_offset = self.blocks[lead][0] - 1
+                    first_line = self.blocks[first][0]
+                    stop_line = self.blocks[last][0] if last < len(self.blocks) else float('inf')
+                    records = []
+                    for record in plugin.parse(lines):
+                        record['line_number'] += line_offset
+                        if first_line <= record['line_number'] < stop_line:
+                            records.append(record)
+                    yield from filter_records(records, since, until, levels)
@@ -2,94 +2,398 @@
 Log parsing utilities.
 """
 
-import re
-from typing import List, Dict
-from datetime import datetime
+import itertools
+import os
+from typing import Iterable, Iterator, List, Dict, Optional, Tuple
+
+from utils.formats import (
+    DEFAULT_CONTEXT_LINES,
+    detect_format,
+    extract_timestamp,
+    get_format,
+    parse_timestamp,
+)
+from utils.index import LogIndex, filter_records
+from utils.sources import (
+    batch_segments,
+    decompress_segment,
+    open_log_streams,
+    split_segments,
+)
+
+# Number of leading lines used to sniff the log format
+SNIFF_LINES = 50
+
+# Compressed bytes handed to each worker when parsing segments in parallel
+SEGMENT_BATCH_BYTES = 8 * 1024 * 1024
+
+# Leading record starts a worker offers for syncing with the previous segment
+SYNC_CANDIDATES = 3
+
+
+def _parse_segment(path: str, codec: Optional[str], start: int, end: int, fmt: str,
+                   sketch: bool = False) -> Dict:
+    """Worker: decompress one segment and parse the records that lie fully inside it
+
+    A stack trace can cross a segment boundary, so the worker cannot know
+    how its first lines continue the previous segment or how its last
+    record ends. It returns:
+
+    - ``prefix`` (bytes) and ``head`` (lines): the segment's leading lines up
+      to its last sync ``candidates`` (indexes of record starts). The parent
+      re-parses them after the previous segment's tail and keeps the worker's
+      records from the first candidate where both parses start a record.
+    - ``lead`` and ``records``: records from the first candidate up to, but
+      not including, the last record (``records`` folded into an
+      ErrorSketch with ``sketch``).
+    - ``tail`` (bytes): the unfinished last record, preceded by its
+      ``tail_skip`` context lines, from body line ``tail_start`` to the end.
+
+    Segments with too few records to sync on come back as ``raw`` bytes.
+    """
+    data = decompress_segment(path, codec, start, end)
+    first_newline = data.find(b'\n')
+    last_newline = data.rfind(b'\n')
+    if first_newline < 0:
+        return {'raw': data}
+
+    # Newlines never occur inside a UTF-8 sequence, so the complete lines decode on their own
+    middle = data[first_newline + 1:last_newline + 1]
+    body = middle.decode('utf-8', errors='replace').split('\n')[:-1]
+    context = DEFAULT_CONTEXT_LINES
+    records = list(get_format(fmt).parse(body, context_lines=context))
+    starts = [record['line_number'] - 1 for record in records]
+    # A record start can anchor the sync once its context lines lie inside the segment
+    candidates = [start for start in starts[:-1] if start >= context][:SYNC_CANDIDATES]
+    if not candidates:
+        return {'raw': data}
+
+    last = starts[-1]
+    lead = [r for r in records if candidates[0] <= r['line_number'] - 1 < candidates[-1]]
+    kept = [r for r in records if candidates[-1] <= r['line_number'] - 1 < last]
+    if sketch:
+        from utils.sketches import ErrorSketch
+        kept = ErrorSketch().update(kept)
+
+    tail_start = max(0, last - context)
+    # Byte offset of body line `tail_start`: count newlines back from the end
+    position = len(middle) - 1
+    for _ in range(len(body) - tail_start):
+        position = middle.rfind(b'\n', 0, position)
+    return {
+        'prefix': data[:first_newline],
+        'head': body[:candidates[-1] + 1],
+        'candidates': candidates,
+        'lead': lead,
+        'records': kept,
+        'tail_start': tail_start,
+        'tail_skip': last - tail_start,
+        'tail': middle[position + 1:] + data[last_newline + 1:],
+    }
+
+
+class _Unsynced(Exception):
+    """No sync point matched between two segments"""
+
+
+class _SegmentStitcher:
+    """Join per-segment results in order into the records a sequential parse yields
+
+    ``carry`` holds raw bytes not yet parsed: it starts ``skip`` context
+    lines before a record start (or at the start of the file) and runs to
+    the end of the latest segment seen, ending in a partial line.
+    """
+
+    # Raw carry re-parsed in-process once it grows past this many bytes
+    MAX_CARRY = SEGMENT_BATCH_BYTES
+
+    def __init__(self, plugin):
+        self.plugin = plugin
+        self.carry = b''
+        self.line = 0  # file line index (0-based) of the carry's first line
+        self.skip = 0
+        self.anchored = False  # whether a record must start at line `skip` of the carry
+        self.limit = self.MAX_CARRY
+
+    def _parse(self, lines: List[str]) -> List[Dict]:
+        """Parse lines from the carry start; drop records already emitted and check the anchor"""
+        records = list(self.plugin.parse(lines, context_lines=DEFAULT_CONTEXT_LINES))
+        if self.anchored and not any(r['line_number'] - 1 == self.skip for r in records):
+            raise _Unsynced()
+        return [r for r in records if r['line_number'] - 1 >= self.skip]
+
+    def _emit(self, records: Iterable[Dict], first_line: int) -> Iterator[Dict]:
+        for record in records:
+            record['line_number'] += first_line
+            yield record
+
+    def feed(self, result: Dict) -> Tuple[List[Dict], object]:
+        """Take the next segment's result; returns (stitched records, the worker's own records)"""
+        if 'raw' in result:
+            self.carry += result['raw']
+            if len(self.carry) > self.limit:
+                return self._settle(final=False), []
+            return [], []
+
+        region = [line.decode('utf-8', errors='replace') for line in (self.carry + result['prefix']).split(b'\n')]
+        base = len(region)  # region index of the segment's first body line
+        region += result['head']
+        records = self._parse(region)
+        starts = {r['line_number'] - 1 for r in records}
+        sync = next((c for c in result['candidates'] if base + c in starts), None)
+        if sync is None:
+            raise _Unsynced()
+
+        stitched = [r for r in records if r['line_number'] - 1 < base + sync]
+        stitched = list(self._emit(stitched, self.line))
+        body_line = self.line + base
+        stitched += self._emit([r for r in result['lead'] if r['line_number'] - 1 >= sync], body_line)
+        own = result['records']
+        if isinstance(own, list):
+            own = list(self._emit(own, body_line))
+
+        self.carry = result['tail']
+        self.limit = self.MAX_CARRY
+        self.line = body_line + result['tail_start']
+        self.skip = result['tail_skip']
+        self.anchored = True
+        return stitched, own
+
+    def _settle(self, final: bool) -> List[Dict]:
+        """Parse the carry in-process; unless final, keep its last record (and partial line) as the carry"""
+        raw_lines = self.carry.split(b'\n')
+        if final:
+            if raw_lines and not raw_lines[-1]:
+                raw_lines.pop()
+            records = self._parse([line.decode('utf-8', errors='replace') for line in raw_lines])
+            self.carry = b''
+            return list(self._emit(records, self.line))
+
+        records = self._parse([line.decode('utf-8', errors='replace') for line in raw_lines[:-1]])
+        if records:
+            last = records[-1]['line_number'] - 1
+            tail_start = max(0, last - DEFAULT_CONTEXT_LINES)
+            self.skip, self.anchored = last - tail_start, True
+        else:
+            # No record is open, so only the context lines matter to what follows
+            tail_start = max(0, len(raw_lines) - 1 - DEFAULT_CONTEXT_LINES)
+            self.skip, self.anchored = len(raw_lines) - 1 - tail_start, False
+        first_line = self.line
+        self.carry = b'\n'.join(raw_lines[tail_start:])
+        self.line += tail_start
+        # A record that is still open may run on; wait for twice as much before parsing it again
+        self.limit = max(self.MAX_CARRY, 2 * len(self.carry))
+        return list(self._emit(records[:-1], first_line))
+
+    def finish(self) -> List[Dict]:
+        return self._settle(final=True)
+
+
+def _sketch_file(path: str, fmt: Optional[str], filters: Dict) -> 'ErrorSketch':
+    """Worker: sketch one whole file"""
+    from utils.sketches import ErrorSketch
+    return ErrorSketch().update(LogParser.iter_file(path, fmt=fmt, **filters))
+
 
 class LogParser:
     """Parse various log formats and extract errors"""
-    
+
     @staticmethod
-    def parse_logs(log_content: str) -> List[Dict]:
-        """Extract errors, warnings, and stack traces from logs"""
-        errors = []
-        lines = log_content.split('\n')
-        
-        # Common error patterns
-        error_patterns = [
-            r'ERROR[:\s]+(.+)',
-            r'Exception[:\s]+(.+)',
-            r'CRITICAL[:\s]+(.+)',
-            r'FATAL[:\s]+(.+)',
-            r'Failed[:\s]+(.+)',
-        ]
-        
-        warning_patterns = [
-            r'WARNING[:\s]+(.+)',
-            r'WARN[:\s]+(.+)',
-        ]
-        
-        for i, line in enumerate(lines):
-            # Check for errors
-            for pattern in error_patterns:
-                match = re.search(pattern, line, re.IGNORECASE)
-                if match:
-                    error_info = {
-                        'type': 'ERROR',
-                        'line_number': i + 1,
-                        'message': match.group(1).strip(),
-                        'full_line': line.strip(),
-                        'timestamp': LogParser._extract_timestamp(line),
-                        'severity': 'HIGH'
-                    }
-                    
-                    # Look for stack trace
-                    stack_trace = LogParser._extract_stack_trace(lines, i)
-                    if stack_trace:
-                        error_info['stack_trace'] = stack_trace
-                    
-                    errors.append(error_info)
-                    break
-            
-            # Check for warnings
-            for pattern in warning_patterns:
-                match = re.search(pattern, line, re.IGNORECASE)
-                if match:
-                    errors.append({
-                        'type': 'WARNING',
-                        'line_number': i + 1,
-                        'message': match.group(1).strip(),
-                        'full_line': line.strip(),
-                        'timestamp': LogParser._extract_timestamp(line),
-                        'severity': 'MEDIUM'
-                    })
-                    break
-        
+    def parse_logs(log_content: str, fmt: Optional[str] = None, since: Optional[str] = None,
+                   until: Optional[str] = None, levels: Optional[List[str]] = None) -> List[Dict]:
+        """Extract errors, warnings, and stack traces from logs
+
+        ``fmt`` forces a format ('text', 'jsonl', 'logfmt', 'syslog');
+        by default it is detected from the first lines. ``since``/``until``
+        and ``levels`` filter the records.
+        """
+        records = LogParser.iter_errors(log_content.split('\n'), fmt=fmt)
+        if since or until or levels:
+            records = filter_records(records, *LogParser._window(since, until), levels)
+        return list(records)
+
+    @staticmethod
+    def iter_errors(lines: Iterable[str], fmt: Optional[str] = None,
+                    context_lines: Optional[int] = None) -> Iterator[Dict]:
+        """Stream error records from an iterable of lines
+
+        ``context_lines`` leading lines are attached to each record as
+        ``context`` (defaults to LOG_AGENT_CONTEXT_LINES, normally 0).
+        """
+        lines = iter(lines)
+        if fmt:
+            plugin = get_format(fmt)
+        else:
+            sample = list(itertools.islice(lines, SNIFF_LINES))
+            plugin = detect_format(sample)
+            lines = itertools.chain(sample, lines)
+        return plugin.parse(lines, context_lines=context_lines)
+
+    @staticmethod
+    def parse_file(path: str, fmt: Optional[str] = None, workers: Optional[int] = None,
+                   since: Optional[str] = None, until: Optional[str] = None,
+                   levels: Optional[List[str]] = None) -> List[Dict]:
+        """Stream errors from a plain or compressed log file (gz, bz2, xz, zst, tar)
+
+        With ``workers`` > 1, BGZF gzip and multi-frame zstd files are split
+        into independently compressed segments that are parsed in parallel.
+        Filters are described in ``iter_file``.
+        """
+        if since or until or levels:
+            return list(LogParser.iter_file(path, fmt=fmt, since=since, until=until, levels=levels))
+        if workers and workers > 1:
+            codec, segments = split_segments(path)
+            if codec in ('gzip', 'zstd') and len(segments) > 1:
+                return LogParser._parse_segments(path, codec, segments, fmt, workers)
+
+        return list(LogParser.iter_file(path, fmt=fmt))
+
+    @staticmethod
+    def iter_file(source, fmt: Optional[str] = None, name: Optional[str] = None,
+                  since: Optional[str] = None, until: Optional[str] = None,
+                  levels: Optional[List[str]] = None) -> Iterator[Dict]:
+        """Stream errors from a path or binary file object, decompressing as needed
+
+        Records from tar bundle members get a ``source`` of ``<name>:<member>``.
+        ``since``/``until`` (timestamps) and ``levels`` (e.g. ['ERROR']) restrict
+        the output; for uncompressed files a sidecar index lets the parser seek
+        straight to the matching window instead of scanning the whole file.
+        """
+        if since or until or levels:
+            since_epoch, until_epoch = LogParser._window(since, until)
+            index = None
+            if isinstance(source, (str, os.PathLike)):
+                index = LogIndex.load_or_build(os.fspath(source), fmt=fmt)
+            if index is not None:
+                yield from index.query(since_epoch, until_epoch, levels)
+            else:
+                unfiltered = LogParser.iter_file(source, fmt=fmt, name=name)
+                yield from filter_records(unfiltered, since_epoch, until_epoch, levels)
+            return
+
+        if name is None:
+            name = os.fspath(source) if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', '<stream>')
+        for stream_name, stream in open_log_streams(source, name=name):
+            with stream:
+                for record in LogParser.iter_errors(stream, fmt=fmt):
+                    # Members of a tar bundle each restart their line numbers
+                    if stream_name != name:
+                        record['source'] = stream_name
+                    yield record
+
+    @staticmethod
+    def parse_files(paths: List[str], fmt: Optional[str] = None, **filters) -> List[Dict]:
+        """Parse several logs concurrently and merge them into one timeline
+
+        Records are ordered by normalized timestamp and tagged with ``source``.
+        ``filters`` (since/until/levels) are passed to ``iter_file``.
+        """
+        return list(LogParser.iter_files(paths, fmt=fmt, **filters))
+
+    @staticmethod
+    def iter_files(paths: List[str], fmt: Optional[str] = None, **filters) -> Iterator[Dict]:
+        """Stream the merged timeline of ``parse_files`` without holding it in memory"""
+        from utils.merge import merge_sources
+        return merge_sources(paths, fmt=fmt, **filters)
+
+    @staticmethod
+    def sketch_files(paths: List[str], fmt: Optional[str] = None, workers: Optional[int] = None,
+                     **filters) -> 'ErrorSketch':
+        """Count errors in fixed memory instead of materializing every record
+
+        Returns a merged ErrorSketch (top-K fingerprints, Count-Min estimates,
+        HyperLogLog distinct counts). With ``workers`` > 1, several files are
+        sketched in parallel, and a single BGZF/zstd file is split into segments.
+        """
+        # Sketches pull in NumPy, which the plain parse path does not need
+        from utils.sketches import ErrorSketch
+
+        filters = {k: v for k, v in filters.items() if v}
+        if workers and workers > 1 and len(paths) == 1 and not filters:
+            codec, segments = split_segments(paths[0])
+            if codec in ('gzip', 'zstd') and len(segments) > 1:
+                return LogParser._parse_segments(paths[0], codec, segments, fmt, workers, sketch=True)
+        if workers and workers > 1 and len(paths) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            sketch = ErrorSketch()
+            with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+                for part in pool.map(_sketch_file, paths, [fmt] * len(paths), [filters] * len(paths)):
+                    sketch.merge(part)
+            return sketch
+
+        sketch = ErrorSketch()
+        for path in paths:
+            sketch.update(LogParser.iter_file(path, fmt=fmt, **filters))
+        return sketch
+
+    @staticmethod
+    def _parse_segments(path: str, codec: str, segments: List[Tuple[int, int]],
+                        fmt: Optional[str], workers: int, sketch: bool = False):
+        if not fmt:
+            for _, stream in open_log_streams(path):
+                with stream:
+                    fmt = detect_format(list(itertools.islice(stream, SNIFF_LINES))).name
+                break
+        plugin = get_format(fmt)
+        batches = batch_segments(segments, SEGMENT_BATCH_BYTES)
+
+        # Imported here: multiprocessing is slow to import and only needed for splittable archives
+        from concurrent.futures import ProcessPoolExecutor
+
+        if sketch:
+            from utils.sketches import ErrorSketch
+        errors = ErrorSketch() if sketch else []
+        add = errors.add if sketch else errors.append
+        stitcher = _SegmentStitcher(plugin)
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_parse_segment, path, codec, start, end, fmt, sketch)
+                           for start, end in batches]
+                try:
+                    for future in futures:
+                        stitched, own = stitcher.feed(future.result())
+                        for record in stitched:
+                            add(record)
+                        if sketch and not isinstance(own, list):
+                            errors.merge(own)
+                        else:
+                            for record in own:
+                                add(record)
+                except _Unsynced:
+                    for future in futures:
+                        future.cancel()
+                    raise
+            for record in stitcher.finish():
+                add(record)
+        except _Unsynced:
+            # A record spans segments in a way no sync point resolves: parse the file in one pass
+            records = LogParser.iter_file(path, fmt=fmt)
+            return ErrorSketch().update(records) if sketch else list(records)
+
+        if sketch:
+            errors.flush()
         return errors
-    
+
+    @staticmethod
+    def _window(since: Optional[str], until: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
+        bounds = []
+        for value in (since, until):
+            if not value:
+                bounds.append(None)
+                continue
+            epoch = parse_timestamp(str(value))
+            if epoch is None:
+                raise ValueError(f"Unrecognized timestamp: {value}")
+            bounds.append(epoch)
+        return bounds[0], bounds[1]
+
+    @staticmethod
+    def detect_format(log_content: str) -> str:
+        """Return the name of the detected format for some log content"""
+        sample = log_content.split('\n', SNIFF_LINES)[:SNIFF_LINES]
+        return detect_format(sample).name
+
     @staticmethod
     def _extract_timestamp(line: str) -> str:
         """Extract timestamp from log line"""
-        timestamp_patterns = [
-            r'\d{4}-\d{2}-\d{2}[\sT]\d{2}:\d{2}:\d{2}',
-            r'\d{2}/\d{2}/\d{4}\s+\d{2}:\d{2}:\d{2}',
-        ]
-        
-        for pattern in timestamp_patterns:
-            match = re.search(pattern, line)
-            if match:
-                return match.group(0)
-        return "N/A"
-    
-    @staticmethod
-    def _extract_stack_trace(lines: List[str], start_index: int) -> str:
-        """Extract stack trace following an error"""
-        stack_trace = []
-        for i in range(start_index + 1, min(start_index + 15, len(lines))):
-            line = lines[i].strip()
-            if line.startswith('at ') or 'File "' in line or line.startswith('    '):
-                stack_trace.append(line)
-            elif line and not line.startswith(' '):
-                break
-        
-        return '\n'.join(stack_trace) if stack_trace else ""
+        return extract_timestamp(line)
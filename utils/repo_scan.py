@@ -0,0 +1,297 @@
+"""
+Repository scanning for code analysis: find the source files that mention
+error keywords.
+
+The tree is walked once. Directories and files matched by ``.gitignore``
+(root and nested) are pruned, as are vendored and build directories
+(``node_modules``, ``vendor``, ``dist``, ...) and generated or minified
+files, recognised by name or by sniffing their first bytes. Binaries and
+files larger than ``max_file_bytes`` are skipped without being read in full.
+
+The rest are read concurrently in a thread pool until ``byte_budget`` bytes
+have been reserved. Scanning stops early once ``max_matches`` files match
+at least ``strong_keywords`` distinct keywords.
+
+Configure from the environment:
+    LOG_AGENT_REPO_SCAN_WORKERS=8              threads reading files
+    LOG_AGENT_REPO_SCAN_BYTES=67108864         bytes read per scan (64 MB)
+    LOG_AGENT_REPO_MAX_FILE_BYTES=1048576      larger files are skipped (1 MB)
+"""
+
+import fnmatch
+import os
+import re
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_WORKERS = int(os.getenv("LOG_AGENT_REPO_SCAN_WORKERS", "8"))
+DEFAULT_BYTE_BUDGET = int(os.getenv("LOG_AGENT_REPO_SCAN_BYTES", str(64 * 1024 * 1024)))
+DEFAULT_MAX_FILE_BYTES = int(os.getenv("LOG_AGENT_REPO_MAX_FILE_BYTES", str(1024 * 1024)))
+
+CODE_EXTENSIONS = ('.py', '.js', '.jsx', '.ts', '.tsx', '.java', '.kt', '.scala', '.go', '.rs', '.rb', '.php',
+                   '.cs', '.c', '.h', '.cc', '.cpp', '.hpp')
+
+VCS_DIRS = {'.git', '.hg', '.svn'}
+
+SKIP_DIRS = {'node_modules', 'bower_components', 'vendor', 'third_party', 'dist', 'build',
+             'target', 'out', '__pycache__', '.venv', 'venv', 'site-packages', '.tox', '.mypy_cache', '.next'}
+
+GENERATED_NAMES = ('*.min.js', '*.min.css', '*.bundle.js', '*-bundle.js', '*.chunk.js', '*_pb2.py',
+                   '*_pb2_grpc.py', '*.pb.go', '*.pb.cc', '*.pb.h', '*.generated.*', '*.g.cs', '*.designer.cs')
+
+GENERATED_MARKERS = (b'do not edit', b'@generated', b'auto-generated', b'autogenerated')
+
+SNIFF_BYTES = 8192
+SNIPPET_CHARS = 500
+SNIPPET_CONTEXT_LINES = 5
+
+
+class GitIgnore:
+    """Rules from one .gitignore file, relative to the directory holding it"""
+
+    def __init__(self, base: str, lines: List[str]):
+        self.base = base
+        self.rules: List[Tuple[re.Pattern, bool, bool]] = []
+        for line in lines:
+            rule = self._compile(line.rstrip('\n'))
+            if rule is not None:
+                self.rules.append(rule)
+
+    @classmethod
+    def load(cls, directory: str, base: str) -> Optional['GitIgnore']:
+        path = os.path.join(directory, '.gitignore')
+        try:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                return cls(base, f.readlines())
+        except OSError:
+            return None
+
+    @staticmethod
+    def _compile(line: str) -> Optional[Tuple[re.Pattern, bool, bool]]:
+        """(regex, negated, directories only) for one pattern line, or None"""
+        if not line.strip() or line.startswith('#'):
+            return None
+        line = line.rstrip() if not line.endswith('\\ ') else line
+        negated = line.startswith('!')
+        if negated:
+            line = line[1:]
+        elif line.startswith('\\'):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        # A slash anywhere but the end anchors the pattern to the .gitignore's directory
+        anchored = '/' in line
+        line = line.lstrip('/')
+        if not line:
+            return None
+
+        regex, i = '', 0
+        while i < len(line):
+            if line.startswith('**/', i):
+                regex += '(?:.*/)?'
+                i += 3
+            elif line.startswith('/**', i) and i + 3 == len(line):
+                regex += '/.*'
+                i += 3
+            elif line.startswith('**', i):
+                regex += '.*'
+                i += 2
+            elif line[i] == '*':
+                regex += '[^/]*'
+                i += 1
+            elif line[i] == '?':
+                regex += '[^/]'
+                i += 1
+            elif line[i] == '[' and ']' in line[i + 2:]:
+                end = line.index(']', i + 2)
+                body = line[i + 1:end]
+                regex += '[' + ('^' + body[1:] if body.startswith('!') else body).replace('\\', '\\\\') + ']'
+                i = end + 1
+            else:
+                regex += re.escape(line[i])
+                i += 1
+        prefix = '' if anchored else '(?:.*/)?'
+        return re.compile(f'^{prefix}{regex}$'), negated, dir_only
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """True if ignored, False if re-included, None if no rule applies"""
+        if self.base:
+            if not rel_path.startswith(self.base + '/'):
+                return None
+            rel_path = rel_path[len(self.base) + 1:]
+        result = None
+        for regex, negated, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel_path):
+                result = not negated
+        return result
+
+
+def _ignored(rules: List[GitIgnore], rel_path: str, is_dir: bool) -> bool:
+    ignored = False
+    for gitignore in rules:
+        verdict = gitignore.match(rel_path, is_dir)
+        if verdict is not None:
+            ignored = verdict
+    return ignored
+
+
+def walk(root: str, extensions=CODE_EXTENSIONS, stats: Optional[Counter] = None) -> Iterator[Tuple[str, int]]:
+    """Yield (relative path, size) for candidate source files, pruning ignored directories"""
+    stats = stats if stats is not None else Counter()
+    pending = [('', [])]
+    while pending:
+        rel_dir, rules = pending.pop()
+        directory = os.path.join(root, rel_dir)
+        gitignore = GitIgnore.load(directory, rel_dir)
+        if gitignore is not None:
+            rules = rules + [gitignore]
+        try:
+            entries = sorted(os.scandir(directory), key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            rel_path = f'{rel_dir}/{entry.name}' if rel_dir else entry.name
+            if entry.is_symlink():
+                continue
+            if entry.is_dir():
+                if entry.name in VCS_DIRS:
+                    continue
+                if entry.name in SKIP_DIRS:
+                    stats['skipped_vendor_dirs'] += 1
+                elif _ignored(rules, rel_path, True):
+                    stats['skipped_ignored_dirs'] += 1
+                else:
+                    subdirs.append((rel_path, rules))
+                continue
+            if not entry.name.endswith(tuple(extensions)):
+                continue
+            size = entry.stat().st_size
+            stats['files_seen'] += 1
+            if _ignored(rules, rel_path, False):
+                reason = 'ignored'
+            elif any(fnmatch.fnmatch(entry.name, pattern) for pattern in GENERATED_NAMES):
+                reason = 'generated'
+            else:
+                yield rel_path, size
+                continue
+            stats[f'skipped_{reason}'] += 1
+            stats['bytes_skipped'] += size
+        # Depth first, in name order
+        pending.extend(reversed(subdirs))
+
+
+def _sniff(head: bytes) -> Optional[str]:
+    """Skip reason for a file judged by its first bytes, or None to scan it"""
+    if b'\0' in head:
+        return 'binary'
+    lowered = head[:1024].lower()
+    if any(marker in lowered for marker in GENERATED_MARKERS):
+        return 'generated'
+    if len(head) == SNIFF_BYTES and head.count(b'\n') < 2:
+        # A full sniff window without line breaks is minified or data
+        return 'generated'
+    return None
+
+
+def _snippet(content: str, position: int) -> Tuple[int, str]:
+    """(1-based line number, a few lines around ``position``)"""
+    line = content.count('\n', 0, position)
+    lines = content.split('\n')
+    start = max(0, line - SNIPPET_CONTEXT_LINES)
+    return line + 1, '\n'.join(lines[start:line + SNIPPET_CONTEXT_LINES + 1])[:SNIPPET_CHARS]
+
+
+def _scan_file(path: str, keywords: List[str]) -> Tuple[Optional[str], int, Optional[Dict]]:
+    """(skip reason, bytes read, match) for one file"""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(SNIFF_BYTES)
+            reason = _sniff(head)
+            if reason:
+                return reason, len(head), None
+            data = head + f.read()
+    except OSError:
+        return 'unreadable', 0, None
+
+    content = data.decode('utf-8', errors='replace')
+    lowered = content.lower()
+    hits = {keyword: lowered.count(keyword) for keyword in keywords}
+    matched = [keyword for keyword, count in hits.items() if count]
+    if not matched:
+        return None, len(data), None
+    line, snippet = _snippet(content, lowered.index(matched[0]))
+    return None, len(data), {
+        'keywords': matched,
+        'score': len(matched),
+        'hits': sum(hits.values()),
+        'line': line,
+        'snippet': snippet,
+    }
+
+
+def scan_repo(root: str, keywords: List[str], extensions=CODE_EXTENSIONS, workers: int = DEFAULT_WORKERS,
+              byte_budget: int = DEFAULT_BYTE_BUDGET, max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+              max_matches: int = 5, strong_keywords: int = 2) -> Dict:
+    """Find files mentioning ``keywords`` (case-insensitive) under ``root``
+
+    Returns {'matches': [...], 'stats': {...}}. Matches are ranked by distinct
+    keywords, then total hits; each has file, line, snippet, keywords, score
+    and hits. Stats count files and bytes scanned versus skipped, by reason.
+    """
+    keywords = list(dict.fromkeys(k.lower() for k in keywords if k and k.strip()))
+    strong_keywords = max(1, min(strong_keywords, len(keywords)))
+    stats = Counter()
+    matches = []
+    reserved = 0
+    stopped_early = False
+
+    def strong():
+        return sum(1 for m in matches if m['score'] >= strong_keywords)
+
+    def collect(done):
+        for future in done:
+            rel_path, size = in_flight.pop(future)
+            reason, bytes_read, match = future.result()
+            stats['bytes_read'] += bytes_read
+            if reason:
+                stats[f'skipped_{reason}'] += 1
+                stats['bytes_skipped'] += size
+                continue
+            stats['files_scanned'] += 1
+            stats['bytes_scanned'] += size
+            if match:
+                matches.append(dict(match, file=rel_path))
+
+    in_flight = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        if keywords:
+            for rel_path, size in walk(root, extensions, stats):
+                if size > max_file_bytes:
+                    stats['skipped_too_large'] += 1
+                    stats['bytes_skipped'] += size
+                    continue
+                if reserved + size > byte_budget:
+                    stats['skipped_budget'] += 1
+                    stats['bytes_skipped'] += size
+                    continue
+                reserved += size
+                in_flight[pool.submit(_scan_file, os.path.join(root, rel_path), keywords)] = (rel_path, size)
+                # Keep a bounded window in flight so an early stop saves the rest of the walk
+                if len(in_flight) >= workers * 2:
+                    collect(wait(in_flight, return_when=FIRST_COMPLETED).done)
+                if strong() >= max_matches:
+                    stopped_early = True
+                    break
+        collect(wait(in_flight).done)
+
+    matches.sort(key=lambda m: (-m['score'], -m['hits'], m['file']))
+    result_stats = {key: stats.get(key, 0) for key in ('files_seen', 'files_scanned', 'bytes_scanned',
+                                                        'bytes_skipped', 'bytes_read')}
+    result_stats['skipped'] = {key[len('skipped_'):]: count for key, count in sorted(stats.items())
+                               if key.startswith('skipped_')}
+    result_stats['stopped_early'] = stopped_early
+    return {'matches': matches, 'stats': result_stats}
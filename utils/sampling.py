@@ -0,0 +1,217 @@
+"""
+Sampling mode: a quick, representative first look at huge logs.
+
+Uncompressed files larger than ``blocks`` x BLOCK_SIZE are not read in full.
+Instead, ``blocks`` randomly chosen blocks are read with seeks, each starting
+at the first line boundary in the block. Totals per level and per
+fingerprint are estimated by cluster sampling with a ratio estimator: the
+count per byte in the sampled blocks times the file size. (Each line
+belongs to the block it starts in, so blocks differ slightly in size, and
+the last one is usually partial.) The 95% bounds use the between-block
+variance of the residuals with a finite population correction.
+
+Compressed and smaller files cannot be seeked cheaply, so they are streamed.
+Their counts are exact, and only the records kept are sampled.
+
+Either way, the records kept are a reservoir sample stratified by level and
+time window. Rare levels and quiet periods are represented instead of being
+drowned out by the noisiest hour.
+
+Configure from the environment:
+    LOG_AGENT_SAMPLE_BLOCKS=64          blocks read per seekable file
+    LOG_AGENT_SAMPLE_PER_STRATUM=200    records kept per (level, window)
+    LOG_AGENT_SAMPLE_WINDOW=3600        seconds per time window
+"""
+
+import math
+import os
+import random
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.anomaly import fingerprint
+from utils.formats import parse_timestamp
+from utils.sources import detect_compression, is_tar
+
+DEFAULT_BLOCKS = int(os.getenv("LOG_AGENT_SAMPLE_BLOCKS", "64"))
+DEFAULT_PER_STRATUM = int(os.getenv("LOG_AGENT_SAMPLE_PER_STRATUM", "200"))
+DEFAULT_WINDOW = float(os.getenv("LOG_AGENT_SAMPLE_WINDOW", "3600"))
+BLOCK_SIZE = 1024 * 1024
+CONFIDENCE_Z = 1.96
+TOP_FINGERPRINTS = 50
+
+
+class StratifiedReservoir:
+    """Uniform reservoir sample (Algorithm R) per (level, time window) stratum"""
+
+    def __init__(self, per_stratum: int = DEFAULT_PER_STRATUM, window: float = DEFAULT_WINDOW,
+                 seed: Optional[int] = None):
+        self.per_stratum = per_stratum
+        self.window = window
+        self.seen: Counter = Counter()
+        self.kept: Dict[Tuple, List[Dict]] = {}
+        self._rng = random.Random(seed)
+
+    def add(self, record: Dict):
+        epoch = parse_timestamp(record.get('timestamp') or '')
+        key = (record.get('type'), None if epoch is None else int(epoch // self.window))
+        self.seen[key] += 1
+        kept = self.kept.setdefault(key, [])
+        if len(kept) < self.per_stratum:
+            kept.append(record)
+        else:
+            slot = self._rng.randrange(self.seen[key])
+            if slot < self.per_stratum:
+                kept[slot] = record
+
+    def records(self) -> List[Dict]:
+        """Kept records in time order (untimed records last)"""
+        records = [r for kept in self.kept.values() for r in kept]
+        records.sort(key=lambda r: parse_timestamp(r.get('timestamp') or '') or math.inf)
+        return records
+
+
+def _seekable(path: str) -> bool:
+    with open(path, 'rb') as f:
+        head = f.read(512)
+    return detect_compression(head) is None and not is_tar(head)
+
+
+def _block_lines(f, start: int, end: int) -> Tuple[List[str], List[int], int]:
+    """Lines that start within [start, end), with their byte offsets and the bytes they span"""
+    if start:
+        # Skip the line already in progress; stepping back one byte keeps a line starting exactly at ``start``
+        f.seek(start - 1)
+        f.readline()
+    else:
+        f.seek(0)
+    lines, offsets = [], []
+    position = f.tell()
+    while position < end:
+        raw = f.readline()
+        if not raw:
+            break
+        lines.append(raw.decode('utf-8', errors='replace'))
+        offsets.append(position)
+        position += len(raw)
+    return lines, offsets, position - offsets[0] if offsets else 0
+
+
+def _tally(counts: Counter, record: Dict, samples: Dict):
+    key = fingerprint(record.get('message', ''))
+    counts['total'] += 1
+    counts[('level', record.get('type'))] += 1
+    counts[('fingerprint', key)] += 1
+    samples.setdefault(key, record.get('message', ''))
+
+
+def _sample_blocks(path: str, size: int, blocks: int, reservoir: StratifiedReservoir, fmt: Optional[str],
+                   filters: Dict, rng: random.Random, samples: Dict) -> Tuple[Dict, int]:
+    """Read random blocks; returns ({key: (estimate, variance, observed)}, bytes read)"""
+    from utils.index import filter_records
+    from utils.parsers import LogParser
+
+    total_blocks = math.ceil(size / BLOCK_SIZE)
+    chosen = sorted(rng.sample(range(total_blocks), blocks))
+    per_block: List[Counter] = []
+    spans: List[int] = []
+    with open(path, 'rb') as f:
+        if fmt is None:
+            fmt = LogParser.detect_format(f.read(64 * 1024).decode('utf-8', errors='replace'))
+        for block in chosen:
+            start = block * BLOCK_SIZE
+            lines, offsets, span = _block_lines(f, start, min(start + BLOCK_SIZE, size))
+            spans.append(span)
+            records = LogParser.iter_errors(lines, fmt=fmt)
+            if filters:
+                records = filter_records(records, *LogParser._window(filters.get('since'), filters.get('until')),
+                                         filters.get('levels'))
+            counts = Counter()
+            for record in records:
+                # Line numbers are meaningless inside a block; keep the byte offset instead
+                record['byte_offset'] = offsets[record['line_number'] - 1]
+                record['line_number'] = None
+                _tally(counts, record, samples)
+                reservoir.add(record)
+            per_block.append(counts)
+
+    estimates = {}
+    n, population = len(per_block), total_blocks
+    bytes_read = sum(spans)
+    for key in set().union(*per_block) if per_block else ():
+        values = [c.get(key, 0) for c in per_block]
+        ratio = sum(values) / bytes_read if bytes_read else 0.0
+        residuals = [v - ratio * span for v, span in zip(values, spans)]
+        variance = sum(r * r for r in residuals) / (n - 1) if n > 1 else 0.0
+        # Variance of the total: N^2 * (1 - n/N) * s^2 / n, s^2 over the ratio residuals
+        estimates[key] = (ratio * size, population ** 2 * (1 - n / population) * variance / n, sum(values))
+    return estimates, bytes_read
+
+
+def _sample_stream(path: str, reservoir: StratifiedReservoir, fmt: Optional[str], filters: Dict,
+                   samples: Dict) -> Dict:
+    from utils.parsers import LogParser
+    counts = Counter()
+    for record in LogParser.iter_file(path, fmt=fmt, **filters):
+        _tally(counts, record, samples)
+        reservoir.add(record)
+    return {key: (float(count), 0.0, count) for key, count in counts.items()}
+
+
+def _bounds(estimate: float, variance: float, observed: int) -> Dict:
+    margin = CONFIDENCE_Z * math.sqrt(variance)
+    # What was actually seen is a hard lower bound
+    return {'estimate': round(estimate), 'low': max(observed, math.floor(estimate - margin)),
+            'high': math.ceil(estimate + margin)}
+
+
+def sample_files(paths: List[str], fmt: Optional[str] = None, blocks: int = DEFAULT_BLOCKS,
+                 per_stratum: int = DEFAULT_PER_STRATUM, window: float = DEFAULT_WINDOW,
+                 seed: Optional[int] = None, **filters) -> Tuple[List[Dict], Dict]:
+    """Sample one or more logs; returns (sampled records, summary with estimates)
+
+    The summary holds the estimated ``total``, per-``levels`` and
+    per-``fingerprints`` counts as {'estimate', 'low', 'high'} (95% bounds),
+    plus the ``fraction`` of input bytes actually read.
+    """
+    rng = random.Random(seed)
+    reservoir = StratifiedReservoir(per_stratum, window, seed)
+    filters = {k: v for k, v in filters.items() if v}
+    combined: Dict = {}
+    samples: Dict[str, str] = {}
+    files = []
+    total_bytes = read_bytes = 0
+
+    for path in paths:
+        size = os.path.getsize(path)
+        total_bytes += size
+        if blocks and size > blocks * BLOCK_SIZE and _seekable(path):
+            estimates, bytes_read = _sample_blocks(path, size, blocks, reservoir, fmt, filters, rng, samples)
+            mode = 'blocks'
+        else:
+            estimates, bytes_read = _sample_stream(path, reservoir, fmt, filters, samples), size
+            mode = 'stream'
+        read_bytes += bytes_read
+        files.append({'path': path, 'mode': mode, 'bytes': size, 'bytes_read': bytes_read})
+        # Files are sampled independently, so estimates and variances add up
+        for key, (estimate, variance, observed) in estimates.items():
+            e, v, o = combined.get(key, (0.0, 0.0, 0))
+            combined[key] = (e + estimate, v + variance, o + observed)
+
+    records = reservoir.records()
+    fingerprints = sorted((key[1] for key in combined if isinstance(key, tuple) and key[0] == 'fingerprint'),
+                          key=lambda k: -combined[('fingerprint', k)][0])[:TOP_FINGERPRINTS]
+    summary = {
+        'files': files,
+        'fraction': round(read_bytes / total_bytes, 4) if total_bytes else 1.0,
+        'exact': all(f['mode'] == 'stream' for f in files),
+        'confidence': 0.95,
+        'total': _bounds(*combined.get('total', (0.0, 0.0, 0))),
+        'levels': {key[1]: _bounds(*value) for key, value in combined.items()
+                   if isinstance(key, tuple) and key[0] == 'level'},
+        'fingerprints': [dict(fingerprint=key, message=samples[key], **_bounds(*combined[('fingerprint', key)]))
+                         for key in fingerprints],
+        'sampled_records': len(records),
+        'strata': len(reservoir.kept),
+    }
+    return records, summary
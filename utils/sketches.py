@@ -0,0 +1,276 @@
+"""
+Fixed-memory counting for very high-cardinality error streams.
+
+- ``CountMinSketch``: approximate count of any key (never under-counts)
+- ``SpaceSaving``: top-K heavy hitters with per-key error bounds
+- ``HyperLogLog``: approximate number of distinct keys
+
+All three are mergeable, so per-chunk or per-file sketches built in worker
+processes combine into the same result as one sketch over all the data.
+``ErrorSketch`` bundles them for parsed error records.
+"""
+
+import hashlib
+import heapq
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from utils.anomaly import fingerprint
+
+DEFAULT_TOP_K = 50
+DEFAULT_CMS_WIDTH = 4096
+DEFAULT_CMS_DEPTH = 4
+DEFAULT_HLL_PRECISION = 14
+# Records buffered before a vectorized flush into the sketches
+FLUSH_EVERY = 8192
+
+_MASK64 = (1 << 64) - 1
+
+
+def hash64(key: str) -> int:
+    """Stable 64-bit hash (the builtin hash() is salted per process)"""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8', errors='replace'), digest_size=8).digest(), 'little')
+
+
+class CountMinSketch:
+    """depth x width counter table; estimates are upper bounds on true counts"""
+
+    def __init__(self, width: int = DEFAULT_CMS_WIDTH, depth: int = DEFAULT_CMS_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.int64)
+
+    def _columns(self, hashes: np.ndarray) -> np.ndarray:
+        # Double hashing: column_i = h1 + i * h2 (mod width)
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)
+        rows = np.arange(self.depth, dtype=np.uint64)[:, None]
+        return ((h1[None, :] + rows * h2[None, :]) % np.uint64(self.width)).astype(np.int64)
+
+    def add_hashes(self, hashes: np.ndarray, counts: Optional[np.ndarray] = None):
+        """Add pre-hashed keys (uint64 array) with optional per-key counts"""
+        if len(hashes) == 0:
+            return
+        columns = self._columns(np.asarray(hashes, dtype=np.uint64))
+        for row in range(self.depth):
+            self.table[row] += np.bincount(columns[row], weights=counts, minlength=self.width).astype(np.int64)
+
+    def add(self, key: str, count: int = 1):
+        self.add_hashes(np.array([hash64(key)], dtype=np.uint64), np.array([count]))
+
+    def estimate(self, key: str) -> int:
+        columns = self._columns(np.array([hash64(key)], dtype=np.uint64))[:, 0]
+        return int(self.table[np.arange(self.depth), columns].min())
+
+    def merge(self, other: 'CountMinSketch') -> 'CountMinSketch':
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Count-Min sketches must have the same dimensions to merge")
+        self.table += other.table
+        return self
+
+
+class SpaceSaving:
+    """Top-K heavy hitters (Metwally et al.) with weighted updates
+
+    Each tracked key stores [count, error, payload]; its true count lies in
+    [count - error, count]. A key evicted from a full summary is replaced by
+    the new key, which inherits the evicted count as its error.
+    """
+
+    def __init__(self, k: int = DEFAULT_TOP_K):
+        self.k = k
+        self.counters: Dict[str, List] = {}
+        # Lazy min-heap of (count, key); stale entries are skipped on eviction
+        self._heap: List = []
+
+    def add(self, key: str, count: int = 1, payload=None):
+        entry = self.counters.get(key)
+        if entry is not None:
+            entry[0] += count
+        elif len(self.counters) < self.k:
+            entry = self.counters[key] = [count, 0, payload]
+        else:
+            floor, evicted = self._pop_min()
+            del self.counters[evicted]
+            entry = self.counters[key] = [floor + count, floor, payload]
+        heapq.heappush(self._heap, (entry[0], key))
+        if len(self._heap) > 8 * self.k:
+            self._heap = [(entry[0], key) for key, entry in self.counters.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self):
+        while True:
+            count, key = heapq.heappop(self._heap)
+            entry = self.counters.get(key)
+            if entry is not None and entry[0] == count:
+                return count, key
+
+    def min_count(self) -> int:
+        if len(self.counters) < self.k:
+            return 0
+        return min(entry[0] for entry in self.counters.values())
+
+    def merge(self, other: 'SpaceSaving') -> 'SpaceSaving':
+        """Combine two summaries (Agarwal et al., mergeable summaries)
+
+        A key missing from one side may have been counted up to that side's
+        minimum, so it is added as both count and error before keeping the top k.
+        """
+        self_floor, other_floor = self.min_count(), other.min_count()
+        merged = {}
+        for key in set(self.counters) | set(other.counters):
+            mine = self.counters.get(key, [self_floor, self_floor, None])
+            theirs = other.counters.get(key, [other_floor, other_floor, None])
+            merged[key] = [mine[0] + theirs[0], mine[1] + theirs[1],
+                           mine[2] if mine[2] is not None else theirs[2]]
+        top = heapq.nlargest(self.k, merged.items(), key=lambda item: item[1][0])
+        self.counters = dict(top)
+        self._heap = [(entry[0], key) for key, entry in self.counters.items()]
+        heapq.heapify(self._heap)
+        return self
+
+    def top(self, n: Optional[int] = None) -> List:
+        """[(key, count, error, payload)] by descending count"""
+        ranked = sorted(self.counters.items(), key=lambda item: -item[1][0])[:n]
+        return [(key, count, error, payload) for key, (count, error, payload) in ranked]
+
+
+class HyperLogLog:
+    """Distinct-count estimator with 2**precision one-byte registers (~1.04/sqrt(m) error)"""
+
+    def __init__(self, precision: int = DEFAULT_HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add_hashes(self, hashes: np.ndarray):
+        if len(hashes) == 0:
+            return
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        index = (hashes >> np.uint64(64 - self.precision)).astype(np.int64)
+        # Rank = position of the first 1 bit in the next 32 bits (exact in float64)
+        rest = ((hashes >> np.uint64(32 - self.precision)) & np.uint64(0xFFFFFFFF)).astype(np.float64)
+        rank = np.where(rest > 0, 32 - np.floor(np.log2(np.maximum(rest, 1))), 33).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def add(self, key: str):
+        self.add_hashes(np.array([hash64(key)], dtype=np.uint64))
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        if self.precision != other.precision:
+            raise ValueError("HyperLogLog sketches must have the same precision to merge")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+
+class ErrorSketch:
+    """Fixed-memory summary of a stream of error records
+
+    Tracks exact totals per type, the top-K message fingerprints (with one
+    sample record each), Count-Min estimates for any fingerprint and
+    HyperLogLog counts of distinct messages and fingerprints.
+    """
+
+    def __init__(self, k: int = DEFAULT_TOP_K, width: int = DEFAULT_CMS_WIDTH,
+                 depth: int = DEFAULT_CMS_DEPTH, precision: int = DEFAULT_HLL_PRECISION):
+        self.totals = {'ERROR': 0, 'WARNING': 0}
+        self.top_k = SpaceSaving(k)
+        self.counts = CountMinSketch(width, depth)
+        self.messages = HyperLogLog(precision)
+        self.fingerprints = HyperLogLog(precision)
+        self._pending: Dict[str, List] = {}
+        self._message_hashes: List[int] = []
+
+    def add(self, record: Dict):
+        self.totals[record['type']] = self.totals.get(record['type'], 0) + 1
+        self._message_hashes.append(hash64(record['message']))
+        key = fingerprint(record['message'])
+        pending = self._pending.get(key)
+        if pending is None:
+            self._pending[key] = [1, record]
+        else:
+            pending[0] += 1
+        if len(self._message_hashes) >= FLUSH_EVERY:
+            self.flush()
+
+    def update(self, records: Iterable[Dict]) -> 'ErrorSketch':
+        for record in records:
+            self.add(record)
+        self.flush()
+        return self
+
+    def flush(self):
+        """Push buffered records into the sketches in one vectorized batch"""
+        if self._pending:
+            keys = list(self._pending)
+            hashes = np.fromiter((hash64(key) for key in keys), dtype=np.uint64, count=len(keys))
+            counts = np.fromiter((self._pending[key][0] for key in keys), dtype=np.float64, count=len(keys))
+            self.counts.add_hashes(hashes, counts)
+            self.fingerprints.add_hashes(hashes)
+            for key in keys:
+                count, sample = self._pending[key]
+                self.top_k.add(key, count, sample)
+            self._pending = {}
+        if self._message_hashes:
+            self.messages.add_hashes(np.array(self._message_hashes, dtype=np.uint64))
+            self._message_hashes = []
+
+    def merge(self, other: 'ErrorSketch') -> 'ErrorSketch':
+        self.flush()
+        other.flush()
+        for level, count in other.totals.items():
+            self.totals[level] = self.totals.get(level, 0) + count
+        self.top_k.merge(other.top_k)
+        self.counts.merge(other.counts)
+        self.messages.merge(other.messages)
+        self.fingerprints.merge(other.fingerprints)
+        return self
+
+    def __getstate__(self):
+        # Workers send sketches back to the parent by pickling
+        self.flush()
+        return self.__dict__
+
+    @property
+    def total(self) -> int:
+        return sum(self.totals.values())
+
+    def estimate(self, message: str) -> int:
+        """Approximate occurrences of a message's fingerprint"""
+        self.flush()
+        return self.counts.estimate(fingerprint(message))
+
+    def top(self, n: Optional[int] = None) -> List[Dict]:
+        """Heaviest fingerprints with their count bounds and a sample record"""
+        self.flush()
+        return [
+            {
+                'rank': rank,
+                'fingerprint': key,
+                'error': sample,
+                'count': count,
+                'count_min': count - error,
+                'cms_estimate': self.counts.estimate(key),
+            }
+            for rank, (key, count, error, sample) in enumerate(self.top_k.top(n), 1)
+        ]
+
+    def summary(self, n: Optional[int] = None) -> Dict:
+        self.flush()
+        return {
+            'total': self.total,
+            'totals': dict(self.totals),
+            'distinct_messages': self.messages.count(),
+            'distinct_fingerprints': self.fingerprints.count(),
+            'top': self.top(n),
+        }
@@ -0,0 +1,243 @@
+"""
+Log input layer: transparent streaming decompression.
+
+Compression is detected from magic bytes, not file extensions, and data is
+decompressed through bounded buffers so archives never have to be expanded
+to disk or fully into memory. Supported: gzip, bzip2, xz, zstd (needs the
+optional ``zstandard`` package) and tar bundles of any of them.
+"""
+
+import io
+import os
+import struct
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+BUFFER_SIZE = 256 * 1024
+
+MAGIC = [
+    (b'\x1f\x8b', 'gzip'),
+    (b'\x28\xb5\x2f\xfd', 'zstd'),
+    (b'BZh', 'bzip2'),
+    (b'\xfd7zXZ\x00', 'xz'),
+]
+
+Source = Union[str, os.PathLike, BinaryIO]
+
+
+def detect_compression(head: bytes) -> Optional[str]:
+    """Return the codec name for the leading bytes of a stream, or None"""
+    for magic, codec in MAGIC:
+        if head.startswith(magic):
+            return codec
+    return None
+
+
+def is_tar(head: bytes) -> bool:
+    """Check for the ustar signature in the first tar header"""
+    return len(head) >= 262 and head[257:262] == b'ustar'
+
+
+class _ForwardOnly(io.RawIOBase):
+    """Raw adapter for streams (tar members in 'r|' mode) that cannot report seekability"""
+
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def readinto(self, buffer) -> int:
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _peek(stream: io.BufferedReader, size: int) -> bytes:
+    return stream.peek(size)[:size]
+
+
+def _decompress(stream: BinaryIO, codec: str) -> BinaryIO:
+    if codec == 'gzip':
+        import gzip
+        return gzip.GzipFile(fileobj=stream, mode='rb')
+    if codec == 'bzip2':
+        import bz2
+        return bz2.BZ2File(stream, mode='rb')
+    if codec == 'xz':
+        import lzma
+        return lzma.LZMAFile(stream, mode='rb')
+    if codec == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("Reading .zst logs requires the 'zstandard' package (pip install zstandard)")
+        return zstandard.ZstdDecompressor().stream_reader(stream, read_across_frames=True)
+    raise ValueError(f"Unsupported codec: {codec}")
+
+
+def _text(stream: BinaryIO) -> io.TextIOWrapper:
+    return io.TextIOWrapper(stream, encoding='utf-8', errors='replace', newline=None)
+
+
+def _open_binary(stream: BinaryIO, name: str) -> Iterator[Tuple[str, io.TextIOWrapper]]:
+    """Peel compression layers off a binary stream and yield text streams"""
+    stream = io.BufferedReader(stream, buffer_size=BUFFER_SIZE) if not hasattr(stream, 'peek') else stream
+    codec = detect_compression(_peek(stream, 8))
+
+    if codec:
+        stream = io.BufferedReader(_decompress(stream, codec), buffer_size=BUFFER_SIZE)
+        # Nested compression (e.g. .gz.zst) is rare but cheap to support
+        if detect_compression(_peek(stream, 8)):
+            yield from _open_binary(stream, name)
+            return
+
+    if is_tar(_peek(stream, 512)):
+        import tarfile
+        # Streaming mode ('r|') reads members sequentially without seeking
+        with tarfile.open(fileobj=stream, mode='r|') as bundle:
+            for member in bundle:
+                if not member.isfile():
+                    continue
+                member_stream = io.BufferedReader(_ForwardOnly(bundle.extractfile(member)), buffer_size=BUFFER_SIZE)
+                yield from _open_binary(member_stream, f"{name}:{member.name}")
+        return
+
+    yield name, _text(stream)
+
+
+def open_log_streams(source: Source, name: Optional[str] = None) -> Iterator[Tuple[str, io.TextIOWrapper]]:
+    """Yield (name, text stream) pairs for a path or binary file object
+
+    Plain and single-file compressed inputs yield one stream; tar bundles
+    yield one stream per member file.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        name = name or os.fspath(source)
+        with open(source, 'rb', buffering=BUFFER_SIZE) as f:
+            yield from _open_binary(f, name)
+    else:
+        yield from _open_binary(source, name or getattr(source, 'name', '<stream>'))
+
+
+def split_segments(path: str) -> Tuple[Optional[str], List[Tuple[int, int]]]:
+    """Find independently decompressible byte ranges in a compressed file
+
+    Returns (codec, [(start, end), ...]). BGZF-style gzip (block sizes in the
+    'BC' extra field) and multi-frame zstd can be split without decompressing;
+    anything else is returned as a single segment.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        head = f.read(8)
+        codec = detect_compression(head)
+        f.seek(0)
+        if codec == 'gzip':
+            segments = _bgzf_segments(f, size)
+        elif codec == 'zstd':
+            segments = _zstd_segments(f, size)
+        else:
+            segments = None
+    return codec, segments or [(0, size)]
+
+
+def _bgzf_segments(f: BinaryIO, size: int) -> Optional[List[Tuple[int, int]]]:
+    segments = []
+    offset = 0
+    while offset < size:
+        f.seek(offset)
+        header = f.read(12)
+        if len(header) < 12 or header[:2] != b'\x1f\x8b' or not header[3] & 0x04:
+            return None
+        xlen = struct.unpack('<H', header[10:12])[0]
+        extra = f.read(xlen)
+        block_size = None
+        pos = 0
+        while pos + 4 <= len(extra):
+            sub_id, sub_len = extra[pos:pos + 2], struct.unpack('<H', extra[pos + 2:pos + 4])[0]
+            if sub_id == b'BC' and sub_len == 2:
+                block_size = struct.unpack('<H', extra[pos + 4:pos + 6])[0] + 1
+            pos += 4 + sub_len
+        if block_size is None:
+            return None
+        segments.append((offset, offset + block_size))
+        offset += block_size
+    return segments
+
+
+def _zstd_segments(f: BinaryIO, size: int) -> Optional[List[Tuple[int, int]]]:
+    """Walk zstd frame and block headers to find frame boundaries"""
+    segments = []
+    offset = 0
+    while offset < size:
+        f.seek(offset)
+        magic = f.read(4)
+        if len(magic) < 4:
+            return None
+        magic_value = struct.unpack('<I', magic)[0]
+        if 0x184D2A50 <= magic_value <= 0x184D2A5F:
+            # Skippable frame
+            frame_size = struct.unpack('<I', f.read(4))[0]
+            offset += 8 + frame_size
+            continue
+        if magic != b'\x28\xb5\x2f\xfd':
+            return None
+
+        descriptor = f.read(1)[0]
+        fcs_flag = descriptor >> 6
+        single_segment = (descriptor >> 5) & 1
+        checksum = (descriptor >> 2) & 1
+        dict_id_flag = descriptor & 3
+        header_size = 1 + (0 if single_segment else 1)
+        header_size += [0, 1, 2, 4][dict_id_flag]
+        header_size += [1 if single_segment else 0, 2, 4, 8][fcs_flag]
+        pos = offset + 4 + header_size
+
+        while True:
+            f.seek(pos)
+            block_header = f.read(3)
+            if len(block_header) < 3:
+                return None
+            value = block_header[0] | (block_header[1] << 8) | (block_header[2] << 16)
+            last_block = value & 1
+            block_type = (value >> 1) & 3
+            block_size = value >> 3
+            # RLE blocks store a single byte regardless of their logical size
+            pos += 3 + (1 if block_type == 1 else block_size)
+            if last_block:
+                break
+        if checksum:
+            pos += 4
+        segments.append((offset, pos))
+        offset = pos
+    return segments
+
+
+def decompress_segment(path: str, codec: Optional[str], start: int, end: int) -> bytes:
+    """Decompress a byte range made of one or more whole gzip members or zstd frames"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    if codec == 'gzip':
+        import gzip
+        return gzip.decompress(data)
+    if codec == 'zstd':
+        import zstandard
+        reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data), read_across_frames=True)
+        return reader.read()
+    if codec is None:
+        return data
+    raise ValueError(f"Segments are not supported for codec: {codec}")
+
+
+def batch_segments(segments: List[Tuple[int, int]], batch_bytes: int) -> List[Tuple[int, int]]:
+    """Merge adjacent segments into ranges of roughly batch_bytes"""
+    batches = []
+    for start, end in segments:
+        if batches and batches[-1][1] == start and end - batches[-1][0] <= batch_bytes:
+            batches[-1] = (batches[-1][0], end)
+        else:
+            batches.append((start, end))
+    return batches
@@ -0,0 +1,287 @@
+"""
+Lightweight tracing and metrics for the log analysis workflow.
+
+Spans are recorded in-process and can be exported as OTLP-compatible
+JSON lines, rendered as Prometheus text, or printed as a summary table.
+
+Configure from the environment:
+    LOG_AGENT_METRICS_HOST=127.0.0.1    interface the /metrics endpoint binds to
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+# Loopback only unless exposure is asked for (e.g. 0.0.0.0 for a scraper on another host)
+DEFAULT_METRICS_HOST = os.getenv("LOG_AGENT_METRICS_HOST", "127.0.0.1")
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    """A single timed operation with attributes"""
+
+    def __init__(self, tracer: 'Tracer', name: str, parent: Optional['Span'] = None, **attributes):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes)
+        self.errors = 0
+        self.start_ns = 0
+        self.end_ns = 0
+        self._token = None
+
+    @property
+    def duration(self) -> float:
+        """Duration in seconds"""
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def set(self, key: str, value):
+        """Set an attribute on the span"""
+        self.attributes[key] = value
+
+    def add(self, key: str, amount: int = 1):
+        """Increment a numeric attribute"""
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def record_error(self, error):
+        """Count an error (raised or swallowed) against this span"""
+        self.errors += 1
+        self.attributes['error.message'] = str(error)[:200]
+
+    def __enter__(self):
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+        if exc is not None:
+            self.record_error(exc)
+        self.tracer._finish(self)
+        return False
+
+
+class _NoopSpan:
+    """Returned by current_span() outside of any span so callers need no checks"""
+
+    def set(self, key, value):
+        pass
+
+    def add(self, key, amount=1):
+        pass
+
+    def record_error(self, error):
+        pass
+
+
+class Tracer:
+    """Collects finished spans and aggregates them into metrics"""
+
+    def __init__(self, service_name: str = "log-analysis-agent", max_spans: int = 10000):
+        self.service_name = service_name
+        self.max_spans = max_spans
+        # Bounded so long-running processes (Streamlit) do not grow forever
+        self._spans = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+
+    def span(self, name: str, **attributes) -> Span:
+        """Create a span parented to the current one; use as a context manager"""
+        return Span(self, name, parent=_current_span.get(), **attributes)
+
+    def _finish(self, span: Span):
+        with self._lock:
+            self._spans.append(span)
+
+    def spans(self) -> List[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+
+    def aggregate(self) -> Dict[str, Dict]:
+        """Aggregate finished spans by name"""
+        stats: Dict[str, Dict] = {}
+        for span in self.spans():
+            entry = stats.setdefault(span.name, {
+                'count': 0,
+                'seconds': 0.0,
+                'max_seconds': 0.0,
+                'errors': 0,
+                'bytes': 0,
+                'cache_hits': 0,
+                'prompt_tokens': 0,
+                'completion_tokens': 0,
+            })
+            entry['count'] += 1
+            entry['seconds'] += span.duration
+            entry['max_seconds'] = max(entry['max_seconds'], span.duration)
+            entry['errors'] += span.errors
+            entry['bytes'] += int(span.attributes.get('bytes', 0))
+            entry['cache_hits'] += int(span.attributes.get('cache_hits', 0))
+            entry['prompt_tokens'] += int(span.attributes.get('llm.prompt_tokens', 0))
+            entry['completion_tokens'] += int(span.attributes.get('llm.completion_tokens', 0))
+        return stats
+
+    def export_jsonl(self, path: str):
+        """Append all spans as one OTLP/JSON ExportTraceServiceRequest line"""
+        spans = self.spans()
+        if not spans:
+            return
+
+        def attr(key, value):
+            if isinstance(value, bool):
+                return {'key': key, 'value': {'boolValue': value}}
+            if isinstance(value, int):
+                return {'key': key, 'value': {'intValue': str(value)}}
+            if isinstance(value, float):
+                return {'key': key, 'value': {'doubleValue': value}}
+            return {'key': key, 'value': {'stringValue': str(value)}}
+
+        otlp_spans = []
+        for span in spans:
+            item = {
+                'traceId': span.trace_id,
+                'spanId': span.span_id,
+                'name': span.name,
+                'kind': 1,
+                'startTimeUnixNano': str(span.start_ns),
+                'endTimeUnixNano': str(span.end_ns),
+                'attributes': [attr(k, v) for k, v in span.attributes.items()]
+                              + [attr('error.count', span.errors)],
+                'status': {'code': 2 if span.errors else 1},
+            }
+            if span.parent_id:
+                item['parentSpanId'] = span.parent_id
+            otlp_spans.append(item)
+
+        request = {
+            'resourceSpans': [{
+                'resource': {'attributes': [attr('service.name', self.service_name)]},
+                'scopeSpans': [{'scope': {'name': 'log_agent'}, 'spans': otlp_spans}],
+            }]
+        }
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(request) + '\n')
+
+    def prometheus_text(self) -> str:
+        """Render aggregated metrics in the Prometheus text exposition format"""
+        stats = self.aggregate()
+        metrics = [
+            ('log_agent_span_duration_seconds_sum', 'counter', 'Total time spent in span', 'seconds'),
+            ('log_agent_span_count', 'counter', 'Number of finished spans', 'count'),
+            ('log_agent_span_errors_total', 'counter', 'Errors recorded in span', 'errors'),
+            ('log_agent_bytes_processed_total', 'counter', 'Bytes processed', 'bytes'),
+            ('log_agent_cache_hits_total', 'counter', 'Cache hits', 'cache_hits'),
+        ]
+        lines = []
+        for metric, kind, help_text, key in metrics:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for name, entry in sorted(stats.items()):
+                lines.append(f'{metric}{{span="{name}"}} {entry[key]}')
+
+        lines.append("# HELP log_agent_llm_tokens_total LLM tokens used")
+        lines.append("# TYPE log_agent_llm_tokens_total counter")
+        for name, entry in sorted(stats.items()):
+            for kind in ('prompt', 'completion'):
+                if entry[f'{kind}_tokens']:
+                    lines.append(
+                        f'log_agent_llm_tokens_total{{span="{name}",kind="{kind}"}} {entry[f"{kind}_tokens"]}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+    def summary_table(self) -> str:
+        """Render a plain-text summary of spans grouped by name"""
+        stats = self.aggregate()
+        header = f"{'Span':<36}{'Count':>7}{'Total s':>10}{'Max s':>9}{'Errors':>8}{'Bytes':>12}{'Cache':>7}{'Tokens (p/c)':>16}"
+        lines = [header, '-' * len(header)]
+        for name, entry in sorted(stats.items(), key=lambda item: -item[1]['seconds']):
+            tokens = f"{entry['prompt_tokens']}/{entry['completion_tokens']}"
+            lines.append(
+                f"{name:<36}{entry['count']:>7}{entry['seconds']:>10.3f}{entry['max_seconds']:>9.3f}"
+                f"{entry['errors']:>8}{entry['bytes']:>12}{entry['cache_hits']:>7}{tokens:>16}"
+            )
+        return '\n'.join(lines)
+
+    def serve_prometheus(self, port: int, host: str = DEFAULT_METRICS_HOST):
+        """Serve /metrics on a background thread and return the server"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        tracer = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') not in ('', '/metrics'):
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = tracer.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer"""
+    return _tracer
+
+
+def current_span():
+    """Return the active span, or a no-op span outside of tracing"""
+    return _current_span.get() or _NoopSpan()
+
+
+def traced(name: str):
+    """Decorator that wraps a sync or async function in a span"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with get_tracer().span(name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with get_tracer().span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_llm_usage(response):
+    """Copy token usage from a LangChain response onto the current span"""
+    span = current_span()
+    usage = getattr(response, 'usage_metadata', None) or {}
+    prompt = usage.get('input_tokens')
+    completion = usage.get('output_tokens')
+    if prompt is None:
+        token_usage = (getattr(response, 'response_metadata', None) or {}).get('token_usage') or {}
+        prompt = token_usage.get('prompt_tokens', 0)
+        completion = token_usage.get('completion_tokens', 0)
+    span.add('llm.prompt_tokens', prompt or 0)
+    span.add('llm.completion_tokens', completion or 0)